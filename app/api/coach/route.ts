@@ -8,11 +8,26 @@ interface Message {
 interface CoachRequest {
   message: string;
   history: Message[];
+  conversationId?: string;
+  // Results of the user's latest search, and the ones they picked to compare
+  searchResults?: Record<string, unknown>[];
+  facilityIds?: string[];
+  // Care level the user needs (independent_living, assisted_living, memory_care)
+  careLevel?: string;
 }
 
-// Import Python orchestrator via subprocess (if available)
-// Otherwise use TypeScript fallback implementation
-const USE_PYTHON_ORCHESTRATOR = false; // Set to true when Python MCP is set up
+interface CoachResult {
+  type: string;
+  message: string;
+  data?: any;
+}
+
+// Python orchestrator via the long-lived coach worker (mcp/coach_worker.py),
+// so each turn is one HTTP request instead of a new Python process.
+// Otherwise, or when the worker is unavailable, use the TypeScript fallback.
+const USE_PYTHON_ORCHESTRATOR = process.env.USE_PYTHON_ORCHESTRATOR === 'true';
+const COACH_WORKER_URL = process.env.COACH_WORKER_URL || 'http://127.0.0.1:8787';
+const COACH_WORKER_TIMEOUT_MS = Number(process.env.COACH_WORKER_TIMEOUT_MS || 10000);
 
 /**
  * Senior Housing Coach API
@@ -29,7 +44,7 @@ const USE_PYTHON_ORCHESTRATOR = false; // Set to true when Python MCP is set up
 export async function POST(request: NextRequest) {
   try {
     const body: CoachRequest = await request.json();
-    const { message, history } = body;
+    const { message, history, conversationId, searchResults, facilityIds, careLevel } = body;
 
     if (!message?.trim()) {
       return NextResponse.json(
@@ -38,9 +53,11 @@ export async function POST(request: NextRequest) {
       );
     }
 
-    // Get the orchestrator and process message
-    const coach = getOrchestrator();
-    const result = await coach.processMessage(message, history);
+    // Prefer the Python worker; fall back to the local orchestrator
+    const result =
+      (USE_PYTHON_ORCHESTRATOR &&
+        await processWithWorker(message, history, conversationId, searchResults, facilityIds, careLevel)) ||
+      await getOrchestrator().processMessage(message, history);
 
     return NextResponse.json({
       message: result.message,
@@ -376,6 +393,44 @@ function getOrchestrator(): CoachOrchestrator {
   return orchestrator;
 }
 
+/**
+ * Send one turn to the coach worker.
+ * Returns null on any failure (busy, draining, timeout, unreachable) so the
+ * caller can answer from the TypeScript orchestrator instead.
+ */
+async function processWithWorker(
+  message: string,
+  history: Message[],
+  conversationId?: string,
+  searchResults?: Record<string, unknown>[],
+  facilityIds?: string[],
+  careLevel?: string
+): Promise<CoachResult | null> {
+  try {
+    const response = await fetch(`${COACH_WORKER_URL}/v1/message`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        message,
+        history,
+        conversation_id: conversationId,
+        search_results: searchResults,
+        facility_ids: facilityIds,
+        care_level: careLevel
+      }),
+      signal: AbortSignal.timeout(COACH_WORKER_TIMEOUT_MS)
+    });
+    if (!response.ok) {
+      console.warn(`Coach worker returned ${response.status}, using fallback`);
+      return null;
+    }
+    return await response.json();
+  } catch (error) {
+    console.warn('Coach worker unavailable, using fallback:', error);
+    return null;
+  }
+}
+
 /**
  * Handle budget-related coaching
  */
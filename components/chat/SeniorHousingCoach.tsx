@@ -57,6 +57,17 @@ const capabilities: CoachCapability[] = [
   }
 ];
 
+// Stable id for this browser's coach conversation, so the coach worker keeps
+// its facts in a session instead of re-reading the whole history every turn
+function coachConversationId(): string {
+  let id = localStorage?.getItem('coach-conversation-id');
+  if (!id) {
+    id = crypto.randomUUID();
+    localStorage?.setItem('coach-conversation-id', id);
+  }
+  return id;
+}
+
 export function SeniorHousingCoach() {
   const [isOpen, setIsOpen] = useState(false);
   const [showWelcome, setShowWelcome] = useState(true);
@@ -136,7 +147,8 @@ export function SeniorHousingCoach() {
         },
         body: JSON.stringify({
           message: text,
-          history: messages.map(m => ({ role: m.role, content: m.content }))
+          history: messages.map(m => ({ role: m.role, content: m.content })),
+          conversationId: coachConversationId()
         }),
       });
 
@@ -205,6 +217,7 @@ export function SeniorHousingCoach() {
     setShowWelcome(true);
     localStorage?.removeItem('coach-messages');
     localStorage?.removeItem('coach-welcome-seen');
+    localStorage?.removeItem('coach-conversation-id');
   };
 
   const handleCapabilityClick = (example: string) => {
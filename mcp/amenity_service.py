@@ -0,0 +1,215 @@
+"""
+Amenity Proximity Service
+
+Answers "what hospitals, pharmacies, transit stops and shops are near these
+facilities" without one upstream call per facility. Amenity locations are
+fetched and cached per fixed lat/lng tile and amenity type: a batch of
+facilities needs only the tiles their "near" radius touches, so the upstream
+cost is bounded by the area searched, not the number of facilities, and
+neighbouring searches share tiles. Concurrent requests for the same tile share
+one fetch. A tile holding more places than its fetch returned is marked
+partial, and so is every amenity type looked up through it: finding an
+amenity still counts, but finding none proves nothing.
+"""
+
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from place_records import PlaceRecord
+
+
+METERS_PER_DEGREE_LAT = 111320.0
+METERS_PER_MILE = 1609.34
+
+# (amenity type, tile row, tile column)
+TileKey = tuple[str, int, int]
+# Tile bounds as (south, west, north, east) in degrees
+TileBounds = tuple[float, float, float, float]
+# fetch_tile(amenity, bounds) returns the amenity places inside bounds and whether that is all
+# of them (False when the upstream had more pages than were fetched); raises on failure
+TileFetcher = Callable[[str, TileBounds], Awaitable[tuple[list[dict], bool]]]
+
+
+class AmenityCacheStats:
+    """Tile cache counters for the amenity service"""
+
+    def __init__(self):
+        self.tile_hits = 0
+        self.tile_misses = 0
+        self.coalesced = 0
+        self.fetch_failures = 0
+        self.partial_tiles = 0
+        self.evictions = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.tile_hits + self.tile_misses + self.coalesced
+        return {
+            "tile_hits": self.tile_hits,
+            "tile_misses": self.tile_misses,
+            "coalesced": self.coalesced,
+            "fetch_failures": self.fetch_failures,
+            "partial_tiles": self.partial_tiles,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.tile_hits + self.coalesced) / lookups, 4) if lookups else 0.0
+        }
+
+
+def _slim(place: dict) -> Optional[dict]:
+    """Keep only what proximity needs, as a flat row; cached tiles can hold many places"""
+    record = PlaceRecord.from_google(place)
+    if record.latitude is None or record.longitude is None:
+        return None
+    return {"id": record.id, "name": record.name, "latitude": record.latitude, "longitude": record.longitude}
+
+
+class AmenityService:
+    """
+    Tile-cached amenity lookups.
+
+    Tiles are tile_degrees on a side and stay fresh for ttl_seconds; at most
+    max_tiles are kept, least recently used evicted first.
+    """
+
+    def __init__(self, fetch_tile: TileFetcher, tile_degrees: float = 0.2,
+                 ttl_seconds: float = 7 * 24 * 3600, max_tiles: int = 5000):
+        self.fetch_tile = fetch_tile
+        self.tile_degrees = tile_degrees
+        self.ttl_seconds = ttl_seconds
+        self.max_tiles = max_tiles
+        self.stats = AmenityCacheStats()
+        self._tiles: OrderedDict[TileKey, tuple[list[dict], bool, float]] = OrderedDict()
+        self._inflight: dict[TileKey, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def tile_bounds(self, row: int, column: int) -> TileBounds:
+        size = self.tile_degrees
+        return (row * size, column * size, (row + 1) * size, (column + 1) * size)
+
+    def tiles_near(self, lats: np.ndarray, lngs: np.ndarray, radius_miles: float) -> set[tuple[int, int]]:
+        """Every tile within radius_miles of any of the points"""
+        radius_meters = radius_miles * METERS_PER_MILE
+        lat_span = radius_meters / METERS_PER_DEGREE_LAT
+        lng_span = radius_meters / (METERS_PER_DEGREE_LAT * np.maximum(np.cos(np.radians(lats)), 0.01))
+
+        size = self.tile_degrees
+        low_rows = np.floor((lats - lat_span) / size).astype(int)
+        high_rows = np.floor((lats + lat_span) / size).astype(int)
+        low_columns = np.floor((lngs - lng_span) / size).astype(int)
+        high_columns = np.floor((lngs + lng_span) / size).astype(int)
+
+        tiles = set()
+        for low_row, high_row, low_column, high_column in zip(low_rows, high_rows, low_columns, high_columns):
+            for row in range(low_row, high_row + 1):
+                for column in range(low_column, high_column + 1):
+                    tiles.add((row, column))
+        return tiles
+
+    def _store(self, key: TileKey, places: list[dict], complete: bool) -> None:
+        self._tiles[key] = (places, complete, time.monotonic())
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _fetch(self, key: TileKey) -> asyncio.Task:
+        """Start (or join) the single upstream fetch for a tile"""
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+
+        async def run() -> tuple[list[dict], bool]:
+            try:
+                amenity, row, column = key
+                places, complete = await self.fetch_tile(amenity, self.tile_bounds(row, column))
+                if not complete:
+                    self.stats.partial_tiles += 1
+                slim = [place for place in map(_slim, places) if place is not None]
+                self._store(key, slim, complete)
+                return slim, complete
+            except Exception:
+                self.stats.fetch_failures += 1
+                raise
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.ensure_future(run())
+        self._inflight[key] = task
+        return task
+
+    async def _tile(self, key: TileKey) -> tuple[list[dict], bool]:
+        entry = self._tiles.get(key)
+        if entry is not None:
+            places, complete, fetched_at = entry
+            if time.monotonic() - fetched_at < self.ttl_seconds:
+                self._tiles.move_to_end(key)
+                self.stats.tile_hits += 1
+                return places, complete
+            del self._tiles[key]
+
+        if key in self._inflight:
+            self.stats.coalesced += 1
+        else:
+            self.stats.tile_misses += 1
+        return await asyncio.shield(self._fetch(key))
+
+    async def amenities_near(self, facilities: list[dict],
+                             radius_miles: dict[str, float]) -> tuple[dict[str, list[dict]], set[str]]:
+        """
+        Amenities of each requested type within reach of any facility.
+
+        radius_miles maps amenity type to how far counts as "near". All
+        missing tiles, across every type, are fetched concurrently. A type
+        with any failed tile is left out of the result (unknown) so a gap
+        in the data is never mistaken for "nothing nearby". Returns the
+        amenities by type and the set of types with a partial tile, whose
+        places are real but may not be all of them.
+        """
+        located = [
+            place for place in facilities if place.get("latitude") is not None and place.get("longitude") is not None
+        ]
+        if not located or not radius_miles:
+            return {}, set()
+        lats = np.array([place["latitude"] for place in located], dtype=float)
+        lngs = np.array([place["longitude"] for place in located], dtype=float)
+
+        keys = [
+            (amenity, row, column)
+            for amenity, radius in radius_miles.items()
+            for row, column in sorted(self.tiles_near(lats, lngs, radius))
+        ]
+        tiles = await asyncio.gather(*(self._tile(key) for key in keys), return_exceptions=True)
+
+        amenities: dict[str, dict] = {amenity: {} for amenity in radius_miles}
+        failed = set()
+        partial = set()
+        for (amenity, _, _), tile in zip(keys, tiles):
+            if isinstance(tile, BaseException):
+                failed.add(amenity)
+                continue
+            places, complete = tile
+            if not complete:
+                partial.add(amenity)
+            for place in places:
+                place_id = place.get("id") or (place["latitude"], place["longitude"])
+                amenities[amenity][place_id] = place
+
+        found = {amenity: list(places.values()) for amenity, places in amenities.items() if amenity not in failed}
+        return found, partial - failed
+
+    def clear(self) -> None:
+        """Drop every cached tile"""
+        self._tiles.clear()
+
+    async def aclose(self) -> None:
+        """Cancel any in-flight tile fetches"""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._inflight.clear()
@@ -0,0 +1,123 @@
+"""
+Coach Worker Latency Benchmark
+
+Per-turn latency of the coach API's two ways of reaching the Python
+orchestrator: spawning a Python process per chat turn (interpreter startup,
+imports, one process_message call, JSON on stdout) versus one request to the
+long-lived coach worker service over a keep-alive connection.
+
+Usage:
+    python benchmarks/bench_coach_worker.py [--turns 20] [--concurrency 16]
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+MCP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(MCP_DIR))
+
+from coach_worker import CoachWorkerService, build_app  # noqa: E402
+from housing_coach_orchestrator import HousingCoachOrchestrator  # noqa: E402
+from aiohttp import web  # noqa: E402
+
+
+TURNS = [
+    "Hello there",
+    "What can I afford on $2,400 a month from Social Security?",
+    "I use a walker and need an elevator",
+    "Find assisted living in Cleveland",
+    "Can you compare the two places we talked about?",
+    "Please make a report I can share with my family"
+]
+
+# What a per-turn subprocess would run: import the orchestrator, answer, print JSON
+SUBPROCESS_SCRIPT = """
+import asyncio, json, sys
+from housing_coach_orchestrator import HousingCoachOrchestrator
+request = json.load(sys.stdin)
+result = asyncio.run(HousingCoachOrchestrator().process_message(request["message"], request["history"]))
+json.dump(result, sys.stdout)
+"""
+
+
+def percentiles(latencies: list[float]) -> str:
+    ordered = sorted(latencies)
+    pick = lambda fraction: ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000  # noqa: E731
+    return f"p50 {pick(0.50):8.2f} ms   p95 {pick(0.95):8.2f} ms   max {ordered[-1] * 1000:8.2f} ms"
+
+
+def measure_subprocess(turns: int) -> list[float]:
+    latencies = []
+    for i in range(turns):
+        payload = json.dumps({"message": TURNS[i % len(TURNS)], "history": []})
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-c", SUBPROCESS_SCRIPT], input=payload, capture_output=True,
+            text=True, cwd=MCP_DIR, check=True
+        )
+        json.loads(completed.stdout)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def measure_worker(turns: int, concurrency: int) -> tuple[list[float], list[float], float]:
+    """Sequential per-turn latency, then concurrent latency and throughput"""
+    service = CoachWorkerService(HousingCoachOrchestrator())
+    service.start()
+    runner = web.AppRunner(build_app(service))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1/message"
+
+    try:
+        async with aiohttp.ClientSession() as session:
+
+            async def turn(i: int, conversation_id: str = None) -> float:
+                body = {"message": TURNS[i % len(TURNS)], "history": []}
+                if conversation_id:
+                    body["conversation_id"] = conversation_id
+                started = time.perf_counter()
+                async with session.post(url, json=body) as response:
+                    await response.json()
+                return time.perf_counter() - started
+
+            await turn(0)  # open the keep-alive connection
+            sequential = [await turn(i) for i in range(turns)]
+
+            total = turns * concurrency
+            started = time.perf_counter()
+            concurrent = await asyncio.gather(*(turn(i, f"bench-{i % concurrency}") for i in range(total)))
+            throughput = total / (time.perf_counter() - started)
+    finally:
+        await service.drain()
+        await runner.cleanup()
+
+    return sequential, list(concurrent), throughput
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    subprocess_latencies = measure_subprocess(args.turns)
+    sequential, concurrent, throughput = asyncio.run(measure_worker(args.turns, args.concurrency))
+
+    print(f"subprocess per turn      {percentiles(subprocess_latencies)}")
+    print(f"worker per turn          {percentiles(sequential)}")
+    print(f"worker x{args.concurrency:<3} concurrent  {percentiles(concurrent)}   {throughput:,.0f} turns/sec")
+    speedup = sorted(subprocess_latencies)[len(subprocess_latencies) // 2] / sorted(sequential)[len(sequential) // 2]
+    print(f"median per-turn speedup: {speedup:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
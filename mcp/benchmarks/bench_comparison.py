@@ -0,0 +1,124 @@
+"""
+Facility Comparison Benchmark
+
+Latency of FacilityComparison at several result-set sizes: compare() over
+every facility (values, deltas, ranks and Pareto set), and keeping the
+matrix current when one search result is swapped out, incrementally with
+sync() versus rebuilding the comparison. The run fails (exit code 1) when
+compare() for --budget-facilities facilities has a p95 over --budget-ms.
+
+Usage:
+    python benchmarks/bench_comparison.py [--sizes 10 100 500 1000] [--repeats 50]
+        [--budget-facilities 100] [--budget-ms 25] [--output benchmarks/results/bench_comparison.json]
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+MCP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(MCP_DIR))
+
+from comparison import FacilityComparison  # noqa: E402
+from facility_matching import WHEELCHAIR_OPTIONS  # noqa: E402
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "bench_comparison.json"
+
+HOUSING_TYPES = ["senior_apartments", "independent_living", "assisted_living", "memory_care"]
+
+
+def synthetic_place(i: int, rng: random.Random) -> dict:
+    """A result row shaped like search_senior_housing output, with some fields missing"""
+    return {
+        "id": f"place-{i}",
+        "name": f"Facility {i}",
+        "estimatedMonthlyCost": rng.choice([1500.0, 3000.0, 5000.0, 7500.0, None]),
+        "rating": rng.choice([None, round(rng.uniform(2.5, 5.0), 1)]),
+        "distanceMiles": round(rng.uniform(0.2, 25.0), 2),
+        "accessibilityOptions": {option: rng.random() < 0.7 for option in WHEELCHAIR_OPTIONS if rng.random() < 0.8},
+        "matchedHousingTypes": rng.sample(HOUSING_TYPES, rng.randint(0, 2)) or None
+    }
+
+
+def percentile_ms(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+
+def timed(fn, repeats: int) -> dict:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {"p50_ms": percentile_ms(samples, 0.50), "p95_ms": percentile_ms(samples, 0.95)}
+
+
+def measure(size: int, repeats: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    places = [synthetic_place(i, rng) for i in range(size)]
+    comparison = FacilityComparison(places)
+    pareto = len(comparison.compare()["pareto"])
+
+    # One result replaced per refresh, as when a search is re-run
+    replacements = iter(range(size, size + repeats + 1))
+
+    def incremental():
+        places[rng.randrange(size)] = synthetic_place(next(replacements), rng)
+        comparison.sync(places)
+
+    return {
+        "facilities": size,
+        "pareto": pareto,
+        "compare": timed(comparison.compare, repeats),
+        "sync_one_change": timed(incremental, repeats),
+        "rebuild": timed(lambda: FacilityComparison(places), repeats)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--budget-facilities", type=int, default=100)
+    parser.add_argument("--budget-ms", type=float, default=25.0, help="p95 compare() budget")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    results = []
+    for size in sorted(set(args.sizes) | {args.budget_facilities}):
+        result = measure(size, args.repeats, args.seed)
+        results.append(result)
+        print(f"{size:>6} facilities  compare p50 {result['compare']['p50_ms']:8.3f} ms  "
+              f"p95 {result['compare']['p95_ms']:8.3f} ms   "
+              f"sync p50 {result['sync_one_change']['p50_ms']:7.3f} ms   "
+              f"rebuild p50 {result['rebuild']['p50_ms']:8.3f} ms   pareto {result['pareto']}")
+
+    report = {
+        "benchmark": "bench_comparison",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "sizes": results
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\nresults written to {args.output}")
+
+    budgeted = next(result for result in results if result["facilities"] == args.budget_facilities)
+    if budgeted["compare"]["p95_ms"] > args.budget_ms:
+        print(f"compare() p95 {budgeted['compare']['p95_ms']:.1f}ms for {args.budget_facilities} facilities "
+              f"over budget {args.budget_ms:.0f}ms")
+        sys.exit(1)
+    print("compare() within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Import-time (Cold Start) Benchmark
+
+The MCP server, the orchestrator and the coach worker run in scale-to-zero
+containers, so the time to import them is latency a user waits through.
+Each entry module is imported in a fresh interpreter under -X importtime,
+several times. The report gives the median wall-clock import time and the
+packages that cost the most (self time summed per top-level package). The
+run fails (exit code 1) when a module is over its cold-start budget or when
+a dependency that should load lazily was imported eagerly.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 7] [--top 10]
+        [--module senior_housing_server ...] [--budget senior_housing_server=2500]
+        [--output benchmarks/results/bench_import.json]
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+MCP_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "bench_import.json"
+
+# Cold-start budget (median import, ms) and dependencies each module must not load at import
+ENTRY_POINTS = {
+    "senior_housing_server": {"budget_ms": 2500, "lazy": ["aiohttp"]},
+    "housing_coach_orchestrator": {"budget_ms": 250, "lazy": ["aiohttp", "numpy", "fastmcp", "pydantic"]},
+    "coach_worker": {"budget_ms": 600, "lazy": ["numpy", "fastmcp", "pydantic"]}
+}
+
+# Runs in the child interpreter: time the import, then report which lazy modules got loaded
+CHILD_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"import_ms": elapsed * 1000, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every line of -X importtime output"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header row
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def by_package(entries: list[tuple[str, int, int]]) -> dict[str, float]:
+    """Self time in ms summed per top-level package"""
+    totals: dict[str, float] = defaultdict(float)
+    for name, self_us, _ in entries:
+        totals[name.split(".")[0]] += self_us / 1000
+    return dict(totals)
+
+
+def measure(module: str, lazy: list[str], runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT.format(module=module, lazy=lazy)],
+            capture_output=True, text=True, cwd=MCP_DIR, check=True
+        )
+        samples.append((json.loads(completed.stdout.strip().splitlines()[-1]), parse_importtime(completed.stderr)))
+
+    # Report the breakdown of the median run so packages add up to the headline number
+    samples.sort(key=lambda sample: sample[0]["import_ms"])
+    result, entries = samples[len(samples) // 2]
+    packages = sorted(by_package(entries).items(), key=lambda item: item[1], reverse=True)
+    return {
+        "module": module,
+        "import_ms": {
+            "median": round(result["import_ms"], 1),
+            "min": round(samples[0][0]["import_ms"], 1),
+            "max": round(samples[-1][0]["import_ms"], 1)
+        },
+        "modules_imported": len(entries),
+        "packages_ms": {name: round(ms, 1) for name, ms in packages},
+        "eagerly_loaded": sorted({name for sample, _ in samples for name in sample["loaded"]})
+    }
+
+
+def check(result: dict, budget_ms: float) -> list[str]:
+    failures = []
+    if result["import_ms"]["median"] > budget_ms:
+        failures.append(f"{result['module']}: median import {result['import_ms']['median']:.0f}ms "
+                        f"over budget {budget_ms:.0f}ms")
+    for name in result["eagerly_loaded"]:
+        failures.append(f"{result['module']}: {name} imported at module load, expected lazily")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=10, help="packages to show per module")
+    parser.add_argument("--module", action="append", choices=list(ENTRY_POINTS))
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="override a module's cold-start budget")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    budgets = {module: entry["budget_ms"] for module, entry in ENTRY_POINTS.items()}
+    for override in args.budget:
+        module, _, ms = override.partition("=")
+        if module not in budgets:
+            parser.error(f"unknown module in --budget: {module}")
+        budgets[module] = float(ms)
+
+    results, failures = [], []
+    for module in args.module or list(ENTRY_POINTS):
+        result = measure(module, ENTRY_POINTS[module]["lazy"], args.runs)
+        result["budget_ms"] = budgets[module]
+        results.append(result)
+        failures.extend(check(result, budgets[module]))
+
+        timing = result["import_ms"]
+        print(f"{module}: median {timing['median']:.0f}ms (min {timing['min']:.0f}, max {timing['max']:.0f}), "
+              f"budget {budgets[module]:.0f}ms, {result['modules_imported']} modules")
+        for name, ms in list(result["packages_ms"].items())[:args.top]:
+            print(f"  {name:<32}{ms:>9.1f} ms")
+
+    report = {
+        "benchmark": "bench_import",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"runs": args.runs, "budgets_ms": budgets},
+        "modules": results
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\nresults written to {args.output}")
+
+    if failures:
+        print("\ncold-start budget failures:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("all modules within cold-start budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Intent Detection Benchmark
+
+Compares throughput of the compiled single-pass intent classifier against the
+original chained keyword scans over a corpus of representative chat messages.
+
+Usage:
+    python benchmarks/bench_intent.py [--repeat 2000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from housing_coach_orchestrator import HousingCoachOrchestrator  # noqa: E402
+
+
+CORPUS = [
+    "Hello there",
+    "Thanks so much for your help today",
+    "What can I afford on $2,400 a month from Social Security?",
+    "I use a walker and need an elevator",
+    "Find assisted living in Cleveland",
+    "Is there a pharmacy near the building?",
+    "Can you compare the two places we talked about?",
+    "Please make a report I can share with my family",
+    "What questions should I ask the realtor?",
+    "I want to be close to my daughter, she lives in Akron",
+    "Show me apartments under $1,500 with grab bars",
+    "Which one is better for someone in a wheelchair?",
+    "My kids want to see a document with the options",
+    "I'm not sure where to start, it all feels overwhelming",
+    "How far is the nearest hospital from Maple Gardens and what does it cost per month "
+    "including meals, utilities and transportation? I also use a walker most days.",
+]
+
+
+def legacy_detect_intent(message: str) -> str:
+    """The original first-match-wins implementation, kept for comparison"""
+    message_lower = message.lower()
+
+    if any(word in message_lower for word in ['budget', 'afford', 'cost', 'price', 'income', 'expense']):
+        return 'budget'
+    if any(word in message_lower for word in ['wheelchair', 'walker', 'elevator', 'accessible', 'mobility', 'disability']):
+        return 'accessibility'
+    if any(word in message_lower for word in ['near', 'close to', 'proximity', 'distance', 'family', 'hospital', 'pharmacy']):
+        return 'location'
+    if any(word in message_lower for word in ['find', 'search', 'show me', 'looking for', 'apartment', 'housing']):
+        return 'search'
+    if any(word in message_lower for word in ['compare', 'difference', 'better', 'versus', 'vs', 'which one']):
+        return 'compare'
+    if any(word in message_lower for word in ['report', 'document', 'share', 'family', 'kids', 'children', 'show my']):
+        return 'report'
+    if any(word in message_lower for word in ['realtor', 'agent', 'questions', 'prepare', 'ready to']):
+        return 'prep'
+    return 'general'
+
+
+def measure(detect, repeat: int) -> float:
+    """Messages classified per second"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in CORPUS:
+            detect(message)
+    elapsed = time.perf_counter() - start
+    return repeat * len(CORPUS) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    orchestrator = HousingCoachOrchestrator()
+    compiled = lambda message: orchestrator.detect_intent(message, [])  # noqa: E731
+
+    legacy_rate = measure(legacy_detect_intent, args.repeat)
+    compiled_rate = measure(compiled, args.repeat)
+
+    print(f"{'implementation':<16}{'msgs/sec':>14}")
+    print(f"{'legacy':<16}{legacy_rate:>14,.0f}")
+    print(f"{'compiled':<16}{compiled_rate:>14,.0f}")
+    print(f"speedup: {compiled_rate / legacy_rate:.2f}x")
+
+    changed = [
+        (message, legacy_detect_intent(message), compiled(message))
+        for message in CORPUS
+        if legacy_detect_intent(message) != compiled(message)
+    ]
+    if changed:
+        print("\nmessages routed differently (legacy -> compiled):")
+        for message, old, new in changed:
+            print(f"  {old:>13} -> {new:<13} {message[:60]}")
+
+
+if __name__ == "__main__":
+    main()
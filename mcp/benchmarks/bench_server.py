@@ -0,0 +1,309 @@
+"""
+MCP Server Load Benchmark
+
+Drives the MCP tools and HousingCoachOrchestrator with concurrent synthetic
+workloads against the local fake Google server, and reports throughput,
+p50/p95/p99 latency and memory per scenario. Results are written as JSON and
+can be compared against an earlier run to catch regressions.
+
+Usage:
+    python benchmarks/bench_server.py [--requests 200] [--concurrency 20]
+        [--latency-ms 80] [--error-rate 0.0] [--scenario search_cold ...]
+        [--output benchmarks/results/bench_server.json]
+        [--baseline benchmarks/results/baseline.json --tolerance 0.15]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import senior_housing_server as server  # noqa: E402
+from housing_coach_orchestrator import HousingCoachOrchestrator  # noqa: E402
+from http_client import close_http_session, google_guard  # noqa: E402
+from fake_google import FakeGoogleConfig, FakeGoogleServer  # noqa: E402
+
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "bench_server.json"
+
+WARM_LOCATIONS = ["Cleveland, OH", "Akron, OH", "Columbus, OH", "Dayton, OH", "Toledo, OH"]
+
+CHAT_MESSAGES = [
+    "Hello there",
+    "What can I afford on $2,400 a month from Social Security?",
+    "I use a walker and need an elevator",
+    "Find assisted living in Cleveland",
+    "Can you compare the two places we talked about?",
+    "Please make a report I can share with my family",
+    "I want to be close to my daughter, she lives in Akron",
+    "Show me apartments under $1,500 with grab bars"
+]
+
+
+class BenchContext:
+    """Minimal stand-in for the FastMCP context: accepts every elicitation"""
+
+    class AcceptedElicitation:
+        def __init__(self, value):
+            self.value = value
+
+    class DeclinedElicitation:
+        pass
+
+    class CancelledElicitation:
+        pass
+
+    def __init__(self, answers: dict):
+        self.answers = answers
+
+    async def elicit(self, model):
+        return self.AcceptedElicitation(self.answers[model])
+
+    async def report_progress(self, progress, total=None, message=None) -> None:
+        pass
+
+
+def tool_fn(tool):
+    """
+    The coroutine function behind an @mcp.tool() registration.
+
+    Tools return an encoded ToolResult; the structured content is handed back
+    so scenarios still see the response dict, with encoding in the timing.
+    """
+    fn = getattr(tool, "fn", tool)
+
+    async def call(*args, **kwargs):
+        result = await fn(*args, **kwargs)
+        return getattr(result, "structured_content", result)
+
+    return call
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def max_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+async def run_scenario(name: str, call: Callable[[int], Awaitable[dict]], requests: int,
+                       concurrency: int, trace_memory: bool) -> dict:
+    """Issue requests calls from concurrency workers and summarize them"""
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                result = await call(index)
+                status = str(result.get("status", result.get("type", "ok")))
+            except Exception as e:
+                status = f"exception:{type(e).__name__}"
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    traced_peak = None
+    if trace_memory:
+        traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_per_second": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0
+        },
+        "statuses": statuses,
+        "max_rss_mb": round(max_rss_mb(), 1),
+        "traced_peak_mb": round(traced_peak, 2) if traced_peak is not None else None
+    }
+
+
+def reset_server_state() -> None:
+    """Start each scenario with empty caches and a fresh facility index"""
+    server.geocode_cache.clear()
+    server.places_cache.clear()
+    server.facility_index.clear()
+
+
+def build_scenarios(orchestrator: HousingCoachOrchestrator) -> dict[str, Callable[[int], Awaitable[dict]]]:
+    budget_ctx = BenchContext({server.BudgetAnalysisPreferences: server.BudgetAnalysisPreferences(
+        monthly_income=3200, current_expenses=900, savings=15000, healthcare_costs=250
+    )})
+
+    def search_ctx(location: str) -> BenchContext:
+        return BenchContext({server.HousingSearchPreferences: server.HousingSearchPreferences(
+            location=location, budget_min=1000, budget_max=4000,
+            housing_type=["assisted_living", "independent_living"], radius_miles=10
+        )})
+
+    async def search_cold(index: int) -> dict:
+        # A new location every call: geocode, Places and index all miss
+        return await tool_fn(server.search_senior_housing)(search_ctx(f"Benchtown {index}, OH"))
+
+    async def search_warm(index: int) -> dict:
+        return await tool_fn(server.search_senior_housing)(search_ctx(WARM_LOCATIONS[index % len(WARM_LOCATIONS)]))
+
+    async def search_batch(index: int) -> dict:
+        ctx = BenchContext({server.BatchHousingSearchPreferences: server.BatchHousingSearchPreferences(
+            locations=[f"Batchville {index}-{i}, OH" for i in range(5)], budget_min=1000, budget_max=4000
+        )})
+        return await tool_fn(server.search_senior_housing_batch)(ctx)
+
+    async def plan_budget(index: int) -> dict:
+        return await tool_fn(server.plan_budget)(budget_ctx)
+
+    async def orchestrator_chat(index: int) -> dict:
+        # Spread turns over a pool of conversations so sessions accumulate history
+        conversation_id = f"bench-{index % 50}"
+        return await orchestrator.process_conversation_message(
+            conversation_id, CHAT_MESSAGES[index % len(CHAT_MESSAGES)]
+        )
+
+    return {
+        "search_cold": search_cold,
+        "search_warm": search_warm,
+        "search_batch": search_batch,
+        "plan_budget": plan_budget,
+        "orchestrator_chat": orchestrator_chat
+    }
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    """Scenarios whose p95 latency or throughput regressed beyond tolerance"""
+    previous = {scenario["scenario"]: scenario for scenario in baseline.get("scenarios", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if before is None:
+            continue
+        p95_before, p95_after = before["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        if p95_before and p95_after > p95_before * (1 + tolerance):
+            regressions.append(f"{result['scenario']}: p95 {p95_before:.1f}ms -> {p95_after:.1f}ms")
+        rate_before, rate_after = before["throughput_per_second"], result["throughput_per_second"]
+        if rate_before and rate_after < rate_before * (1 - tolerance):
+            regressions.append(f"{result['scenario']}: throughput {rate_before:.1f}/s -> {rate_after:.1f}/s")
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    config = FakeGoogleConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        page_size=args.page_size,
+        pages=args.pages
+    )
+    if args.unthrottled:
+        google_guard.bucket.rate = google_guard.bucket.capacity = google_guard.bucket.tokens = 1e6
+        google_guard.limiter.limit = float(google_guard.limiter.maximum)
+
+    results = []
+    async with FakeGoogleServer(config) as fake:
+        server.GOOGLE_MAPS_API_KEY = "benchmark"
+        server.GOOGLE_PLACES_API_URL = fake.places_url
+        server.GOOGLE_GEOCODE_API_URL = fake.geocode_url
+
+        orchestrator = HousingCoachOrchestrator()
+        scenarios = build_scenarios(orchestrator)
+        try:
+            for name in args.scenario or list(scenarios):
+                reset_server_state()
+                if name == "search_warm":
+                    # Prime caches and the index so the measured calls are all warm
+                    await run_scenario(name, scenarios[name], len(WARM_LOCATIONS), 1, False)
+                result = await run_scenario(name, scenarios[name], args.requests, args.concurrency, args.trace_memory)
+                result["upstream_requests"] = fake.stats.as_dict()
+                results.append(result)
+                fake.stats.__init__()
+                print(
+                    f"{name:<18}{result['throughput_per_second']:>10,.1f}/s"
+                    f"{result['latency_ms']['p50']:>10.1f}{result['latency_ms']['p95']:>10.1f}"
+                    f"{result['latency_ms']['p99']:>10.1f}{result['max_rss_mb']:>10.1f}"
+                )
+        finally:
+            await orchestrator.aclose()
+            await server.places_cache.aclose()
+            await close_http_session()
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenario", action="append",
+                        choices=["search_cold", "search_warm", "search_batch", "plan_budget", "orchestrator_chat"])
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--unthrottled", action="store_true",
+                        help="lift the Google rate limit and concurrency cap to measure server overhead alone")
+    parser.add_argument("--trace-memory", action="store_true", help="report tracemalloc peak (slows every call)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<18}{'throughput':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rss MB':>10}")
+    results = asyncio.run(run(args))
+
+    report = {
+        "benchmark": "bench_server",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "scenarios": results
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\nresults written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print("\nregressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
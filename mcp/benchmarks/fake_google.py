@@ -0,0 +1,247 @@
+"""
+Fake Google API Server
+
+Local aiohttp stand-in for the Places searchText and Geocoding endpoints, so
+the MCP server can be benchmarked without an API key or network access.
+Latency, error rate, page size and page count are configurable; generated
+places are deterministic for a given query and center.
+
+Usage:
+    python benchmarks/fake_google.py [--port 8765] [--latency-ms 80] [--error-rate 0.02]
+
+then point the server at it:
+    GOOGLE_PLACES_API_URL=http://127.0.0.1:8765/v1/places:searchText
+    GOOGLE_GEOCODE_API_URL=http://127.0.0.1:8765/maps/api/geocode/json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+from dataclasses import dataclass
+
+from aiohttp import web
+
+
+PLACES_PATH = "/v1/places:searchText"
+GEOCODE_PATH = "/maps/api/geocode/json"
+
+HOUSING_TYPES = [
+    ["assisted_living_facility", "health", "point_of_interest"],
+    ["apartment_complex", "point_of_interest"],
+    ["nursing_home", "health", "point_of_interest"],
+    ["retirement_community", "point_of_interest"]
+]
+
+
+@dataclass
+class FakeGoogleConfig:
+    latency_ms: float = 80.0
+    jitter_ms: float = 20.0
+    error_rate: float = 0.0
+    page_size: int = 20
+    pages: int = 3
+    seed: int = 7
+
+
+class FakeGoogleStats:
+    """Requests served by the fake, by endpoint and outcome"""
+
+    def __init__(self):
+        self.places_requests = 0
+        self.geocode_requests = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def _stable_seed(*parts) -> int:
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def geocode_coordinates(address: str) -> dict:
+    """Deterministic continental-US coordinates for an address"""
+    rng = random.Random(_stable_seed(address.strip().lower()))
+    return {"lat": round(rng.uniform(30.0, 47.0), 6), "lng": round(rng.uniform(-120.0, -75.0), 6)}
+
+
+def generate_places(query: str, center: dict, radius_meters: float, page: int, page_size: int) -> list[dict]:
+    """One page of fake places scattered within radius_meters of center"""
+    rng = random.Random(_stable_seed(query, center.get("latitude"), center.get("longitude"), page))
+    latitude = center.get("latitude", 0.0)
+    longitude = center.get("longitude", 0.0)
+    places = []
+    for i in range(page_size):
+        distance = radius_meters * math.sqrt(rng.random())
+        bearing = rng.uniform(0, 2 * math.pi)
+        d_lat = distance * math.cos(bearing) / 111_320
+        d_lng = distance * math.sin(bearing) / (111_320 * max(math.cos(math.radians(latitude)), 0.01))
+        place_id = f"fake-{_stable_seed(query, page, i):x}"
+        place = {
+            "id": place_id,
+            "displayName": {"text": f"Fake Residence {page}-{i}", "languageCode": "en"},
+            "formattedAddress": f"{100 + i} Main St",
+            "location": {"latitude": latitude + d_lat, "longitude": longitude + d_lng},
+            "types": rng.choice(HOUSING_TYPES)
+        }
+        if rng.random() < 0.85:
+            place["rating"] = round(rng.uniform(2.5, 5.0), 1)
+        if rng.random() < 0.6:
+            accessible = rng.random() < 0.8
+            place["accessibilityOptions"] = {
+                "wheelchairAccessibleEntrance": accessible,
+                "wheelchairAccessibleParking": accessible or rng.random() < 0.5
+            }
+        if rng.random() < 0.7:
+            place["priceLevel"] = rng.choice([
+                "PRICE_LEVEL_INEXPENSIVE", "PRICE_LEVEL_MODERATE",
+                "PRICE_LEVEL_EXPENSIVE", "PRICE_LEVEL_VERY_EXPENSIVE"
+            ])
+        places.append(place)
+    return places
+
+
+def generate_places_in_rectangle(query: str, low: dict, high: dict, page: int, page_size: int) -> list[dict]:
+    """One page of fake places spread uniformly over a lat/lng rectangle"""
+    rng = random.Random(_stable_seed(query, low["latitude"], low["longitude"], page))
+    return [
+        {
+            "id": f"fake-{_stable_seed(query, low['latitude'], low['longitude'], page, i):x}",
+            "displayName": {"text": f"Fake {query.title()} {page}-{i}", "languageCode": "en"},
+            "location": {
+                "latitude": rng.uniform(low["latitude"], high["latitude"]),
+                "longitude": rng.uniform(low["longitude"], high["longitude"])
+            }
+        }
+        for i in range(page_size)
+    ]
+
+
+def build_app(config: FakeGoogleConfig) -> web.Application:
+    stats = FakeGoogleStats()
+    rng = random.Random(config.seed)
+
+    async def simulate_latency() -> bool:
+        """Sleep for the configured latency; True when this request should fail"""
+        delay = max(0.0, config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if rng.random() < config.error_rate:
+            stats.errors += 1
+            return True
+        return False
+
+    async def search_text(request: web.Request) -> web.Response:
+        stats.places_requests += 1
+        if await simulate_latency():
+            return web.json_response({"error": {"code": 503, "status": "UNAVAILABLE"}}, status=503)
+
+        body = await request.json()
+        page = int(body.get("pageToken") or 1)
+        rectangle = body.get("locationRestriction", {}).get("rectangle")
+        if rectangle:
+            places = generate_places_in_rectangle(
+                body.get("textQuery", ""), rectangle["low"], rectangle["high"], page, config.page_size
+            )
+        else:
+            circle = body.get("locationBias", {}).get("circle", {})
+            places = generate_places(
+                body.get("textQuery", ""), circle.get("center", {}), circle.get("radius", 16093),
+                page, config.page_size
+            )
+        data = {"places": places}
+        if page < config.pages:
+            data["nextPageToken"] = str(page + 1)
+        return web.json_response(data)
+
+    async def geocode(request: web.Request) -> web.Response:
+        stats.geocode_requests += 1
+        if await simulate_latency():
+            return web.json_response({"status": "UNKNOWN_ERROR", "results": []}, status=500)
+
+        address = request.query.get("address", "")
+        return web.json_response({
+            "status": "OK",
+            "results": [{"geometry": {"location": geocode_coordinates(address)}}]
+        })
+
+    app = web.Application()
+    app["config"] = config
+    app["stats"] = stats
+    app.router.add_post(PLACES_PATH, search_text)
+    app.router.add_get(GEOCODE_PATH, geocode)
+    return app
+
+
+class FakeGoogleServer:
+    """Run the fake on a local port for the lifetime of an async with block"""
+
+    def __init__(self, config: FakeGoogleConfig, host: str = "127.0.0.1", port: int = 0):
+        self.app = build_app(config)
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    @property
+    def config(self) -> FakeGoogleConfig:
+        return self.app["config"]
+
+    @property
+    def stats(self) -> FakeGoogleStats:
+        return self.app["stats"]
+
+    @property
+    def places_url(self) -> str:
+        return f"http://{self.host}:{self.port}{PLACES_PATH}"
+
+    @property
+    def geocode_url(self) -> str:
+        return f"http://{self.host}:{self.port}{GEOCODE_PATH}"
+
+    async def __aenter__(self) -> "FakeGoogleServer":
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the port when an ephemeral one was requested
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._runner.cleanup()
+
+
+async def serve(config: FakeGoogleConfig, port: int) -> None:
+    async with FakeGoogleServer(config, port=port) as server:
+        print(f"Places:    {server.places_url}")
+        print(f"Geocoding: {server.geocode_url}")
+        await asyncio.Event().wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=3)
+    args = parser.parse_args()
+
+    config = FakeGoogleConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        page_size=args.page_size,
+        pages=args.pages
+    )
+    try:
+        asyncio.run(serve(config, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Budget Planning Engine
+
+Affordability analysis for many households at once. Inputs are columns (one
+NumPy array per BudgetAnalysisPreferences field) and every analysis figure
+and recommendation flag is computed as an array over all households, so a
+caseload of thousands costs about the same as one. The plan_budget tool runs a
+batch of one through the same code.
+"""
+
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+
+
+# Share of monthly income for housing: recommended and ceiling
+RECOMMENDED_HOUSING_SHARE = 0.30
+MAX_HOUSING_SHARE = 0.40
+
+# Emergency fund target, in months of the recommended housing budget
+RESERVE_MONTHS = 6
+
+# Split of the recommended housing budget
+BREAKDOWN_SHARES = {
+    "base_rent": 0.70,
+    "utilities": 0.15,
+    "meals": 0.15
+}
+
+NUMERIC_FIELDS = ("monthly_income", "current_expenses", "savings", "healthcare_costs")
+FLAG_FIELDS = ("include_utilities", "include_meals")
+
+# Defaults match BudgetAnalysisPreferences; monthly_income is required
+FIELD_DEFAULTS = {
+    "current_expenses": 0.0,
+    "savings": 0.0,
+    "healthcare_costs": 0.0,
+    "include_utilities": True,
+    "include_meals": True
+}
+
+
+def budget_columns(records: Iterable[Any]) -> dict[str, np.ndarray]:
+    """Turn BudgetAnalysisPreferences models or plain dicts into input columns"""
+    rows = [record.model_dump() if hasattr(record, "model_dump") else record for record in records]
+    columns = {}
+    for field in NUMERIC_FIELDS + FLAG_FIELDS:
+        default = FIELD_DEFAULTS.get(field)
+        values = [row.get(field, default) for row in rows]
+        if field == "monthly_income" and any(value is None for value in values):
+            raise ValueError("monthly_income is required for every household")
+        columns[field] = np.array(values, dtype=bool if field in FLAG_FIELDS else float)
+    return columns
+
+
+def _input_column(columns: Mapping[str, Any], field: str, size: int) -> np.ndarray:
+    """One input field as an array of length size, filling in the model default"""
+    dtype = bool if field in FLAG_FIELDS else float
+    try:
+        values = columns[field]
+    except KeyError:
+        if field not in FIELD_DEFAULTS:
+            raise ValueError(f"missing required column: {field}") from None
+        return np.full(size, FIELD_DEFAULTS[field], dtype=dtype)
+
+    array = np.broadcast_to(np.asarray(values, dtype=dtype), (size,))
+    if dtype is float and not (np.isfinite(array).all() and (array >= 0).all()):
+        raise ValueError(f"{field} must be finite and non-negative")
+    return array
+
+
+def analyze_budgets(columns: Mapping[str, Any]) -> dict[str, np.ndarray]:
+    """
+    Affordability analysis for every household in columns.
+
+    columns maps field names to equal-length arrays (a dict of NumPy arrays,
+    a DataFrame or anything else indexable by column name); fields other than
+    monthly_income may be omitted to use their defaults. Returns one array per
+    analysis field and recommendation flag, unrounded.
+    """
+    size = np.asarray(columns["monthly_income"]).size
+    income = _input_column(columns, "monthly_income", size)
+    expenses = _input_column(columns, "current_expenses", size)
+    savings = _input_column(columns, "savings", size)
+    healthcare = _input_column(columns, "healthcare_costs", size)
+    include_utilities = _input_column(columns, "include_utilities", size)
+    include_meals = _input_column(columns, "include_meals", size)
+
+    available = income - expenses - healthcare
+    recommended = income * RECOMMENDED_HOUSING_SHARE
+    reserve = recommended * RESERVE_MONTHS
+
+    return {
+        "monthly_income": income,
+        "current_savings": savings,
+        "available_after_expenses": available,
+        "recommended_housing_budget": recommended,
+        "maximum_housing_budget": income * MAX_HOUSING_SHARE,
+        "recommended_savings_reserve": reserve,
+        "base_rent": recommended * BREAKDOWN_SHARES["base_rent"],
+        "utilities": np.where(include_utilities, recommended * BREAKDOWN_SHARES["utilities"], 0.0),
+        "meals": np.where(include_meals, recommended * BREAKDOWN_SHARES["meals"], 0.0),
+        "include_utilities": include_utilities,
+        "include_meals": include_meals,
+        "comfortable": available > recommended,
+        "needs_cost_reduction": available < recommended,
+        "needs_emergency_fund": savings < reserve
+    }
+
+
+def _analysis_dict(row: Mapping[str, Any]) -> dict:
+    """Build the plan_budget analysis dict from one household's Python scalars"""
+    recommended = row["recommended_housing_budget"]
+    reserve = row["recommended_savings_reserve"]
+
+    recommendations = []
+    if row["needs_cost_reduction"]:
+        recommendations.append("Consider shared housing or studios to reduce costs")
+        recommendations.append("Look into housing assistance programs")
+    if row["needs_emergency_fund"]:
+        recommendations.append(f"Build emergency fund to ${reserve:.0f}")
+    recommendations.append("Compare what's included: meals, utilities, activities")
+    recommendations.append("Ask about rate increases and fee structures")
+
+    return {
+        "monthly_income": row["monthly_income"],
+        "available_after_expenses": row["available_after_expenses"],
+        "recommended_housing_budget": round(recommended, 2),
+        "maximum_housing_budget": round(row["maximum_housing_budget"], 2),
+        "recommended_savings_reserve": round(reserve, 2),
+        "current_savings": row["current_savings"],
+        "budget_breakdown": {
+            "base_rent": round(row["base_rent"], 2),
+            "utilities": round(row["utilities"], 2) if row["include_utilities"] else 0,
+            "meals": round(row["meals"], 2) if row["include_meals"] else 0
+        },
+        "affordability_status": "comfortable" if row["comfortable"] else "tight",
+        "recommendations": recommendations
+    }
+
+
+def budget_analysis_record(analysis: Mapping[str, np.ndarray], index: int) -> dict:
+    """The plan_budget analysis dict for one household of a batch result"""
+    return _analysis_dict({field: values[index].item() for field, values in analysis.items()})
+
+
+def budget_analysis_records(analysis: Mapping[str, np.ndarray]) -> list[dict]:
+    """plan_budget-style analysis dicts for every household of a batch result"""
+    # One tolist() per column is far cheaper than indexing NumPy scalars per household
+    fields = list(analysis)
+    columns = [analysis[field].tolist() for field in fields]
+    return [_analysis_dict(dict(zip(fields, values))) for values in zip(*columns)]
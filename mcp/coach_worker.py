@@ -0,0 +1,389 @@
+"""
+Coach Worker Service
+
+Long-lived HTTP service in front of HousingCoachOrchestrator, so the coach
+API route pays interpreter startup and imports once instead of on every chat
+turn. Requests are queued to a fixed pool of async workers; a full queue is
+answered with 503 rather than unbounded waiting. Turns for the same
+conversation run one at a time in arrival order, so a client can pipeline a
+conversation's turns (or send them as one batch) without reordering. On
+SIGTERM/SIGINT the service stops accepting work, finishes what is queued and
+flushes stored messages before exiting.
+
+The frontend (lib/hooks/useChatHistory.ts) writes chat messages to the
+messages table itself, so by default a configured store is only read, to
+rehydrate evicted sessions. COACH_PERSIST_MESSAGES makes the worker write
+turns too, for deployments where nothing else does.
+
+Endpoints:
+    POST /v1/message   {"message", "history"?, "conversation_id"?, "search_results"?, "facility_ids"?,
+                        "care_level"?}
+    POST /v1/messages  {"turns": [<message body>, ...]}  results in order
+    GET  /healthz      liveness and counters
+    GET  /readyz       503 while draining
+
+Usage:
+    python coach_worker.py [--port 8787 | --socket /tmp/coach.sock]
+"""
+
+import os
+import signal
+import asyncio
+import argparse
+import functools
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+from housing_coach_orchestrator import HousingCoachOrchestrator
+from message_store import MessageSink, MessageWriter, PostgresMessageSink, SQLiteMessageSink, is_conversation_id
+from serialization import dumps
+
+
+# Worker Configuration
+COACH_WORKER_HOST = os.getenv("COACH_WORKER_HOST", "127.0.0.1")
+COACH_WORKER_PORT = int(os.getenv("COACH_WORKER_PORT", "8787"))
+COACH_WORKER_SOCKET = os.getenv("COACH_WORKER_SOCKET") or None
+COACH_WORKER_CONCURRENCY = int(os.getenv("COACH_WORKER_CONCURRENCY", "8"))
+COACH_WORKER_QUEUE_SIZE = int(os.getenv("COACH_WORKER_QUEUE_SIZE", "256"))
+COACH_WORKER_REQUEST_TIMEOUT = float(os.getenv("COACH_WORKER_REQUEST_TIMEOUT_SECONDS", "10"))
+COACH_WORKER_DRAIN_SECONDS = float(os.getenv("COACH_WORKER_DRAIN_SECONDS", "15"))
+COACH_WORKER_MAX_BATCH = int(os.getenv("COACH_WORKER_MAX_BATCH", "32"))
+
+# Message store: Postgres when a DSN is set, else SQLite when a path is set
+COACH_DATABASE_URL = os.getenv("COACH_DATABASE_URL") or None
+COACH_MESSAGES_PATH = os.getenv("COACH_MESSAGES_PATH") or None
+# Write turns to the store as well; leave off when the frontend already stores them
+COACH_PERSIST_MESSAGES = os.getenv("COACH_PERSIST_MESSAGES", "false").lower() in ("1", "true", "yes")
+
+
+class WorkerStats:
+    """Counters for the worker service"""
+
+    def __init__(self):
+        self.accepted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.cancelled = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+class CoachWorkerService:
+    """Worker pool, per-conversation ordering and drain for the orchestrator"""
+
+    def __init__(self, orchestrator: HousingCoachOrchestrator, concurrency: int = COACH_WORKER_CONCURRENCY,
+                 queue_size: int = COACH_WORKER_QUEUE_SIZE,
+                 request_timeout: float = COACH_WORKER_REQUEST_TIMEOUT):
+        self.orchestrator = orchestrator
+        self.concurrency = concurrency
+        self.request_timeout = request_timeout
+        self.stats = WorkerStats()
+        self.draining = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._workers: list[asyncio.Task] = []
+        # conversation id -> [lock, number of queued turns holding a reference]
+        self._conversation_locks: Dict[str, list] = {}
+
+    def start(self) -> None:
+        self._workers = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    def _conversation_lock(self, conversation_id: str) -> asyncio.Lock:
+        entry = self._conversation_locks.setdefault(conversation_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        return entry[0]
+
+    def _release_conversation(self, conversation_id: str) -> None:
+        entry = self._conversation_locks[conversation_id]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._conversation_locks[conversation_id]
+
+    async def _process(self, turn: Dict[str, Any]) -> Dict[str, Any]:
+        conversation_id = turn.get("conversation_id")
+        if conversation_id:
+            return await self.orchestrator.process_conversation_message(
+                conversation_id, turn["message"], turn.get("search_results"), turn.get("facility_ids"),
+                turn.get("care_level"), turn.get("history")
+            )
+        return await self.orchestrator.process_message(turn["message"], turn.get("history") or [])
+
+    async def _process_in_order(self, turn: Dict[str, Any], lock: Optional[asyncio.Lock]) -> Dict[str, Any]:
+        if lock is None:
+            return await self._process(turn)
+        async with lock:
+            return await self._process(turn)
+
+    async def _run(self) -> None:
+        while True:
+            turn, lock, future = await self._queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                # A caller that gives up (timeout, refused batch) cancels its future; the turn
+                # is cancelled with it, so a reply nobody received is never added to the session
+                task = asyncio.ensure_future(self._process_in_order(turn, lock))
+                future.add_done_callback(lambda done, task=task: task.cancel() if done.cancelled() else None)
+                try:
+                    await asyncio.wait([task])
+                except asyncio.CancelledError:
+                    task.cancel()
+                    raise
+                if task.cancelled():
+                    self.stats.cancelled += 1
+                    continue
+                result = task.result()
+                if not future.done():
+                    future.set_result(result)
+                self.stats.completed += 1
+            except Exception as e:
+                self.stats.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                if lock is not None:
+                    self._release_conversation(turn["conversation_id"])
+                self._queue.task_done()
+
+    def submit(self, turn: Dict[str, Any]) -> asyncio.Future:
+        """
+        Queue one turn; raises asyncio.QueueFull when the pool is saturated.
+
+        Workers dequeue turns in submission order and try their conversation
+        lock straight away, and asyncio locks are granted first come, first
+        served, so pipelined turns of one conversation run in order.
+        """
+        future = asyncio.get_running_loop().create_future()
+        conversation_id = turn.get("conversation_id")
+        lock = self._conversation_lock(conversation_id) if conversation_id else None
+        try:
+            self._queue.put_nowait((turn, lock, future))
+        except asyncio.QueueFull:
+            if conversation_id:
+                self._release_conversation(conversation_id)
+            raise
+        self.stats.accepted += 1
+        return future
+
+    async def drain(self, timeout: float = COACH_WORKER_DRAIN_SECONDS) -> None:
+        """Stop accepting turns, finish queued ones, then flush and stop"""
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Coach worker drain timed out with {self._queue.qsize()} turns queued")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        await self.orchestrator.aclose()
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "draining" if self.draining else "ok",
+            "workers": self.concurrency,
+            "queued": self._queue.qsize(),
+            "active_conversations": len(self._conversation_locks),
+            "sessions": len(self.orchestrator.sessions),
+            **self.stats.as_dict()
+        }
+
+
+def _parse_turn(body: Any, require_uuid: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Validate one turn body; None when it is malformed.
+
+    With require_uuid (messages are persisted), conversation ids must be
+    UUIDs, since stored messages reference conversations.id.
+    """
+    if not isinstance(body, dict):
+        return None
+    message = body.get("message")
+    if not isinstance(message, str) or not message.strip():
+        return None
+    history = body.get("history") or []
+    if not isinstance(history, list) or not all(
+            isinstance(entry, dict) and entry.get("role") in ("user", "assistant")
+            and isinstance(entry.get("content"), str) for entry in history):
+        return None
+    conversation_id = body.get("conversation_id")
+    if conversation_id is not None and not isinstance(conversation_id, str):
+        return None
+    if conversation_id is not None and require_uuid and not is_conversation_id(conversation_id):
+        return None
+    # Search results and facility ids feed comparisons, which need a conversation to hold them
+    search_results = body.get("search_results")
+    if search_results is not None and not (
+            isinstance(search_results, list) and all(isinstance(place, dict) for place in search_results)):
+        return None
+    facility_ids = body.get("facility_ids")
+    if facility_ids is not None and not (
+            isinstance(facility_ids, list) and all(isinstance(place_id, str) for place_id in facility_ids)):
+        return None
+    care_level = body.get("care_level")
+    if care_level is not None and not isinstance(care_level, str):
+        return None
+    return {"message": message, "history": history, "conversation_id": conversation_id,
+            "search_results": search_results, "facility_ids": facility_ids, "care_level": care_level}
+
+
+# Responses carry whole orchestrator results; encode them with the fast serializer
+json_response = functools.partial(web.json_response, dumps=dumps)
+
+
+def build_app(service: CoachWorkerService) -> web.Application:
+    require_uuid = service.orchestrator.message_writer is not None
+    uuid_note = "; conversation_id must be a UUID" if require_uuid else ""
+
+    def unavailable(reason: str) -> web.Response:
+        return json_response({"error": reason}, status=503, headers={"Retry-After": "1"})
+
+    async def await_turn(future: asyncio.Future) -> Dict[str, Any]:
+        try:
+            return await asyncio.wait_for(future, service.request_timeout)
+        except asyncio.TimeoutError:
+            service.stats.timed_out += 1
+            raise
+
+    async def handle_message(request: web.Request) -> web.Response:
+        if service.draining:
+            return unavailable("draining")
+        try:
+            turn = _parse_turn(await request.json(), require_uuid)
+        except ValueError:
+            turn = None
+        if turn is None:
+            return json_response({"error": "message is required" + uuid_note}, status=400)
+
+        try:
+            future = service.submit(turn)
+        except asyncio.QueueFull:
+            service.stats.rejected += 1
+            return unavailable("busy")
+
+        try:
+            return json_response(await await_turn(future))
+        except asyncio.TimeoutError:
+            return json_response({"error": "timeout"}, status=504)
+        except Exception as e:
+            return json_response({"error": str(e)}, status=500)
+
+    async def handle_messages(request: web.Request) -> web.Response:
+        if service.draining:
+            return unavailable("draining")
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        turns_body = body.get("turns") if isinstance(body, dict) else None
+        if not isinstance(turns_body, list) or not turns_body or len(turns_body) > COACH_WORKER_MAX_BATCH:
+            return json_response(
+                {"error": f"turns must be a list of 1-{COACH_WORKER_MAX_BATCH} messages"}, status=400
+            )
+        turns = [_parse_turn(turn, require_uuid) for turn in turns_body]
+        if any(turn is None for turn in turns):
+            return json_response({"error": "every turn needs a message" + uuid_note}, status=400)
+
+        futures = []
+        try:
+            for turn in turns:
+                futures.append(service.submit(turn))
+        except asyncio.QueueFull:
+            # The whole batch is refused; turns already queued are skipped by the workers
+            service.stats.accepted -= len(futures)
+            service.stats.rejected += len(turns)
+            for future in futures:
+                future.cancel()
+            return unavailable("busy")
+
+        results = await asyncio.gather(*(await_turn(future) for future in futures), return_exceptions=True)
+        return json_response({
+            "results": [
+                {"error": "timeout" if isinstance(result, asyncio.TimeoutError) else str(result)}
+                if isinstance(result, BaseException) else result
+                for result in results
+            ]
+        })
+
+    async def handle_health(request: web.Request) -> web.Response:
+        return json_response(service.health())
+
+    async def handle_ready(request: web.Request) -> web.Response:
+        return json_response(service.health(), status=503 if service.draining else 200)
+
+    app = web.Application()
+    app.router.add_post("/v1/message", handle_message)
+    app.router.add_post("/v1/messages", handle_messages)
+    app.router.add_get("/healthz", handle_health)
+    app.router.add_get("/readyz", handle_ready)
+    return app
+
+
+def build_message_sink() -> Optional[MessageSink]:
+    """The configured message store, if any"""
+    if COACH_DATABASE_URL:
+        return PostgresMessageSink(COACH_DATABASE_URL)
+    if COACH_MESSAGES_PATH:
+        return SQLiteMessageSink(COACH_MESSAGES_PATH)
+    return None
+
+
+def build_orchestrator(sink: Optional[MessageSink] = None) -> HousingCoachOrchestrator:
+    """
+    Orchestrator over the message store: sessions are rehydrated from it, and
+    turns are written to it only with COACH_PERSIST_MESSAGES.
+    """
+    if sink is None:
+        return HousingCoachOrchestrator()
+    if COACH_PERSIST_MESSAGES:
+        return HousingCoachOrchestrator(message_writer=MessageWriter(sink))
+    return HousingCoachOrchestrator(history_loader=sink.load)
+
+
+async def serve(host: str = COACH_WORKER_HOST, port: int = COACH_WORKER_PORT,
+                socket_path: Optional[str] = COACH_WORKER_SOCKET) -> None:
+    """Run until SIGTERM/SIGINT, then drain and exit"""
+    sink = build_message_sink()
+    service = CoachWorkerService(build_orchestrator(sink))
+    service.start()
+
+    runner = web.AppRunner(build_app(service))
+    await runner.setup()
+    if socket_path:
+        site = web.UnixSite(runner, socket_path)
+    else:
+        site = web.TCPSite(runner, host, port)
+    await site.start()
+    print(f"Coach worker listening on {socket_path or f'http://{host}:{port}'}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except NotImplementedError:
+            pass
+
+    try:
+        await stop.wait()
+    finally:
+        # Readiness flips first so the API stops routing here; in-flight turns still finish
+        await service.drain()
+        await runner.cleanup()
+        if sink is not None:
+            await sink.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=COACH_WORKER_HOST)
+    parser.add_argument("--port", type=int, default=COACH_WORKER_PORT)
+    parser.add_argument("--socket", default=COACH_WORKER_SOCKET, help="serve on a Unix socket instead of TCP")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.socket))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Facility Comparison
+
+Side-by-side comparison of search results. Each facility is one row of a
+column-oriented feature matrix (monthly cost, rating, distance, wheelchair
+access flags, care level). Facilities are added and removed in place, and a
+retained facility's row is recomputed only when the fields it was built from
+change, so a conversation's comparison set follows its search results
+without rebuilding the matrix. compare() works out per-criterion values, deltas, ranks and the
+Pareto-optimal options for any subset of rows in one vectorized pass.
+"""
+
+from typing import Iterable, Optional
+
+import numpy as np
+
+from cost_projection import CARE_LEVELS
+from facility_matching import WHEELCHAIR_OPTIONS
+
+
+# Care level (index into CARE_LEVELS) offered by each housing type
+HOUSING_TYPE_CARE_LEVEL = {
+    "senior_apartments": 0,
+    "independent_living": 0,
+    "assisted_living": 1,
+    "memory_care": 2
+}
+
+# Name keywords used when a place has no matched housing types, most care first
+CARE_LEVEL_NAME_KEYWORDS = (("memory care", 2), ("assisted", 1), ("independent", 0))
+
+# Feature matrix columns; NaN when unknown
+COLUMNS = ["monthly_cost", "rating", "distance_miles"] + list(WHEELCHAIR_OPTIONS) + ["care_level"]
+COLUMN = {name: i for i, name in enumerate(COLUMNS)}
+
+# Comparison criteria and their direction: +1 higher is better, -1 lower is better
+CRITERIA = {
+    "monthly_cost": -1,
+    "rating": 1,
+    "distance_miles": -1,
+    "accessibility": 1
+}
+
+# Rows compared against each other at once; bounds the pairwise arrays to n x block x criteria
+PAIRWISE_BLOCK = 512
+
+
+def _care_level(place: dict) -> float:
+    """Highest care level a place is known to offer; NaN when unknown"""
+    levels = [
+        HOUSING_TYPE_CARE_LEVEL[housing_type] for housing_type in place.get("matchedHousingTypes") or ()
+        if housing_type in HOUSING_TYPE_CARE_LEVEL
+    ]
+    if levels:
+        return float(max(levels))
+    name = (place.get("name") or "").lower()
+    for keyword, level in CARE_LEVEL_NAME_KEYWORDS:
+        if keyword in name:
+            return float(level)
+    return np.nan
+
+
+def _source(place: dict) -> tuple:
+    """The fields a place's feature row is built from"""
+    options = place.get("accessibilityOptions") or {}
+    return (
+        place.get("estimatedMonthlyCost"), place.get("rating"), place.get("distanceMiles"),
+        tuple(options.get(option) for option in WHEELCHAIR_OPTIONS),
+        tuple(place.get("matchedHousingTypes") or ()), place.get("name")
+    )
+
+
+def _row(place: dict) -> np.ndarray:
+    row = np.full(len(COLUMNS), np.nan)
+    for column, field in (("monthly_cost", "estimatedMonthlyCost"), ("rating", "rating"),
+                          ("distance_miles", "distanceMiles")):
+        if place.get(field) is not None:
+            row[COLUMN[column]] = place[field]
+    options = place.get("accessibilityOptions") or {}
+    for option in WHEELCHAIR_OPTIONS:
+        if isinstance(options.get(option), bool):
+            row[COLUMN[option]] = float(options[option])
+    row[COLUMN["care_level"]] = _care_level(place)
+    return row
+
+
+def _rounded(values: np.ndarray, digits: int = 2) -> list[Optional[float]]:
+    """Rounded values as a list, None where unknown"""
+    return [None if value != value else value for value in np.round(values, digits).tolist()]
+
+
+class FacilityComparison:
+    """
+    Feature matrix over a changing set of facilities.
+
+    places are flat result rows (search or match results, keyed by id). Rows
+    are packed: removing a facility moves the last row into its slot, and
+    the matrix doubles its capacity when full. Each row keeps the source
+    fields it was computed from, so refreshing an unchanged facility costs
+    a tuple comparison, not a row rebuild.
+    """
+
+    def __init__(self, places: Iterable[dict] = (), capacity: int = 64):
+        self._places: list[dict] = []
+        self._sources: list[tuple] = []
+        self._rows: dict[str, int] = {}
+        self._features = np.empty((capacity, len(COLUMNS)))
+        self.add(places)
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def __contains__(self, place_id: str) -> bool:
+        return place_id in self._rows
+
+    @property
+    def ids(self) -> list[str]:
+        return [place["id"] for place in self._places]
+
+    @property
+    def features(self) -> np.ndarray:
+        """The live rows of the matrix, one per facility"""
+        return self._features[:len(self._places)]
+
+    def _grow(self) -> None:
+        new = np.empty((len(self._features) * 2, len(COLUMNS)))
+        new[:len(self._places)] = self.features
+        self._features = new
+
+    def add(self, places: Iterable[dict]) -> None:
+        """
+        Add facilities or refresh ones already present; places without an id are skipped.
+
+        A present facility's row is only recomputed when its source fields changed.
+        """
+        for place in places:
+            place_id = place.get("id")
+            if not place_id:
+                continue
+            source = _source(place)
+            row = self._rows.get(place_id)
+            if row is None:
+                row = len(self._places)
+                if row >= len(self._features):
+                    self._grow()
+                self._places.append(place)
+                self._sources.append(source)
+                self._rows[place_id] = row
+            else:
+                self._places[row] = place
+                if self._sources[row] == source:
+                    continue
+                self._sources[row] = source
+            self._features[row] = _row(place)
+
+    def remove(self, place_ids: Iterable[str]) -> None:
+        """Drop facilities, moving the last row into each freed slot"""
+        for place_id in place_ids:
+            row = self._rows.pop(place_id, None)
+            if row is None:
+                continue
+            last = len(self._places) - 1
+            if row != last:
+                moved = self._places[last]
+                self._places[row] = moved
+                self._sources[row] = self._sources[last]
+                self._features[row] = self._features[last]
+                self._rows[moved["id"]] = row
+            self._places.pop()
+            self._sources.pop()
+
+    def sync(self, places: list[dict]) -> None:
+        """
+        Make the set match places: drop facilities that are gone, add new ones,
+        and recompute retained ones only where their distance, cost, rating,
+        accessibility, housing types or name changed.
+        """
+        wanted = {place.get("id") for place in places}
+        self.remove([place_id for place_id in self._rows if place_id not in wanted])
+        self.add(places)
+
+    def _criteria_values(self, rows: np.ndarray, target_care_level: Optional[int]) -> dict[str, np.ndarray]:
+        features = self._features[rows]
+        options = features[:, [COLUMN[option] for option in WHEELCHAIR_OPTIONS]]
+        known = (~np.isnan(options)).sum(axis=1)
+        values = {
+            "monthly_cost": features[:, COLUMN["monthly_cost"]],
+            "rating": features[:, COLUMN["rating"]],
+            "distance_miles": features[:, COLUMN["distance_miles"]],
+            # Share of the reported wheelchair options that are available
+            "accessibility": np.where(known > 0, np.nansum(options, axis=1) / np.maximum(known, 1), np.nan)
+        }
+        if target_care_level is not None:
+            # Levels away from the care the user needs; 0 is an exact fit
+            values["care_gap"] = np.abs(features[:, COLUMN["care_level"]] - target_care_level)
+        return values
+
+    def compare(self, place_ids: Optional[Iterable[str]] = None, baseline: Optional[str] = None,
+                care_level: Optional[str] = None) -> dict:
+        """
+        Compare facilities (all of them by default) across CRITERIA.
+
+        Returns columns aligned by index: each criterion's values, its delta
+        from the baseline facility (or from the best value when no baseline
+        is given) and its rank (1 is best, ties share a rank, unknown values
+        rank None). pareto lists the facilities no other compared facility
+        beats on one criterion without losing on another; unknown values
+        count as worst. With care_level, how far each facility is from that
+        level is compared as well.
+        """
+        if place_ids is None:
+            rows = np.arange(len(self._places))
+            missing = []
+        else:
+            requested = list(dict.fromkeys(place_ids))
+            rows = np.array([self._rows[place_id] for place_id in requested if place_id in self._rows], dtype=int)
+            missing = [place_id for place_id in requested if place_id not in self._rows]
+
+        target = CARE_LEVELS.index(care_level) if care_level in CARE_LEVELS else None
+        directions = dict(CRITERIA)
+        if target is not None:
+            directions["care_gap"] = -1
+
+        values = self._criteria_values(rows, target)
+        criteria = list(directions)
+        n = len(rows)
+        matrix = np.column_stack([values[name] for name in criteria]) if n else np.empty((0, len(criteria)))
+        unknown = np.isnan(matrix)
+
+        # Orient every criterion so higher is better, unknowns worst
+        signs = np.array([directions[name] for name in criteria])
+        scores = np.where(unknown, -np.inf, matrix * signs)
+
+        # Criterion-major, so reductions across criteria are elementwise over n x block planes
+        by_criterion = np.ascontiguousarray(scores.T)
+        ranks = np.empty((n, len(criteria)), dtype=int)
+        dominated = np.zeros(n, dtype=bool)
+        for start in range(0, n, PAIRWISE_BLOCK):
+            block = by_criterion[:, None, start:start + PAIRWISE_BLOCK]
+            # better[k, j, i]: facility j beats facility start+i on criterion k
+            better = by_criterion[:, :, None] > block
+            not_worse = by_criterion[:, :, None] >= block
+            ranks[start:start + PAIRWISE_BLOCK] = 1 + better.sum(axis=1).T
+            dominates = np.logical_and.reduce(not_worse) & np.logical_or.reduce(better)
+            dominated[start:start + PAIRWISE_BLOCK] = dominates.any(axis=0)
+
+        baseline_row = None
+        if baseline is not None and baseline in self._rows:
+            matches = np.flatnonzero(rows == self._rows[baseline])
+            baseline_row = int(matches[0]) if len(matches) else None
+        if baseline_row is not None:
+            reference = matrix[baseline_row]
+        else:
+            best = scores.max(axis=0) if n else np.full(len(criteria), -np.inf)
+            reference = np.where(np.isinf(best), np.nan, best * signs)
+        deltas = matrix - reference
+
+        places = [self._places[row] for row in rows]
+        ids = [place["id"] for place in places]
+        # Unknown values rank 0 here, None in the response
+        ranks[unknown] = 0
+        care_levels = self._features[rows, COLUMN["care_level"]]
+        return {
+            "ids": ids,
+            "names": [place.get("name") for place in places],
+            "criteria": criteria,
+            "values": {name: _rounded(matrix[:, k]) for k, name in enumerate(criteria)},
+            "deltas": {name: _rounded(deltas[:, k]) for k, name in enumerate(criteria)},
+            "ranks": {name: [rank or None for rank in ranks[:, k].tolist()] for k, name in enumerate(criteria)},
+            "best": {name: [ids[i] for i in np.flatnonzero(ranks[:, k] == 1)] for k, name in enumerate(criteria)},
+            "careLevel": [None if level != level else CARE_LEVELS[int(level)] for level in care_levels.tolist()],
+            "pareto": [ids[i] for i in np.flatnonzero(~dominated)],
+            "deltaFrom": ids[baseline_row] if baseline_row is not None else "best",
+            "count": n,
+            "missing": missing
+        }
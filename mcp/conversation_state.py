@@ -0,0 +1,96 @@
+"""
+Conversation State
+
+Facts extracted from a conversation, maintained incrementally. Each update
+only scans messages appended since the previous one, so agents can check what
+the user has already told us in O(1) instead of rescanning the whole history
+on every turn.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+
+LOCATION_KEYWORDS = ['cleveland', 'akron', 'columbus', 'city', 'area']
+KNOWN_CITIES = {'cleveland', 'akron', 'columbus'}
+MOBILITY_DEVICES = ['wheelchair', 'walker', 'cane', 'scooter', 'oxygen']
+MAX_DOLLAR_AMOUNTS = 20
+
+_LOCATION_PATTERN = re.compile('|'.join(LOCATION_KEYWORDS))
+_MOBILITY_PATTERN = re.compile('|'.join(MOBILITY_DEVICES))
+_DOLLAR_PATTERN = re.compile(r'\$\s?(\d[\d,]*(?:\.\d+)?)')
+
+
+class ConversationState:
+    """Incrementally maintained facts about one conversation"""
+
+    __slots__ = ("messages_seen", "income_mentioned", "location_mentioned",
+                 "cities", "mobility_devices", "dollar_amounts")
+
+    def __init__(self):
+        self.messages_seen = 0
+        self.income_mentioned = False
+        self.location_mentioned = False
+        self.cities: List[str] = []
+        self.mobility_devices: List[str] = []
+        self.dollar_amounts: List[float] = []
+
+    @classmethod
+    def from_history(cls, history: List[Dict[str, str]]) -> 'ConversationState':
+        """Build state for a history in one pass"""
+        state = cls()
+        state.sync(history)
+        return state
+
+    def reset(self) -> None:
+        """Forget everything extracted so far"""
+        self.__init__()
+
+    def observe(self, message: Dict[str, str]) -> None:
+        """Fold one appended message into the state"""
+        content = message['content'].lower()
+        self.messages_seen += 1
+
+        if not self.income_mentioned and 'income' in content:
+            self.income_mentioned = True
+
+        for keyword in _LOCATION_PATTERN.findall(content):
+            self.location_mentioned = True
+            if keyword in KNOWN_CITIES and keyword not in self.cities:
+                self.cities.append(keyword)
+
+        # Devices and amounts are facts about the user, not the coach's prompts
+        if message.get('role') == 'user':
+            for device in _MOBILITY_PATTERN.findall(content):
+                if device not in self.mobility_devices:
+                    self.mobility_devices.append(device)
+            for amount in _DOLLAR_PATTERN.findall(content):
+                self.dollar_amounts.append(float(amount.replace(',', '')))
+            del self.dollar_amounts[:-MAX_DOLLAR_AMOUNTS]
+
+    def sync(self, history: List[Dict[str, str]]) -> None:
+        """
+        Catch up with a history list, scanning only messages not yet seen.
+
+        Histories are append-only within a conversation; if the list is
+        shorter than what we have already seen it was replaced, so the state
+        is rebuilt from scratch.
+        """
+        if len(history) < self.messages_seen:
+            self.reset()
+        for message in history[self.messages_seen:]:
+            self.observe(message)
+
+    @property
+    def latest_dollar_amount(self) -> Optional[float]:
+        return self.dollar_amounts[-1] if self.dollar_amounts else None
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "messages_seen": self.messages_seen,
+            "income_mentioned": self.income_mentioned,
+            "location_mentioned": self.location_mentioned,
+            "cities": list(self.cities),
+            "mobility_devices": list(self.mobility_devices),
+            "dollar_amounts": list(self.dollar_amounts)
+        }
@@ -0,0 +1,222 @@
+"""
+Cost Projection Engine
+
+Month-by-month cash flow for a household over many years: housing fees that
+step up every year, healthcare costs that inflate, income that grows with
+cost-of-living adjustments, savings that earn a return, and moves to higher
+(more expensive) care levels over time. Monte Carlo runs draw each year's
+rates and the timing of care transitions per scenario, and all scenarios and
+months are computed as 2-D NumPy arrays at once.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+CARE_LEVELS = ["independent_living", "assisted_living", "memory_care"]
+
+# Relative monthly cost of each care level
+CARE_LEVEL_COST_MULTIPLIER = np.array([1.0, 1.6, 2.3])
+
+# Balance percentiles reported for each projection year
+REPORTED_PERCENTILES = (10, 50, 90)
+
+
+class ProjectionAssumptions:
+    """Rates and volatilities driving a projection (annual, as fractions)"""
+
+    __slots__ = (
+        "rent_escalation", "rent_volatility", "healthcare_inflation", "healthcare_volatility",
+        "income_growth", "savings_return", "return_volatility", "care_transition_probability"
+    )
+
+    def __init__(self, rent_escalation: float = 0.04, rent_volatility: float = 0.015,
+                 healthcare_inflation: float = 0.05, healthcare_volatility: float = 0.02,
+                 income_growth: float = 0.02, savings_return: float = 0.03,
+                 return_volatility: float = 0.08, care_transition_probability: float = 0.10):
+        self.rent_escalation = rent_escalation
+        self.rent_volatility = rent_volatility
+        self.healthcare_inflation = healthcare_inflation
+        self.healthcare_volatility = healthcare_volatility
+        self.income_growth = income_growth
+        self.savings_return = savings_return
+        self.return_volatility = return_volatility
+        self.care_transition_probability = care_transition_probability
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _annual_factors(rates: np.ndarray) -> np.ndarray:
+    """Cumulative growth factor in force during each year; year 0 is 1.0"""
+    factors = np.ones_like(rates)
+    np.cumprod(1.0 + rates[:, :-1], axis=1, out=factors[:, 1:])
+    return factors
+
+
+def _draw_rates(rng: np.random.Generator, mean: float, volatility: float,
+                scenarios: int, years: int) -> np.ndarray:
+    if volatility <= 0:
+        return np.full((scenarios, years), mean)
+    # A fee or price can fall in a bad year but never by more than all of it
+    return np.maximum(rng.normal(mean, volatility, size=(scenarios, years)), -0.99)
+
+
+def _care_levels(rng: np.random.Generator, start_level: int, annual_probability: float,
+                 scenarios: int, months: int) -> np.ndarray:
+    """Care level index per scenario and month; each transition moves up one level"""
+    levels = np.full((scenarios, months), start_level, dtype=np.intp)
+    if annual_probability <= 0 or start_level >= len(CARE_LEVELS) - 1:
+        return levels
+
+    monthly_probability = 1.0 - (1.0 - annual_probability) ** (1 / 12)
+    month_index = np.arange(months)
+    transition_at = np.zeros(scenarios, dtype=np.int64)
+    for _ in range(len(CARE_LEVELS) - 1 - start_level):
+        # Months until the next move are geometric in the monthly probability
+        transition_at = transition_at + rng.geometric(monthly_probability, size=scenarios)
+        levels += month_index[None, :] >= transition_at[:, None]
+    return levels
+
+
+def _depletion_months(balances: np.ndarray) -> np.ndarray:
+    """First month (1-based) each scenario's balance goes negative, 0 if never"""
+    depleted = balances < 0
+    first = depleted.argmax(axis=1) + 1
+    return np.where(depleted.any(axis=1), first, 0)
+
+
+def simulate_cash_flow(monthly_income: float, savings: float, housing_cost: float,
+                       healthcare_costs: float = 0.0, other_expenses: float = 0.0,
+                       years: int = 10, care_level: str = "independent_living",
+                       assumptions: Optional[ProjectionAssumptions] = None,
+                       scenarios: int = 1000, seed: Optional[int] = None) -> dict[str, np.ndarray]:
+    """
+    Simulate monthly cash flow for every scenario.
+
+    Returns arrays of shape (scenarios, months) for balance, total cost and
+    care level, and (scenarios,) for the depletion month. With scenarios=1 and
+    zero volatilities the result is the deterministic projection at the mean
+    rates.
+    """
+    if care_level not in CARE_LEVELS:
+        raise ValueError(f"unknown care level: {care_level}")
+    assumptions = assumptions or ProjectionAssumptions()
+    rng = np.random.default_rng(seed)
+    months = years * 12
+    year_of_month = np.arange(months) // 12
+    start_level = CARE_LEVELS.index(care_level)
+
+    rent_factor = _annual_factors(_draw_rates(
+        rng, assumptions.rent_escalation, assumptions.rent_volatility, scenarios, years
+    ))[:, year_of_month]
+    health_factor = _annual_factors(_draw_rates(
+        rng, assumptions.healthcare_inflation, assumptions.healthcare_volatility, scenarios, years
+    ))[:, year_of_month]
+    income_factor = _annual_factors(np.full((1, years), assumptions.income_growth))[:, year_of_month]
+
+    levels = _care_levels(rng, start_level, assumptions.care_transition_probability, scenarios, months)
+    level_multiplier = CARE_LEVEL_COST_MULTIPLIER[levels]
+    level_multiplier /= CARE_LEVEL_COST_MULTIPLIER[start_level]
+
+    cost = rent_factor
+    cost *= level_multiplier
+    cost *= housing_cost
+    health_factor *= healthcare_costs
+    cost += health_factor
+    cost += other_expenses
+    net = income_factor * monthly_income - cost
+
+    # B_m = G_m * (B_0 + sum_{k<=m} net_k / G_k) with G the cumulative return,
+    # which turns the compounding recursion into one cumulative sum
+    monthly_returns = _draw_rates(
+        rng, assumptions.savings_return, assumptions.return_volatility, scenarios, years
+    )[:, year_of_month]
+    monthly_returns += 1.0
+    np.power(monthly_returns, 1 / 12, out=monthly_returns)
+    growth = np.cumprod(monthly_returns, axis=1, out=monthly_returns)
+    net /= growth
+    balances = np.cumsum(net, axis=1, out=net)
+    balances += savings
+    balances *= growth
+
+    return {
+        "balance": balances,
+        "monthly_cost": cost,
+        "care_level": levels,
+        "depletion_month": _depletion_months(balances)
+    }
+
+
+def project_costs(monthly_income: float, savings: float, housing_cost: float,
+                  healthcare_costs: float = 0.0, other_expenses: float = 0.0,
+                  years: int = 10, care_level: str = "independent_living",
+                  assumptions: Optional[ProjectionAssumptions] = None,
+                  scenarios: int = 1000, seed: Optional[int] = None) -> dict:
+    """
+    Summarize a Monte Carlo projection: how likely savings are to last,
+    when they run out, and balance and cost percentiles for each year.
+    Includes the deterministic projection at the mean rates for reference.
+    """
+    assumptions = assumptions or ProjectionAssumptions()
+    household = dict(
+        monthly_income=monthly_income, savings=savings, housing_cost=housing_cost,
+        healthcare_costs=healthcare_costs, other_expenses=other_expenses,
+        years=years, care_level=care_level
+    )
+
+    runs = simulate_cash_flow(**household, assumptions=assumptions, scenarios=scenarios, seed=seed)
+    expected = simulate_cash_flow(
+        **household,
+        assumptions=ProjectionAssumptions(
+            rent_escalation=assumptions.rent_escalation, rent_volatility=0.0,
+            healthcare_inflation=assumptions.healthcare_inflation, healthcare_volatility=0.0,
+            income_growth=assumptions.income_growth, savings_return=assumptions.savings_return,
+            return_volatility=0.0, care_transition_probability=0.0
+        ),
+        scenarios=1
+    )
+
+    depletion = runs["depletion_month"]
+    depleted = depletion[depletion > 0]
+    year_ends = np.arange(11, years * 12, 12)
+    # Balances past depletion are shortfalls, not savings; report them as zero
+    balance_percentiles = np.percentile(
+        np.maximum(runs["balance"][:, year_ends], 0.0), REPORTED_PERCENTILES, axis=0
+    )
+    cost_percentiles = np.percentile(runs["monthly_cost"][:, year_ends], REPORTED_PERCENTILES, axis=0)
+    final_levels = np.bincount(runs["care_level"][:, -1], minlength=len(CARE_LEVELS))
+
+    expected_depletion = int(expected["depletion_month"][0])
+    return {
+        "scenarios": scenarios,
+        "years": years,
+        "probability_savings_last": round(1.0 - depleted.size / scenarios, 4),
+        "depletion_years": {
+            f"p{p}": round(float(np.percentile(depleted, p)) / 12, 2) for p in REPORTED_PERCENTILES
+        } if depleted.size else None,
+        "expected": {
+            "depletion_years": round(expected_depletion / 12, 2) if expected_depletion else None,
+            "final_balance": round(max(float(expected["balance"][0, -1]), 0.0), 2),
+            "final_monthly_cost": round(float(expected["monthly_cost"][0, -1]), 2)
+        },
+        "yearly": [
+            {
+                "year": year + 1,
+                "balance": {
+                    f"p{p}": round(float(balance_percentiles[i, year]), 2)
+                    for i, p in enumerate(REPORTED_PERCENTILES)
+                },
+                "monthly_cost": {
+                    f"p{p}": round(float(cost_percentiles[i, year]), 2)
+                    for i, p in enumerate(REPORTED_PERCENTILES)
+                }
+            }
+            for year in range(years)
+        ],
+        "final_care_level_share": {
+            level: round(int(count) / scenarios, 4) for level, count in zip(CARE_LEVELS, final_levels)
+        },
+        "assumptions": assumptions.as_dict()
+    }
@@ -0,0 +1,65 @@
+"""
+Request Deadlines
+
+An end-to-end time budget for one tool call, split across its stages. Each
+stage runs under an asyncio timeout drawn from what is left of the budget;
+when it runs out the stage is cancelled and StageTimeout reports which stage
+exhausted the budget.
+"""
+
+import asyncio
+from typing import Awaitable, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+class StageTimeout(Exception):
+    """A stage of a tool call ran past its share of the deadline"""
+
+    def __init__(self, stage: str, budget_seconds: float, elapsed_seconds: float):
+        super().__init__(f"{stage} exceeded its {budget_seconds:.2f}s budget")
+        self.stage = stage
+        self.budget_seconds = budget_seconds
+        self.elapsed_seconds = elapsed_seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "stage": self.stage,
+            "budget_seconds": round(self.budget_seconds, 3),
+            "elapsed_seconds": round(self.elapsed_seconds, 3)
+        }
+
+
+class Deadline:
+    """Time budget for one tool call, measured on the event loop clock"""
+
+    def __init__(self, total_seconds: float):
+        self.loop = asyncio.get_running_loop()
+        self.total_seconds = total_seconds
+        self.started_at = self.loop.time()
+        self.expires_at = self.started_at + total_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self.loop.time())
+
+    def elapsed(self) -> float:
+        return self.loop.time() - self.started_at
+
+    async def run(self, stage: str, awaitable: Awaitable[T], share: Optional[float] = None) -> T:
+        """
+        Await a stage within the deadline.
+
+        share caps the stage at that fraction of the total budget (so an
+        early stage cannot starve later ones); without it the stage may use
+        everything that is left. On timeout the stage is cancelled and
+        StageTimeout is raised.
+        """
+        budget = self.remaining()
+        if share is not None:
+            budget = min(budget, self.total_seconds * share)
+
+        try:
+            return await asyncio.wait_for(awaitable, timeout=budget)
+        except asyncio.TimeoutError:
+            raise StageTimeout(stage, budget, self.elapsed()) from None
@@ -0,0 +1,279 @@
+"""
+Facility Index
+
+Local spatial index of facilities seen in past Places searches. Facilities are
+bucketed into a lat/lng grid so radius + housing-type queries only touch nearby
+cells, and candidates are filtered with a vectorized haversine distance. The
+index remembers which areas it has fresh coverage for, so callers can answer
+from it and fall back to the API only on a miss or when data is stale.
+"""
+
+import math
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+
+from place_records import PlaceRecord
+
+
+EARTH_RADIUS_METERS = 6371008.8
+METERS_PER_DEGREE_LAT = 111320.0
+
+
+def haversine_meters(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Great-circle distance in meters from one point to arrays of points (degrees)"""
+    lat1 = math.radians(lat)
+    lats2 = np.radians(lats)
+    dlat = lats2 - lat1
+    dlng = np.radians(lngs) - math.radians(lng)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lats2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _combination(housing_types: Iterable[str]) -> str:
+    """Index key for places returned by one combined query over several housing types"""
+    return "|".join(sorted(set(housing_types)))
+
+
+class Coverage:
+    """
+    An area the index holds search results for.
+
+    A combined search ("assisted living or memory care") does not say which
+    type each place matched, so its coverage only answers queries for the
+    same set of types. Per-type coverage answers any subset of its types.
+    """
+
+    __slots__ = ("location", "latitude", "longitude", "radius_meters", "housing_types", "combined",
+                 "fetched_at", "queried_at")
+
+    def __init__(self, location: str, latitude: float, longitude: float,
+                 radius_meters: float, housing_types: frozenset, fetched_at: float,
+                 combined: bool = False, queried_at: Optional[float] = None):
+        self.location = location
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius_meters = radius_meters
+        self.housing_types = housing_types
+        self.combined = combined
+        # When Google produced the results (not when they were ingested)
+        self.fetched_at = fetched_at
+        # Last time a search asked for this area; background refreshes do not count
+        self.queried_at = fetched_at if queried_at is None else queried_at
+
+
+class FacilityIndexStats:
+    """Hit/miss counters for the facility index"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stale_misses = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses + self.stale_misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_misses": self.stale_misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class FacilityIndex:
+    """
+    Grid-bucketed store of facilities with coverage tracking.
+
+    Coordinates, last-seen times and housing-type bitmasks are kept in
+    parallel NumPy arrays indexed by row; the grid maps each cell to the rows
+    inside it.
+    """
+
+    def __init__(self, cell_degrees: float = 0.1, max_age_seconds: float = 24 * 3600,
+                 max_coverage: int = 1000):
+        self.cell_degrees = cell_degrees
+        self.max_age_seconds = max_age_seconds
+        self.max_coverage = max_coverage
+        self.stats = FacilityIndexStats()
+
+        self._places: list[PlaceRecord] = []
+        self._rows: dict[str, int] = {}
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        self._type_bits: dict[str, int] = {}
+        self._coverage: dict[tuple, Coverage] = {}
+
+        capacity = 256
+        self._lat = np.empty(capacity)
+        self._lng = np.empty(capacity)
+        self._seen_at = np.empty(capacity)
+        self._type_mask = np.zeros(capacity, dtype=np.uint32)
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return (math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees))
+
+    def _mask(self, housing_types: Iterable[str]) -> int:
+        mask = 0
+        for housing_type in housing_types:
+            if housing_type not in self._type_bits:
+                if len(self._type_bits) >= 32:
+                    continue
+                self._type_bits[housing_type] = 1 << len(self._type_bits)
+            mask |= self._type_bits[housing_type]
+        return mask
+
+    def _grow(self) -> None:
+        capacity = len(self._lat) * 2
+        for name in ("_lat", "_lng", "_seen_at", "_type_mask"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _upsert(self, place: PlaceRecord, housing_types: Iterable[str], now: float) -> None:
+        place_id = place.id
+        if not place_id or place.latitude is None or place.longitude is None:
+            return
+
+        latitude, longitude = place.latitude, place.longitude
+        row = self._rows.get(place_id)
+        if row is None:
+            row = len(self._places)
+            if row >= len(self._lat):
+                self._grow()
+            self._places.append(place)
+            self._rows[place_id] = row
+            self._type_mask[row] = 0
+        else:
+            old_cell = self._cell(self._lat[row], self._lng[row])
+            self._cells[old_cell].remove(row)
+            self._places[row] = place
+
+        self._lat[row] = latitude
+        self._lng[row] = longitude
+        self._seen_at[row] = now
+        self._type_mask[row] |= self._mask(housing_types)
+        self._cells.setdefault(self._cell(latitude, longitude), []).append(row)
+
+    def ingest(self, places: list[PlaceRecord], location: str, center: dict, radius_meters: float,
+               housing_types: list[str], per_type: bool = False, fetched_at: Optional[float] = None) -> None:
+        """
+        Add search results to the index and record the searched area as covered.
+
+        Places tagged with matched_types are indexed under those types. Untagged
+        results of a combined query over several types are indexed under that
+        combination only, never under the individual types. per_type marks
+        results of one query per housing type, which are always tagged.
+        fetched_at is when Google returned the results (time.time()); results
+        served from a cache are recorded with their original age.
+        """
+        now = time.time()
+        fetched_at = now if fetched_at is None else min(fetched_at, now)
+        combined = len(set(housing_types)) > 1 and not per_type
+        untagged_types = [_combination(housing_types)] if combined else housing_types
+        for place in places:
+            self._upsert(place, place.matched_types or untagged_types, fetched_at)
+
+        key = (location, round(center["latitude"], 4), round(center["longitude"], 4),
+               round(radius_meters), frozenset(housing_types))
+        previous = self._coverage.pop(key, None)
+        if previous is not None and previous.fetched_at > fetched_at:
+            # Older cached results never replace newer coverage
+            self._coverage[key] = previous
+            return
+        self._coverage[key] = Coverage(
+            location, center["latitude"], center["longitude"], radius_meters,
+            frozenset(housing_types), fetched_at, combined,
+            queried_at=previous.queried_at if previous is not None else now
+        )
+        while len(self._coverage) > self.max_coverage:
+            self._coverage.pop(next(iter(self._coverage)))
+
+    def _covering(self, center: dict, radius_meters: float, housing_types: set) -> Optional[Coverage]:
+        """Find a recorded search whose circle and types contain this query"""
+        best = None
+        for coverage in self._coverage.values():
+            if coverage.combined and housing_types != coverage.housing_types:
+                continue
+            if not housing_types <= coverage.housing_types:
+                continue
+            # Same tolerance as below; callers may have truncated the recorded radius
+            if coverage.radius_meters * 1.01 < radius_meters:
+                continue
+            offset = haversine_meters(
+                center["latitude"], center["longitude"],
+                np.array([coverage.latitude]), np.array([coverage.longitude])
+            )[0]
+            if offset + radius_meters <= coverage.radius_meters * 1.01:
+                if best is None or coverage.fetched_at > best.fetched_at:
+                    best = coverage
+        return best
+
+    def query(self, center: dict, radius_meters: float, housing_types: list[str]) -> Optional[list[PlaceRecord]]:
+        """
+        Answer a radius + housing-type search from the index.
+
+        Returns facilities sorted by distance, or None when the area is not
+        covered or its coverage is older than max_age_seconds.
+        """
+        coverage = self._covering(center, radius_meters, set(housing_types))
+        if coverage is None:
+            self.stats.misses += 1
+            return None
+        coverage.queried_at = time.time()
+        if time.time() - coverage.fetched_at > self.max_age_seconds:
+            self.stats.stale_misses += 1
+            return None
+
+        latitude, longitude = center["latitude"], center["longitude"]
+        lat_span = radius_meters / METERS_PER_DEGREE_LAT
+        lng_span = radius_meters / (METERS_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 0.01))
+        low_lat, low_lng = self._cell(latitude - lat_span, longitude - lng_span)
+        high_lat, high_lng = self._cell(latitude + lat_span, longitude + lng_span)
+
+        candidates = [
+            row
+            for cell_lat in range(low_lat, high_lat + 1)
+            for cell_lng in range(low_lng, high_lng + 1)
+            for row in self._cells.get((cell_lat, cell_lng), ())
+        ]
+        self.stats.hits += 1
+        if not candidates:
+            return []
+
+        rows = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+        distances = haversine_meters(latitude, longitude, self._lat[rows], self._lng[rows])
+        # Places from a combined query over exactly these types match as well
+        query_types = list(housing_types) + ([_combination(housing_types)] if len(set(housing_types)) > 1 else [])
+        keep = (distances <= radius_meters) & ((self._type_mask[rows] & self._mask(query_types)) != 0)
+
+        rows, distances = rows[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return [self._places[row] for row in rows[order]]
+
+    def stale_coverage(self, max_age_seconds: Optional[float] = None,
+                       queried_within_seconds: Optional[float] = None) -> list[Coverage]:
+        """
+        Covered areas whose results are older than max_age_seconds.
+
+        With queried_within_seconds, only areas a search asked for within
+        that window are returned, so refreshing them tracks demand.
+        """
+        now = time.time()
+        cutoff = now - (self.max_age_seconds if max_age_seconds is None else max_age_seconds)
+        active_since = None if queried_within_seconds is None else now - queried_within_seconds
+        return [
+            coverage for coverage in self._coverage.values()
+            if coverage.fetched_at < cutoff and (active_since is None or coverage.queried_at >= active_since)
+        ]
+
+    def clear(self) -> None:
+        """Drop every facility and coverage record"""
+        self._places.clear()
+        self._rows.clear()
+        self._cells.clear()
+        self._coverage.clear()
+        self._type_mask[:] = 0
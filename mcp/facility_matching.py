@@ -0,0 +1,349 @@
+"""
+Facility Matching
+
+Scores candidate facilities against accessibility and location preferences.
+Everything that depends only on the facilities and the amenities around them
+(wheelchair access flags, rating, distance to the nearest hospital, pharmacy
+and transit stop, amenity counts) is precomputed once into a feature matrix.
+Ranking for a set of preferences then only builds a constraint mask and a
+weighted score over those columns, so re-ranking after a preference change
+never repeats the distance work. MatcherCache keeps each client session's
+matcher so that re-rank can happen in a later tool call.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from facility_index import EARTH_RADIUS_METERS, haversine_meters
+
+
+METERS_PER_MILE = 1609.34
+
+AMENITY_TYPES = ("hospital", "pharmacy", "transit", "shopping")
+
+# Distance within which an amenity counts as "near" for each preference
+AMENITY_RADIUS_MILES = {
+    "hospital": 5.0,
+    "pharmacy": 1.0,
+    "transit": 0.5,
+    "shopping": 1.0
+}
+
+# Amenities within the radius at which the proximity score saturates
+AMENITY_SATURATION_COUNT = 3
+
+# Maximum distance from the search center for each proximity_to_family choice;
+# the search location stands in for where family lives
+FAMILY_DISTANCE_MILES = {
+    "same_city": 10.0,
+    "within_30min": 20.0,
+    "within_1hour": 45.0
+}
+
+WHEELCHAIR_OPTIONS = (
+    "wheelchairAccessibleEntrance",
+    "wheelchairAccessibleRestroom",
+    "wheelchairAccessibleParking"
+)
+
+# Requirements the Places data cannot confirm; always left for the tour
+UNVERIFIABLE_REQUIREMENTS = {
+    "elevator_required": "Confirm the building has an elevator",
+    "ground_floor_preferred": "Ask about ground floor availability",
+    "grab_bars_needed": "Confirm grab bars are installed in bathrooms"
+}
+
+SOFT_WEIGHTS = {
+    "rating": 1.0,
+    "wheelchair": 2.0,
+    "pharmacy": 1.5,
+    "hospital": 1.5,
+    "transit": 1.5,
+    "shopping": 1.0,
+    "family": 1.5
+}
+
+NEUTRAL_SCORE = 0.5
+
+# Feature matrix columns; distances are miles, NaN when unknown
+COLUMNS = (
+    ["rating", "center_miles"]
+    + list(WHEELCHAIR_OPTIONS)
+    + [f"{amenity}_nearest_miles" for amenity in AMENITY_TYPES]
+    + [f"{amenity}_count" for amenity in AMENITY_TYPES]
+)
+COLUMN = {name: i for i, name in enumerate(COLUMNS)}
+
+
+def _pref_dict(prefs: Any) -> dict:
+    if prefs is None:
+        return {}
+    return prefs.model_dump() if hasattr(prefs, "model_dump") else dict(prefs)
+
+
+def _coordinates(places: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    """Latitude and longitude arrays of flat place rows; NaN where unknown"""
+    lats = np.array([place.get("latitude") for place in places], dtype=float)
+    lngs = np.array([place.get("longitude") for place in places], dtype=float)
+    return lats, lngs
+
+
+def pairwise_miles(lats: np.ndarray, lngs: np.ndarray,
+                   other_lats: np.ndarray, other_lngs: np.ndarray) -> np.ndarray:
+    """Haversine distance in miles between every (lats, lngs) row and every other point"""
+    lat1 = np.radians(lats)[:, None]
+    lat2 = np.radians(other_lats)[None, :]
+    dlat = lat2 - lat1
+    dlng = np.radians(other_lngs)[None, :] - np.radians(lngs)[:, None]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0))) / METERS_PER_MILE
+
+
+class FacilityMatcher:
+    """
+    Precomputed features for a candidate set, ranked per preference set.
+
+    amenities maps an amenity type to the places found for it. Types that
+    were never loaded are "unknown": their constraints are not enforced and
+    matching facilities are reported as unverified instead. Types in partial
+    may be missing places, so they count toward scores but are never used
+    to drop a facility and are reported as unverified too.
+    """
+
+    def __init__(self, places: list[dict], center: dict,
+                 amenities: Optional[dict[str, list[dict]]] = None, partial: Iterable[str] = ()):
+        self.center = center
+        self.places: list[dict] = []
+        self.amenity_points: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self.partial_amenities = set(partial)
+        self.features = np.empty((0, len(COLUMNS)))
+        self._lat = np.empty(0)
+        self._lng = np.empty(0)
+
+        for amenity, amenity_places in (amenities or {}).items():
+            self.amenity_points[amenity] = _coordinates(amenity_places)
+        self.add_facilities(places)
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def _amenity_features(self, lats: np.ndarray, lngs: np.ndarray, amenity: str) -> tuple[np.ndarray, np.ndarray]:
+        """Nearest distance (miles) and count within radius for rows at lats/lngs"""
+        amenity_lats, amenity_lngs = self.amenity_points[amenity]
+        nearest = np.full(len(lats), np.nan)
+        count = np.zeros(len(lats))
+        valid = ~np.isnan(amenity_lats)
+        if not valid.any():
+            return nearest, count
+
+        located = ~np.isnan(lats)
+        if located.any():
+            miles = pairwise_miles(lats[located], lngs[located], amenity_lats[valid], amenity_lngs[valid])
+            nearest[located] = miles.min(axis=1)
+            count[located] = np.count_nonzero(miles <= AMENITY_RADIUS_MILES[amenity], axis=1)
+        return nearest, count
+
+    def _build_rows(self, places: list[dict]) -> np.ndarray:
+        rows = np.full((len(places), len(COLUMNS)), np.nan)
+        lats, lngs = _coordinates(places)
+
+        rows[:, COLUMN["rating"]] = [
+            place["rating"] if place.get("rating") is not None else np.nan for place in places
+        ]
+        rows[:, COLUMN["center_miles"]] = haversine_meters(
+            self.center["latitude"], self.center["longitude"], lats, lngs
+        ) / METERS_PER_MILE
+        for option in WHEELCHAIR_OPTIONS:
+            rows[:, COLUMN[option]] = [
+                float(value) if isinstance(value := (place.get("accessibilityOptions") or {}).get(option), bool)
+                else np.nan
+                for place in places
+            ]
+        for amenity in self.amenity_points:
+            nearest, count = self._amenity_features(lats, lngs, amenity)
+            rows[:, COLUMN[f"{amenity}_nearest_miles"]] = nearest
+            rows[:, COLUMN[f"{amenity}_count"]] = count
+        return rows
+
+    def add_facilities(self, places: Iterable[dict]) -> None:
+        """Append facilities, computing features only for the new rows"""
+        seen = {place.get("id") for place in self.places}
+        new = [place for place in places if place.get("id") is None or place.get("id") not in seen]
+        if not new:
+            return
+        lats, lngs = _coordinates(new)
+        self.places.extend(new)
+        self._lat = np.concatenate([self._lat, lats])
+        self._lng = np.concatenate([self._lng, lngs])
+        self.features = np.vstack([self.features, self._build_rows(new)])
+
+    def set_amenities(self, amenity: str, amenity_places: list[dict], complete: bool = True) -> None:
+        """Load or replace one amenity type, recomputing only its two columns"""
+        self.amenity_points[amenity] = _coordinates(amenity_places)
+        if complete:
+            self.partial_amenities.discard(amenity)
+        else:
+            self.partial_amenities.add(amenity)
+        nearest, count = self._amenity_features(self._lat, self._lng, amenity)
+        self.features[:, COLUMN[f"{amenity}_nearest_miles"]] = nearest
+        self.features[:, COLUMN[f"{amenity}_count"]] = count
+
+    def _known(self, amenity: str) -> bool:
+        return amenity in self.amenity_points
+
+    def _verified(self, amenity: str) -> bool:
+        """Loaded in full, so no amenity nearby really means none"""
+        return self._known(amenity) and amenity not in self.partial_amenities
+
+    def _amenity_score(self, amenity: str) -> np.ndarray:
+        count = self.features[:, COLUMN[f"{amenity}_count"]]
+        return np.minimum(count / AMENITY_SATURATION_COUNT, 1.0)
+
+    def rank(self, accessibility: Any = None, location: Any = None,
+             max_results: Optional[int] = None) -> dict:
+        """
+        Rank facilities for one set of accessibility and location preferences.
+
+        Facilities failing a hard constraint are dropped. The rest get a
+        preferenceScore in [0, 1] from the soft criteria the preferences ask
+        for, combined with any matchScore from search ranking into
+        overallScore.
+        """
+        access = _pref_dict(accessibility)
+        loc = _pref_dict(location)
+        n = len(self.places)
+        features = self.features
+
+        keep = np.ones(n, dtype=bool)
+        unmet: dict[str, np.ndarray] = {}
+        unverified: list[str] = []
+
+        # Hard constraints: only enforced where the data can say no
+        if access.get("wheelchair_accessible"):
+            entrance = features[:, COLUMN["wheelchairAccessibleEntrance"]]
+            unmet["wheelchair_accessible"] = entrance == 0
+        if loc.get("near_hospital"):
+            if self._verified("hospital"):
+                nearest = features[:, COLUMN["hospital_nearest_miles"]]
+                unmet["near_hospital"] = ~(nearest <= AMENITY_RADIUS_MILES["hospital"])
+            else:
+                unverified.append("near_hospital")
+        if loc.get("public_transport"):
+            if self._verified("transit"):
+                nearest = features[:, COLUMN["transit_nearest_miles"]]
+                unmet["public_transport"] = ~(nearest <= AMENITY_RADIUS_MILES["transit"])
+            else:
+                unverified.append("public_transport")
+        family_limit = FAMILY_DISTANCE_MILES.get(loc.get("proximity_to_family", "flexible"))
+        if family_limit is not None:
+            unmet["proximity_to_family"] = ~(features[:, COLUMN["center_miles"]] <= family_limit)
+        for mask in unmet.values():
+            keep &= ~mask
+
+        # Soft scores, each in [0, 1]
+        components = {"rating": np.where(
+            np.isnan(features[:, COLUMN["rating"]]), NEUTRAL_SCORE, features[:, COLUMN["rating"]] / 5.0
+        )}
+        if access.get("wheelchair_accessible"):
+            options = features[:, [COLUMN[option] for option in WHEELCHAIR_OPTIONS]]
+            known = ~np.isnan(options)
+            counts = known.sum(axis=1)
+            components["wheelchair"] = np.where(
+                counts > 0, np.nansum(options, axis=1) / np.maximum(counts, 1), NEUTRAL_SCORE
+            )
+            if not known.all():
+                unverified.append("wheelchair_accessible")
+        for amenity, wanted in (("pharmacy", loc.get("near_pharmacy")), ("hospital", loc.get("near_hospital")),
+                                ("transit", loc.get("public_transport")), ("shopping", loc.get("near_shopping"))):
+            if not wanted:
+                continue
+            if self._known(amenity):
+                components[amenity] = self._amenity_score(amenity)
+            if not self._verified(amenity) and amenity not in ("hospital", "transit"):
+                unverified.append(f"near_{amenity}")
+        if family_limit is not None:
+            components["family"] = np.clip(1.0 - features[:, COLUMN["center_miles"]] / family_limit, 0.0, 1.0)
+
+        total_weight = sum(SOFT_WEIGHTS[name] for name in components)
+        preference_score = sum(SOFT_WEIGHTS[name] * score for name, score in components.items()) / total_weight
+
+        search_score = np.array([place.get("matchScore", np.nan) for place in self.places], dtype=float)
+        overall = np.where(np.isnan(search_score), preference_score, (preference_score + search_score) / 2)
+
+        rows = np.flatnonzero(keep)
+        rows = rows[np.argsort(-overall[rows], kind="stable")]
+        if max_results is not None:
+            rows = rows[:max_results]
+
+        verify = [
+            message for field, message in UNVERIFIABLE_REQUIREMENTS.items() if access.get(field)
+        ]
+
+        results = []
+        for row in rows:
+            place = {
+                **self.places[row],
+                "preferenceScore": round(float(preference_score[row]), 4),
+                "overallScore": round(float(overall[row]), 4),
+                "nearby": {
+                    amenity: {
+                        "nearest_miles": round(float(nearest), 2) if not np.isnan(
+                            nearest := features[row, COLUMN[f"{amenity}_nearest_miles"]]) else None,
+                        "count": int(features[row, COLUMN[f"{amenity}_count"]])
+                    }
+                    for amenity in self.amenity_points
+                }
+            }
+            if verify:
+                place["verifyOnTour"] = verify
+            results.append(place)
+
+        return {
+            "results": results,
+            "count": len(results),
+            "candidates": n,
+            "excluded": {name: int(mask.sum()) for name, mask in unmet.items()},
+            "unverified": unverified,
+            "criteria": sorted(components)
+        }
+
+
+class MatcherCache:
+    """
+    Most recent FacilityMatcher per client session, so a preference change
+    re-ranks the same candidates instead of searching and matching again.
+
+    Least recently used sessions are evicted past max_entries; entries older
+    than ttl_seconds are dropped on lookup, since their search results and
+    amenity data have gone stale.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 1800):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[FacilityMatcher, dict, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, session_id: str, matcher: FacilityMatcher, search: dict) -> None:
+        """Remember a session's matcher along with the search it was built from"""
+        self._entries[session_id] = (matcher, search, time.monotonic())
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, session_id: str) -> Optional[tuple[FacilityMatcher, dict]]:
+        """The session's matcher and search, or None when missing or expired"""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        matcher, search, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[session_id]
+            return None
+        self._entries.move_to_end(session_id)
+        return matcher, search
@@ -0,0 +1,198 @@
+"""
+Geocode Cache
+
+Caches geocoding results keyed on a normalized location string so repeated
+searches for the same city skip the Geocoding API round-trip. Entries are held
+in a size-bounded LRU with a TTL, optionally backed by a SQLite file so the
+cache survives server restarts.
+"""
+
+import re
+import time
+import sqlite3
+from collections import OrderedDict
+from typing import Optional
+
+
+US_STATES = {
+    "alabama": "al", "alaska": "ak", "arizona": "az", "arkansas": "ar",
+    "california": "ca", "colorado": "co", "connecticut": "ct", "delaware": "de",
+    "district of columbia": "dc", "florida": "fl", "georgia": "ga", "hawaii": "hi",
+    "idaho": "id", "illinois": "il", "indiana": "in", "iowa": "ia",
+    "kansas": "ks", "kentucky": "ky", "louisiana": "la", "maine": "me",
+    "maryland": "md", "massachusetts": "ma", "michigan": "mi", "minnesota": "mn",
+    "mississippi": "ms", "missouri": "mo", "montana": "mt", "nebraska": "ne",
+    "nevada": "nv", "new hampshire": "nh", "new jersey": "nj", "new mexico": "nm",
+    "new york": "ny", "north carolina": "nc", "north dakota": "nd", "ohio": "oh",
+    "oklahoma": "ok", "oregon": "or", "pennsylvania": "pa", "rhode island": "ri",
+    "south carolina": "sc", "south dakota": "sd", "tennessee": "tn", "texas": "tx",
+    "utah": "ut", "vermont": "vt", "virginia": "va", "washington": "wa",
+    "west virginia": "wv", "wisconsin": "wi", "wyoming": "wy"
+}
+STATE_ABBREVIATIONS = set(US_STATES.values())
+
+_PUNCTUATION = re.compile(r"[^\w\s,]")
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_COUNTRY = re.compile(r",?\s*(usa|us|united states( of america)?)$")
+
+
+def _fold_state(text: str) -> Optional[str]:
+    """Return the two-letter abbreviation if text names a US state"""
+    if text in STATE_ABBREVIATIONS:
+        return text
+    return US_STATES.get(text)
+
+
+def normalize_location(location: str) -> str:
+    """
+    Normalize a free-form location into a cache key.
+
+    "Cleveland, Ohio", " cleveland  OH " and "Cleveland, OH, USA" all map to
+    "cleveland, oh".
+    """
+    text = _PUNCTUATION.sub("", location.lower().replace(".", ""))
+    text = _WHITESPACE.sub(" ", text).strip(" ,")
+    text = _TRAILING_COUNTRY.sub("", text).strip(" ,")
+
+    parts = [part.strip() for part in text.split(",") if part.strip()]
+    if not parts:
+        return ""
+
+    # "Cleveland, Ohio" -> state is its own comma-separated part
+    state = _fold_state(parts[-1])
+    if state and len(parts) > 1:
+        return ", ".join(parts[:-1] + [state])
+
+    # "Cleveland OH" / "Cleveland New York" -> state is the trailing word(s)
+    words = parts[-1].split(" ")
+    for size in (3, 2, 1):
+        if len(words) > size:
+            state = _fold_state(" ".join(words[-size:]))
+            if state:
+                parts[-1] = " ".join(words[:-size])
+                return ", ".join(parts + [state])
+
+    return ", ".join(parts)
+
+
+class GeocodeCacheStats:
+    """Hit/miss counters for the geocode cache"""
+
+    def __init__(self):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+class GeocodeCache:
+    """
+    LRU + TTL cache of geocoded coordinates.
+
+    The in-memory LRU answers the hot path. When db_path is set, entries are
+    written through to SQLite and memory misses fall back to disk before
+    going to the network.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 30 * 24 * 3600,
+                 db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.stats = GeocodeCacheStats()
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the backing store on first use"""
+        if self.db_path and self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS geocode_cache ("
+                "key TEXT PRIMARY KEY, latitude REAL NOT NULL, "
+                "longitude REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key: str, coords: dict, expires_at: float) -> None:
+        self._entries[key] = (coords, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def get(self, location: str) -> Optional[dict]:
+        """Return cached coordinates for location, or None on a miss"""
+        key = normalize_location(location)
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            coords, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return dict(coords)
+            del self._entries[key]
+            self.stats.expirations += 1
+
+        db = self._connect()
+        if db is not None:
+            row = db.execute(
+                "SELECT latitude, longitude, expires_at FROM geocode_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is not None and row[2] > now:
+                coords = {"latitude": row[0], "longitude": row[1]}
+                self._remember(key, coords, row[2])
+                self.stats.disk_hits += 1
+                return dict(coords)
+
+        self.stats.misses += 1
+        return None
+
+    def set(self, location: str, coords: dict) -> None:
+        """Store coordinates for location"""
+        key = normalize_location(location)
+        expires_at = time.time() + self.ttl_seconds
+        coords = {"latitude": coords["latitude"], "longitude": coords["longitude"]}
+        self._remember(key, coords, expires_at)
+
+        db = self._connect()
+        if db is not None:
+            db.execute(
+                "INSERT OR REPLACE INTO geocode_cache (key, latitude, longitude, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, coords["latitude"], coords["longitude"], expires_at)
+            )
+            db.commit()
+
+    def clear(self) -> None:
+        """Drop every cached entry, including the backing store"""
+        self._entries.clear()
+        db = self._connect()
+        if db is not None:
+            db.execute("DELETE FROM geocode_cache")
+            db.commit()
+
+    def close(self) -> None:
+        """Close the backing store"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -5,7 +5,187 @@ Coordinates multiple specialized agents to provide comprehensive
 senior housing guidance, analysis, and decision support.
 """
 
-from typing import Optional, Dict, Any, List
+import os
+import re
+import asyncio
+from typing import Awaitable, Optional, Dict, Any, List
+
+from conversation_state import KNOWN_CITIES, ConversationState
+from session_store import ConversationSession, HistoryLoader, SessionManager
+from message_store import MessageWriter, is_conversation_id
+
+
+# Intent keywords, in tie-break priority order
+INTENT_KEYWORDS: Dict[str, List[str]] = {
+    'budget': ['budget', 'afford', 'cost', 'price', 'income', 'expense'],
+    'accessibility': ['wheelchair', 'walker', 'elevator', 'accessible', 'mobility', 'disability'],
+    'location': ['near', 'close to', 'proximity', 'distance', 'family', 'hospital', 'pharmacy'],
+    'search': ['find', 'search', 'show me', 'looking for', 'apartment', 'housing'],
+    'compare': ['compare', 'difference', 'better', 'versus', 'vs', 'which one'],
+    'report': ['report', 'document', 'share', 'family', 'kids', 'children', 'show my'],
+    'prep': ['realtor', 'agent', 'questions', 'prepare', 'ready to'],
+}
+INTENT_PRIORITY = {intent: rank for rank, intent in enumerate(INTENT_KEYWORDS)}
+
+# Intents with a dedicated agent; anything else goes to general conversation
+AGENT_INTENTS = ('budget', 'accessibility', 'location', 'search', 'compare', 'report')
+# Agents that read facts from the conversation (ConversationState)
+STATE_INTENTS = ('budget', 'location', 'search')
+
+# Multi-intent dispatch: answer every sufficiently confident intent in one turn
+COACH_MULTI_INTENT = os.getenv("COACH_MULTI_INTENT", "false").lower() in ("1", "true", "yes")
+COACH_AGENT_TIMEOUT_SECONDS = float(os.getenv("COACH_AGENT_TIMEOUT_SECONDS", "5"))
+COACH_MIN_INTENT_CONFIDENCE = float(os.getenv("COACH_MIN_INTENT_CONFIDENCE", "0.2"))
+COACH_MAX_AGENTS = int(os.getenv("COACH_MAX_AGENTS", "3"))
+# Search results kept per conversation; comparisons run over these
+COACH_MAX_SEARCH_RESULTS = int(os.getenv("COACH_MAX_SEARCH_RESULTS", "500"))
+
+MULTI_AGENT_SEPARATOR = "\n\n---\n\n"
+
+# Pareto-optimal places spelled out in a comparison answer; the rest are counted
+COMPARISON_LIST_LIMIT = 5
+
+# How each comparison criterion is named in the answer
+COMPARISON_STANDOUTS = {
+    'monthly_cost': 'Lowest cost',
+    'rating': 'Highest rated',
+    'distance_miles': 'Closest',
+    'accessibility': 'Most wheelchair accessible',
+    'care_gap': 'Best fit for the care needed'
+}
+
+
+def _build_keyword_intents() -> Dict[str, List[str]]:
+    """Map each keyword to the intents it signals"""
+    keyword_intents: Dict[str, List[str]] = {}
+    for intent, keywords in INTENT_KEYWORDS.items():
+        for keyword in keywords:
+            keyword_intents.setdefault(keyword, []).append(intent)
+    return keyword_intents
+
+
+# A keyword shared by several intents ('family') is split between them
+KEYWORD_INTENTS = _build_keyword_intents()
+KEYWORD_WEIGHTS = {
+    keyword: tuple((intent, 1.0 / len(intents)) for intent in intents)
+    for keyword, intents in KEYWORD_INTENTS.items()
+}
+
+
+def _keyword_trie_pattern(keywords) -> str:
+    """
+    Build a regex matching any keyword, factored into a prefix trie.
+
+    Sharing prefixes keeps the engine from retrying every alternative at each
+    position. Keywords may take suffixes ("costs", "affordable") except the
+    short "vs", which must end at a word boundary.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict], prefix: str) -> str:
+        alternatives = [
+            re.escape(char) + build(child, prefix + char)
+            for char, child in sorted(node.items()) if char
+        ]
+        ending = r'\b' if prefix == 'vs' else ''
+        if not alternatives:
+            return ending
+        body = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+        return '(?:' + body + ')?' + ending if '' in node else body
+
+    return build(trie, '')
+
+
+INTENT_PATTERN = re.compile(r'\b' + _keyword_trie_pattern(KEYWORD_INTENTS))
+
+
+def _score_intents(message: str) -> Dict[str, float]:
+    """Raw keyword scores per intent from one scan of the message"""
+    scores: Dict[str, float] = {}
+    for keyword in INTENT_PATTERN.findall(message.lower()):
+        for intent, weight in KEYWORD_WEIGHTS[keyword]:
+            scores[intent] = scores.get(intent, 0.0) + weight
+    return scores
+
+
+def _rank_key(scores: Dict[str, float]):
+    return lambda intent: (-scores[intent], INTENT_PRIORITY[intent])
+
+
+def _comparison_line(comparison: Dict[str, Any], i: int) -> str:
+    """One place's values from a FacilityComparison.compare result, in plain words"""
+    values = comparison['values']
+    parts = []
+    if values['monthly_cost'][i] is not None:
+        parts.append(f"about ${values['monthly_cost'][i]:,.0f}/month")
+    if values['rating'][i] is not None:
+        parts.append(f"rated {values['rating'][i]:.1f}★")
+    if values['distance_miles'][i] is not None:
+        parts.append(f"{values['distance_miles'][i]:.1f} miles away")
+    access = values['accessibility'][i]
+    if access is not None:
+        parts.append("all listed wheelchair features" if access == 1 else
+                     "no listed wheelchair features" if access == 0 else "some listed wheelchair features")
+    if comparison['careLevel'][i] is not None:
+        parts.append(comparison['careLevel'][i].replace('_', ' '))
+    return f"- **{comparison['names'][i]}**: " + (", ".join(parts) or "few details listed yet")
+
+
+def _mentions(text: str, term: str) -> bool:
+    """Whether term appears in text as a whole word, not inside a longer one"""
+    return re.search(rf"(?<!\w){re.escape(term)}(?!\w)", text) is not None
+
+
+def _comparison_message(comparison: Dict[str, Any]) -> str:
+    """Answer text for a FacilityComparison.compare result"""
+    position = {place_id: i for i, place_id in enumerate(comparison['ids'])}
+    pareto = comparison['pareto']
+
+    lines = [f"I compared {comparison['count']} places side-by-side.", ""]
+    if comparison.get('missing'):
+        fallback = ", so I compared all of them" if comparison.get('all_results') else ""
+        lines[1:1] = [f"I couldn't find {', '.join(comparison['missing'])} in your results{fallback}.", ""]
+    if len(pareto) == 1:
+        lines.append("⭐ **One place comes out ahead** - none of the others beats it on anything:")
+    else:
+        lines.append("⭐ **Strongest choices** - no other place beats these on one point without "
+                     "falling behind on another:")
+    lines.extend(_comparison_line(comparison, position[place_id]) for place_id in pareto[:COMPARISON_LIST_LIMIT])
+    if len(pareto) > COMPARISON_LIST_LIMIT:
+        lines.append(f"- ...and {len(pareto) - COMPARISON_LIST_LIMIT} more")
+
+    names = comparison['names']
+    standouts = [
+        f"- {label}: " + ", ".join(names[position[place_id]] for place_id in comparison['best'][name][:3])
+        for name, label in COMPARISON_STANDOUTS.items()
+        if comparison['best'].get(name) and len(comparison['best'][name]) < comparison['count']
+    ]
+    if standouts:
+        lines.extend(["", "🏆 **Standouts**"] + standouts)
+
+    lines.extend(["", "Costs are estimates from each listing's price level, so confirm them when you call. "
+                      "Want me to look closer at any of these?"])
+    return "\n".join(lines)
+
+
+def classify_intents(message: str) -> Dict[str, float]:
+    """
+    Score every intent in a single pass over the message.
+
+    Returns intent confidences that sum to 1, highest first, or an empty
+    dict when no intent keyword appears.
+    """
+    scores = _score_intents(message)
+    total = sum(scores.values())
+    return {
+        intent: round(scores[intent] / total, 4)
+        for intent in sorted(scores, key=_rank_key(scores))
+    }
 
 
 class HousingCoachOrchestrator:
@@ -21,12 +201,26 @@ class HousingCoachOrchestrator:
     6. Decision Guide Writer - Creates family-shareable reports
     """
 
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize the orchestrator with API credentials"""
+    def __init__(self, api_key: Optional[str] = None, history_loader: Optional[HistoryLoader] = None,
+                 message_writer: Optional[MessageWriter] = None, multi_intent: bool = COACH_MULTI_INTENT,
+                 agent_timeout: float = COACH_AGENT_TIMEOUT_SECONDS):
+        """
+        Initialize the orchestrator with API credentials.
+
+        Per-user history, preferences and search results live in
+        ConversationSession records held by self.sessions, never on the
+        orchestrator itself. With a message_writer, every turn is persisted
+        write-behind and evicted sessions rehydrate from the same store.
+        With multi_intent, a message that carries several intents is answered
+        by all of their agents at once (see dispatch_intents).
+        """
         self.api_key = api_key
-        self.conversation_history: List[Dict[str, str]] = []
-        self.user_preferences: Dict[str, Any] = {}
-        self.search_results: List[Dict[str, Any]] = []
+        self.message_writer = message_writer
+        self.multi_intent = multi_intent
+        self.agent_timeout = agent_timeout
+        if history_loader is None and message_writer is not None:
+            history_loader = message_writer.load_history
+        self.sessions = SessionManager(loader=history_loader, max_search_results=COACH_MAX_SEARCH_RESULTS)
 
     def detect_intent(self, message: str, history: List[Dict[str, str]]) -> str:
         """
@@ -41,44 +235,37 @@ class HousingCoachOrchestrator:
             - 'report': Wants decision guide/report
             - 'prep': Real estate agent preparation
             - 'general': General conversation
-        """
-        message_lower = message.lower()
-
-        # Budget intent
-        if any(word in message_lower for word in ['budget', 'afford', 'cost', 'price', 'income', 'expense']):
-            return 'budget'
 
-        # Accessibility intent
-        if any(word in message_lower for word in ['wheelchair', 'walker', 'elevator', 'accessible', 'mobility', 'disability']):
-            return 'accessibility'
-
-        # Location intent
-        if any(word in message_lower for word in ['near', 'close to', 'proximity', 'distance', 'family', 'hospital', 'pharmacy']):
-            return 'location'
-
-        # Search intent
-        if any(word in message_lower for word in ['find', 'search', 'show me', 'looking for', 'apartment', 'housing']):
-            return 'search'
-
-        # Compare intent
-        if any(word in message_lower for word in ['compare', 'difference', 'better', 'versus', 'vs', 'which one']):
-            return 'compare'
-
-        # Report intent
-        if any(word in message_lower for word in ['report', 'document', 'share', 'family', 'kids', 'children', 'show my']):
-            return 'report'
-
-        # Prep intent
-        if any(word in message_lower for word in ['realtor', 'agent', 'questions', 'prepare', 'ready to']):
-            return 'prep'
+        The highest-confidence intent from classify_intents wins; ties go to
+        the earlier intent in INTENT_KEYWORDS.
+        """
+        scores = _score_intents(message)
+        if len(scores) <= 1:
+            return next(iter(scores), 'general')
+        return min(scores, key=_rank_key(scores))
 
-        return 'general'
+    def dispatch_intents(self, message: str) -> List[str]:
+        """
+        Intents to answer concurrently for one message, most confident first.
 
-    async def handle_budget_analysis(self, message: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
+        Only intents with an agent and at least COACH_MIN_INTENT_CONFIDENCE
+        are kept, at most COACH_MAX_AGENTS of them.
+        """
+        intents = [
+            intent for intent, confidence in classify_intents(message).items()
+            if intent in AGENT_INTENTS and confidence >= COACH_MIN_INTENT_CONFIDENCE
+        ]
+        return intents[:COACH_MAX_AGENTS]
+
+    async def handle_budget_analysis(self, message: str, history: List[Dict[str, str]],
+                                     state: Optional[ConversationState] = None) -> Dict[str, Any]:
         """
         Budget Advisor Agent: Analyzes financial situation and provides guidance.
         """
 
+        if state is None:
+            state = ConversationState.from_history(history)
+
         # Extract budget information from conversation
         # Note: context available via self._build_context(history) if needed
 
@@ -89,7 +276,7 @@ class HousingCoachOrchestrator:
         }
 
         # Check if we have enough info
-        has_income = any('income' in msg['content'].lower() for msg in history)
+        has_income = state.income_mentioned
 
         if not has_income:
             response["message"] = """Great question about budgeting! Let's work through this together.
@@ -181,11 +368,72 @@ Don't worry - there's no judgment here! The more you share, the better I can hel
 
         return response
 
-    async def handle_property_search(self, message: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
+    async def handle_location_analysis(self, message: str, history: List[Dict[str, str]],
+                                       state: Optional[ConversationState] = None) -> Dict[str, Any]:
+        """
+        Location Analyst Agent: Assesses proximity to family, healthcare and daily needs.
+        """
+
+        if state is None:
+            state = ConversationState.from_history(history)
+
+        # Areas named earlier, then any named in this message
+        lowered = message.lower()
+        areas = state.cities + sorted(
+            (city for city in KNOWN_CITIES if city in lowered and city not in state.cities), key=lowered.index
+        )
+
+        response = {
+            "type": "location_analysis",
+            "message": "",
+            "data": {}
+        }
+
+        if areas:
+            opening = f"Let's make sure {' or '.join(area.title() for area in areas)} works for your everyday life!"
+        else:
+            opening = "Location is so important - let's make sure we find you the right spot!"
+
+        response["message"] = opening + """
+
+Tell me what matters most to you:
+
+👨‍👩‍👧 **Family & Friends**
+- How close do you want to be to family?
+- Do they visit often?
+
+🏥 **Healthcare**
+- Do you need to be near a specific hospital or doctor?
+- How important is having a pharmacy nearby?
+
+🛒 **Daily Life**
+- Do you like to shop in person, or mostly online?
+- Need public transportation access?
+
+Whatever your preferences, we'll find something that fits!"""
+
+        response["data"] = {
+            "areas": areas,
+            "location_factors": [
+                "proximity_to_family",
+                "near_hospital",
+                "near_pharmacy",
+                "near_shopping",
+                "public_transport"
+            ]
+        }
+
+        return response
+
+    async def handle_property_search(self, message: str, history: List[Dict[str, str]],
+                                     state: Optional[ConversationState] = None) -> Dict[str, Any]:
         """
         Housing Research Agent: Searches for properties and explains options.
         """
 
+        if state is None:
+            state = ConversationState.from_history(history)
+
         response = {
             "type": "property_search",
             "message": "",
@@ -193,10 +441,7 @@ Don't worry - there's no judgment here! The more you share, the better I can hel
         }
 
         # Check if we have location
-        has_location = any(
-            word in ' '.join([msg['content'].lower() for msg in history])
-            for word in ['cleveland', 'akron', 'columbus', 'city', 'area']
-        )
+        has_location = state.location_mentioned
 
         if not has_location:
             response["message"] = """I'd love to help you search! Let's find you some great options.
@@ -228,11 +473,20 @@ Ready for me to search? Just say yes and I'll get started!"""
 
         return response
 
-    async def handle_comparison_analysis(self, message: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
+    async def handle_comparison_analysis(self, message: str, history: List[Dict[str, str]],
+                                         session: Optional[ConversationSession] = None,
+                                         facility_ids: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Comparison Agent: Provides detailed comparison of options.
+
+        Compares the conversation's search results: the ones in facility_ids,
+        or the ones the message names, or all of them. Without at least two
+        results to compare, explains what it will compare instead.
         """
 
+        if session is not None and len(session.search_results) >= 2:
+            return self._compare_search_results(message, session, facility_ids)
+
         response = {
             "type": "comparison_analysis",
             "message": """I can help you compare options side-by-side!
@@ -274,6 +528,38 @@ Which properties would you like me to compare? You can give me names, addresses,
 
         return response
 
+    def _compare_search_results(self, message: str, session: ConversationSession,
+                                facility_ids: Optional[List[str]]) -> Dict[str, Any]:
+        if session.comparison is None:
+            from comparison import FacilityComparison  # NumPy loads on the first comparison, not at import
+            session.comparison = FacilityComparison(session.search_results)
+
+        missing: List[str] = []
+        if facility_ids:
+            missing = [place_id for place_id in facility_ids if place_id not in session.comparison]
+            facility_ids = [place_id for place_id in facility_ids if place_id in session.comparison]
+        else:
+            lowered = message.lower()
+            facility_ids = [
+                place['id'] for place in session.search_results
+                if place.get('id') and (_mentions(message, place['id'])
+                                        or (place.get('name') and _mentions(lowered, place['name'].lower())))
+            ]
+        selected = facility_ids if len(facility_ids) >= 2 else None
+
+        comparison = session.comparison.compare(selected, care_level=session.preferences.get('care_level'))
+        if missing:
+            comparison['missing'] = missing
+            comparison['all_results'] = selected is None
+        return {
+            "type": "comparison_analysis",
+            "message": _comparison_message(comparison),
+            "data": {
+                "comparison_criteria": comparison['criteria'],
+                "comparison": comparison
+            }
+        }
+
     async def handle_report_generation(self, message: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
         """
         Decision Guide Writer: Creates comprehensive reports for family.
@@ -376,27 +662,148 @@ Whatever you're thinking about, I'm here to help you work through it!""",
             for msg in history[-5:]  # Last 5 messages
         ])
 
-    async def process_message(self, message: str, history: List[Dict[str, str]]) -> Dict[str, Any]:
+    async def process_message(self, message: str, history: List[Dict[str, str]],
+                              state: Optional[ConversationState] = None,
+                              session: Optional[ConversationSession] = None,
+                              facility_ids: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Main entry point: Process user message and route to appropriate agent.
+
+        state carries facts extracted from earlier turns and is kept current by
+        the caller (see process_conversation_message). Without it, only the
+        agents that need facts extract them from history, so other turns never
+        scan it. session supplies search results for comparisons, narrowed to
+        facility_ids when given.
         """
 
+        if self.multi_intent:
+            intents = self.dispatch_intents(message)
+            if len(intents) > 1:
+                return await self._process_multi_intent(intents, message, history, state, session, facility_ids)
+
         # Detect intent
         intent = self.detect_intent(message, history)
 
         # Route to appropriate agent
+        return await self._agent(intent, message, history, state, session, facility_ids)
+
+    def _agent(self, intent: str, message: str, history: List[Dict[str, str]], state: Optional[ConversationState],
+               session: Optional[ConversationSession] = None,
+               facility_ids: Optional[List[str]] = None) -> Awaitable[Dict[str, Any]]:
+        """The agent call answering one intent"""
         if intent == 'budget':
-            return await self.handle_budget_analysis(message, history)
+            return self.handle_budget_analysis(message, history, state)
         elif intent == 'accessibility':
-            return await self.handle_accessibility_analysis(message, history)
+            return self.handle_accessibility_analysis(message, history)
+        elif intent == 'location':
+            return self.handle_location_analysis(message, history, state)
         elif intent == 'search':
-            return await self.handle_property_search(message, history)
+            return self.handle_property_search(message, history, state)
         elif intent == 'compare':
-            return await self.handle_comparison_analysis(message, history)
+            return self.handle_comparison_analysis(message, history, session, facility_ids)
         elif intent == 'report':
-            return await self.handle_report_generation(message, history)
+            return self.handle_report_generation(message, history)
         else:
+            return self.handle_general_conversation(message, history)
+
+    async def _process_multi_intent(self, intents: List[str], message: str, history: List[Dict[str, str]],
+                                    state: Optional[ConversationState],
+                                    session: Optional[ConversationSession] = None,
+                                    facility_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Run one agent per intent concurrently and merge their answers.
+
+        Each agent gets agent_timeout seconds; one that times out or fails is
+        left out of the answer and reported in data. If every agent fails
+        the turn falls back to the general conversation agent.
+        """
+        if state is None and any(intent in STATE_INTENTS for intent in intents):
+            # One extraction shared by every agent that reads facts
+            state = ConversationState.from_history(history)
+        results = await asyncio.gather(
+            *(asyncio.wait_for(self._agent(intent, message, history, state, session, facility_ids),
+                               self.agent_timeout)
+              for intent in intents),
+            return_exceptions=True
+        )
+
+        answered, timed_out, failed = [], [], []
+        for intent, result in zip(intents, results):
+            if isinstance(result, asyncio.TimeoutError):
+                timed_out.append(intent)
+            elif isinstance(result, BaseException):
+                failed.append({"intent": intent, "error": str(result)})
+            else:
+                answered.append((intent, result))
+
+        if not answered:
             return await self.handle_general_conversation(message, history)
+        if len(answered) == 1 and not (timed_out or failed):
+            return answered[0][1]
+
+        return {
+            "type": "multi_agent",
+            "message": MULTI_AGENT_SEPARATOR.join(result["message"] for _, result in answered),
+            "data": {
+                "intents": intents,
+                "responses": [
+                    {"intent": intent, "type": result["type"], "data": result.get("data", {})}
+                    for intent, result in answered
+                ],
+                "timed_out": timed_out,
+                "failed": failed
+            }
+        }
+
+    async def process_conversation_message(self, conversation_id: str, message: str,
+                                           search_results: Optional[List[Dict[str, Any]]] = None,
+                                           facility_ids: Optional[List[str]] = None,
+                                           care_level: Optional[str] = None,
+                                           history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+        """
+        Process a message for a stored conversation.
+
+        The session for conversation_id supplies history and incrementally
+        maintained state, and records both sides of the turn afterwards.
+        search_results (result rows from a search or match tool), when given,
+        replace the session's results before the turn is answered. care_level
+        (one of independent_living, assisted_living, memory_care), when given,
+        is kept as the session's preference and used by comparisons. history
+        (the client's copy) seeds a session that has none yet, e.g. after the
+        worker restarted without message storage; otherwise it is ignored.
+        """
+
+        if self.message_writer is not None and not is_conversation_id(conversation_id):
+            # Stored messages reference conversations.id; reject before answering, not after
+            raise ValueError(f"conversation_id must be a UUID: {conversation_id!r}")
+
+        session: ConversationSession = await self.sessions.get(conversation_id)
+        if history and not session.history:
+            for entry in history:
+                session.append(entry['role'], entry['content'])
+        if search_results is not None:
+            session.set_search_results(search_results)
+        if care_level is not None:
+            session.preferences['care_level'] = care_level
+        result = await self.process_message(message, session.history, session.state, session, facility_ids)
+
+        session.append('user', message)
+        session.append('assistant', result['message'])
+
+        if self.message_writer is not None:
+            # Once the session has the turn, store both sides even if the caller is cancelled now
+            await asyncio.shield(self._store_turn(conversation_id, message, result['message']))
+
+        return result
+
+    async def _store_turn(self, conversation_id: str, message: str, reply: str) -> None:
+        await self.message_writer.enqueue(conversation_id, 'user', message)
+        await self.message_writer.enqueue(conversation_id, 'assistant', reply)
+
+    async def aclose(self) -> None:
+        """Flush any queued messages to storage"""
+        if self.message_writer is not None:
+            await self.message_writer.aclose()
 
 
 # Singleton instance
@@ -404,7 +811,12 @@ _orchestrator_instance = None
 
 
 def get_orchestrator() -> HousingCoachOrchestrator:
-    """Get or create the orchestrator singleton"""
+    """
+    Get or create the orchestrator singleton.
+
+    Sharing one instance is safe: it holds no per-user state of its own,
+    only the session manager that keys state by conversation id.
+    """
     global _orchestrator_instance
     if _orchestrator_instance is None:
         _orchestrator_instance = HousingCoachOrchestrator()
@@ -0,0 +1,150 @@
+"""
+Shared HTTP Client
+
+Provides one server-lifetime aiohttp session for all outbound Google API calls.
+Connections are kept alive and pooled per host, so repeated tool calls reuse
+existing TCP/TLS connections instead of paying a fresh handshake every time.
+aiohttp itself is imported when the session is first created, so processes
+that never call Google do not pay for loading it.
+"""
+
+import os
+import asyncio
+from typing import TYPE_CHECKING, Any, Optional
+
+from rate_limit import UpstreamGuard
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+# Pool Configuration
+HTTP_TOTAL_TIMEOUT = float(os.getenv("GOOGLE_HTTP_TIMEOUT_SECONDS", "15"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("GOOGLE_HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_POOL_LIMIT = int(os.getenv("GOOGLE_HTTP_POOL_LIMIT", "100"))
+HTTP_LIMIT_PER_HOST = int(os.getenv("GOOGLE_HTTP_LIMIT_PER_HOST", "20"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("GOOGLE_HTTP_KEEPALIVE_SECONDS", "60"))
+HTTP_DNS_CACHE_SECONDS = int(os.getenv("GOOGLE_HTTP_DNS_CACHE_SECONDS", "300"))
+
+# Flow-control Configuration
+google_guard = UpstreamGuard(
+    rate_per_second=float(os.getenv("GOOGLE_RATE_LIMIT_PER_SECOND", "50")),
+    burst=int(os.getenv("GOOGLE_RATE_LIMIT_BURST", "50")),
+    initial_concurrency=int(os.getenv("GOOGLE_INITIAL_CONCURRENCY", "8")),
+    max_concurrency=int(os.getenv("GOOGLE_MAX_CONCURRENCY", "64")),
+    max_retries=int(os.getenv("GOOGLE_MAX_RETRIES", "3")),
+    failure_threshold=int(os.getenv("GOOGLE_BREAKER_FAILURES", "5")),
+    reset_seconds=float(os.getenv("GOOGLE_BREAKER_RESET_SECONDS", "30"))
+)
+
+
+class ConnectionPoolStats:
+    """Counters describing how well the connection pool is being reused"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.sessions_created = 0
+
+    def as_dict(self) -> dict:
+        acquired = self.connections_created + self.connections_reused
+        return {
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "sessions_created": self.sessions_created,
+            "reuse_ratio": round(self.connections_reused / acquired, 4) if acquired else 0.0
+        }
+
+
+pool_stats = ConnectionPoolStats()
+
+_session: Optional["aiohttp.ClientSession"] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _build_trace_config() -> "aiohttp.TraceConfig":
+    """Hook aiohttp connection events into the pool counters"""
+    import aiohttp
+
+    async def on_request_start(session, context, params):
+        pool_stats.requests += 1
+
+    async def on_connection_create_end(session, context, params):
+        pool_stats.connections_created += 1
+
+    async def on_connection_reuseconn(session, context, params):
+        pool_stats.connections_reused += 1
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
+
+
+async def get_http_session() -> "aiohttp.ClientSession":
+    """Get the shared session, creating it on first use in the running loop"""
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+            ttl_dns_cache=HTTP_DNS_CACHE_SECONDS
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TOTAL_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            trace_configs=[_build_trace_config()]
+        )
+        _session_loop = loop
+        pool_stats.sessions_created += 1
+
+    return _session
+
+
+async def close_http_session() -> None:
+    """Close the shared session and release all pooled connections"""
+    global _session, _session_loop
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+
+
+def _retry_after(response: "aiohttp.ClientResponse") -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def fetch_json(name: str, method: str, url: str, **kwargs) -> tuple[int, Any]:
+    """
+    Send a Google API request through the shared session and flow control.
+
+    Returns (status, parsed JSON) for 200 responses and (status, body text)
+    otherwise. Raises rate_limit.CircuitOpenError when the endpoint's breaker
+    is open, or the last connection error once retries are exhausted.
+    """
+
+    async def send() -> tuple[int, Any, Optional[float]]:
+        session = await get_http_session()
+        async with session.request(method, url, **kwargs) as response:
+            if response.status == 200:
+                data = await response.json()
+                # The Geocoding API reports quota exhaustion inside a 200 response
+                if isinstance(data, dict) and data.get("status") == "OVER_QUERY_LIMIT":
+                    return 429, data, None
+                return response.status, data, None
+            return response.status, await response.text(), _retry_after(response)
+
+    return await google_guard.request(name, send)
@@ -0,0 +1,320 @@
+"""
+Chat Message Store
+
+Write-behind persistence of coach messages to the messages table from
+supabase/migrations/003_create_conversations.sql. Messages are queued as they
+happen and flushed in multi-row INSERTs when a batch fills or a time threshold
+passes, so a chat turn never waits on a database round-trip.
+"""
+
+import uuid
+import asyncio
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Protocol
+
+
+# (id, conversation_id, role, content, timestamp)
+MessageRow = tuple[str, str, str, str, datetime]
+
+MESSAGE_COLUMNS = "id, conversation_id, role, content, timestamp"
+
+
+def is_conversation_id(value: str) -> bool:
+    """Whether value can be stored as a conversations.id (a UUID)"""
+    try:
+        uuid.UUID(value)
+    except (TypeError, ValueError, AttributeError):
+        return False
+    return True
+
+
+class MessageSink(Protocol):
+    """Storage backend the writer flushes batches into"""
+
+    async def write_batch(self, rows: List[MessageRow]) -> None: ...
+
+    async def load(self, conversation_id: str) -> List[Dict[str, str]]: ...
+
+    async def close(self) -> None: ...
+
+
+class SQLiteMessageSink:
+    """Local SQLite stand-in for the messages table"""
+
+    # Stay well under SQLite's bound-parameter limit per statement
+    MAX_ROWS_PER_INSERT = 150
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "id TEXT PRIMARY KEY, conversation_id TEXT NOT NULL, "
+                "role TEXT NOT NULL CHECK (role IN ('user', 'assistant')), "
+                "content TEXT NOT NULL, timestamp TEXT NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_messages_conversation_id ON messages(conversation_id)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _write(self, rows: List[MessageRow]) -> None:
+        db = self._connect()
+        for start in range(0, len(rows), self.MAX_ROWS_PER_INSERT):
+            chunk = rows[start:start + self.MAX_ROWS_PER_INSERT]
+            placeholders = ", ".join(["(?, ?, ?, ?, ?)"] * len(chunk))
+            params = [
+                value.isoformat() if isinstance(value, datetime) else value
+                for row in chunk for value in row
+            ]
+            db.execute(f"INSERT INTO messages ({MESSAGE_COLUMNS}) VALUES {placeholders}", params)
+        db.commit()
+
+    def _load(self, conversation_id: str) -> List[Dict[str, str]]:
+        rows = self._connect().execute(
+            "SELECT role, content FROM messages WHERE conversation_id = ? ORDER BY timestamp, rowid",
+            (conversation_id,)
+        ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    async def write_batch(self, rows: List[MessageRow]) -> None:
+        await asyncio.to_thread(self._write, rows)
+
+    async def load(self, conversation_id: str) -> List[Dict[str, str]]:
+        return await asyncio.to_thread(self._load, conversation_id)
+
+    async def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class PostgresMessageSink:
+    """Postgres/Supabase messages table, written with asyncpg"""
+
+    # Postgres allows 32767 bind parameters per statement
+    MAX_ROWS_PER_INSERT = 1000
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 4):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+
+    async def _connect(self):
+        if self._pool is None:
+            import asyncpg  # Optional dependency, only needed for Postgres storage
+
+            self._pool = await asyncpg.create_pool(self.dsn, min_size=self.min_size, max_size=self.max_size)
+        return self._pool
+
+    async def write_batch(self, rows: List[MessageRow]) -> None:
+        pool = await self._connect()
+        async with pool.acquire() as connection:
+            async with connection.transaction():
+                for start in range(0, len(rows), self.MAX_ROWS_PER_INSERT):
+                    chunk = rows[start:start + self.MAX_ROWS_PER_INSERT]
+                    placeholders = ", ".join(
+                        f"(${i * 5 + 1}::uuid, ${i * 5 + 2}::uuid, ${i * 5 + 3}, ${i * 5 + 4}, ${i * 5 + 5})"
+                        for i in range(len(chunk))
+                    )
+                    params = [value for row in chunk for value in row]
+                    await connection.execute(
+                        f"INSERT INTO messages ({MESSAGE_COLUMNS}) VALUES {placeholders}", *params
+                    )
+
+    async def load(self, conversation_id: str) -> List[Dict[str, str]]:
+        if not is_conversation_id(conversation_id):
+            # conversation_id is a uuid column; no stored conversation can have this id
+            return []
+        pool = await self._connect()
+        rows = await pool.fetch(
+            "SELECT role, content FROM messages WHERE conversation_id = $1::uuid ORDER BY timestamp",
+            conversation_id
+        )
+        return [{"role": row["role"], "content": row["content"]} for row in rows]
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+class MessageWriterStats:
+    """Counters for the write-behind pipeline"""
+
+    def __init__(self):
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.split_batches = 0
+        self.dropped = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+class MessageWriter:
+    """
+    Async write-behind queue in front of a MessageSink.
+
+    enqueue() returns as soon as the message is queued; it only waits when
+    max_queue messages are already pending (backpressure). A background task
+    flushes up to batch_size messages at a time, or whatever is pending once
+    flush_interval seconds pass. A batch that still fails after its retries
+    is split up, so one bad row only loses itself, not other conversations'
+    messages. aclose() flushes everything before returning.
+    """
+
+    def __init__(self, sink: MessageSink, batch_size: int = 50, flush_interval: float = 0.5,
+                 max_queue: int = 1000, max_retries: int = 3):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.stats = MessageWriterStats()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+        # conversation id -> messages queued or being written
+        self._pending: Dict[str, int] = {}
+        self._settled = asyncio.Condition()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+
+    async def enqueue(self, conversation_id: str, role: str, content: str) -> None:
+        """Queue one message for persistence; conversation_id must be a UUID"""
+        if self._closing:
+            raise RuntimeError("MessageWriter is closed")
+        if not is_conversation_id(conversation_id):
+            raise ValueError(f"conversation_id must be a UUID: {conversation_id!r}")
+        self._ensure_worker()
+        row = (str(uuid.uuid4()), conversation_id, role, content, datetime.now(timezone.utc))
+        self._pending[conversation_id] = self._pending.get(conversation_id, 0) + 1
+        try:
+            await self._queue.put(row)
+        except BaseException:
+            self._settle([row])
+            asyncio.ensure_future(self._notify_settled())
+            raise
+        self.stats.enqueued += 1
+
+    async def _next_batch(self) -> List[MessageRow]:
+        """Wait for the first message, then gather more until full or the interval passes"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write_once(self, batch: List[MessageRow]) -> bool:
+        try:
+            await self.sink.write_batch(batch)
+        except Exception as e:
+            self.stats.failed_batches += 1
+            print(f"Message batch write failed ({len(batch)} rows): {e}")
+            return False
+        self.stats.written += len(batch)
+        self.stats.batches += 1
+        return True
+
+    async def _write(self, batch: List[MessageRow]) -> None:
+        for attempt in range(self.max_retries):
+            if await self._write_once(batch):
+                return
+            if attempt + 1 < self.max_retries:
+                await asyncio.sleep(0.1 * 2 ** attempt)
+        await self._write_split(batch)
+
+    async def _write_split(self, batch: List[MessageRow]) -> None:
+        """
+        Write a batch that keeps failing in smaller pieces, once each.
+
+        A batch is one transaction, so a single bad row (say, a conversation
+        with no conversations row) fails everything in it. Splitting by
+        conversation, then in halves, isolates the bad rows; only rows that
+        fail on their own are dropped.
+        """
+        if len(batch) == 1:
+            self.stats.dropped += 1
+            return
+        self.stats.split_batches += 1
+        by_conversation: Dict[str, List[MessageRow]] = {}
+        for row in batch:
+            by_conversation.setdefault(row[1], []).append(row)
+        if len(by_conversation) > 1:
+            parts = list(by_conversation.values())
+        else:
+            middle = len(batch) // 2
+            parts = [batch[:middle], batch[middle:]]
+        for part in parts:
+            if not await self._write_once(part):
+                await self._write_split(part)
+
+    def _settle(self, rows: List[MessageRow]) -> None:
+        """Mark rows as no longer pending, whether written or dropped"""
+        for row in rows:
+            remaining = self._pending.get(row[1], 0) - 1
+            if remaining > 0:
+                self._pending[row[1]] = remaining
+            else:
+                self._pending.pop(row[1], None)
+
+    async def _notify_settled(self) -> None:
+        """Wake load_history callers so they recheck their conversation"""
+        async with self._settled:
+            self._settled.notify_all()
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._write(batch)
+            finally:
+                self._settle(batch)
+                for _ in batch:
+                    self._queue.task_done()
+            await self._notify_settled()
+
+    async def flush(self) -> None:
+        """Wait until every message queued so far has been written"""
+        if self._worker is not None:
+            await self._queue.join()
+
+    async def load_history(self, conversation_id: str) -> List[Dict[str, str]]:
+        """
+        Stored messages for a conversation, including any still queued.
+
+        Waits only for this conversation's queued messages to be written, not
+        for the whole queue, so rehydration does not stall behind other
+        conversations' traffic.
+        """
+        async with self._settled:
+            await self._settled.wait_for(lambda: not self._pending.get(conversation_id))
+        return await self.sink.load(conversation_id)
+
+    async def aclose(self) -> None:
+        """Flush pending messages, stop the worker and close the sink"""
+        self._closing = True
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        await self.sink.close()
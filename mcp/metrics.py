@@ -0,0 +1,246 @@
+"""
+Server Metrics
+
+Lightweight instrumentation for the MCP server: counters, per-tool and
+per-stage latency histograms, and collectors that sample cache and pool
+counters at scrape time. Metrics render in Prometheus text format, served from
+a local HTTP endpoint or dumped to stderr on SIGUSR1.
+
+Disabled unless METRICS_ENABLED is set; when disabled every call returns
+immediately and timers are a shared no-op.
+"""
+
+import os
+import sys
+import math
+import signal
+import time
+import functools
+from typing import Callable, Iterable, Optional
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+# Serve /metrics on this port when set; bound to localhost unless overridden
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# Log-linear latency buckets: 2 per power of two from 0.5 ms to ~65 s,
+# so any recorded value is within ~41% of its bucket bound
+BUCKET_MIN_SECONDS = 0.0005
+BUCKETS_PER_OCTAVE = 2
+BUCKET_COUNT = 34
+BUCKET_BOUNDS = [BUCKET_MIN_SECONDS * 2 ** (i / BUCKETS_PER_OCTAVE) for i in range(BUCKET_COUNT)]
+
+LabelKey = tuple[tuple[str, str], ...]
+# A collector yields (metric name, labels, value) samples at render time
+Collector = Callable[[], Iterable[tuple[str, dict, float]]]
+
+
+class Histogram:
+    """Fixed log-linear bucket histogram with O(1) recording"""
+
+    __slots__ = ("counts", "overflow", "count", "total")
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.overflow = 0
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds <= BUCKET_MIN_SECONDS:
+            index = 0
+        else:
+            index = math.ceil(math.log2(seconds / BUCKET_MIN_SECONDS) * BUCKETS_PER_OCTAVE - 1e-9)
+        if index < BUCKET_COUNT:
+            self.counts[index] += 1
+        else:
+            self.overflow += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bucket bound containing the given fraction of observations"""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for bound, bucket_count in zip(BUCKET_BOUNDS, self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return bound
+        return math.inf
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "labels", "started")
+
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = self.labels
+        if exc_type is not None:
+            labels = {**labels, "outcome": "error"}
+        self.registry.observe(self.name, time.perf_counter() - self.started, **labels)
+        return False
+
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class MetricsRegistry:
+    """Holds all counters, histograms and collectors for the process"""
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, prefix: str = "senior_housing_"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.counters: dict[str, dict[LabelKey, float]] = {}
+        self.histograms: dict[str, dict[LabelKey, Histogram]] = {}
+        self.collectors: list[Collector] = []
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+        series = self.counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        if not self.enabled:
+            return
+        series = self.histograms.setdefault(name, {})
+        key = _label_key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(seconds)
+
+    def timer(self, name: str, **labels):
+        """Context manager recording elapsed seconds into histogram name"""
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, name, labels)
+
+    def instrument_tool(self, fn):
+        """Decorator timing an async MCP tool into tool_duration_seconds"""
+        tool = fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return await fn(*args, **kwargs)
+            with self.timer("tool_duration_seconds", tool=tool):
+                result = await fn(*args, **kwargs)
+            status = result.get("status", "unknown") if isinstance(result, dict) else "unknown"
+            self.increment("tool_calls_total", tool=tool, status=status)
+            return result
+
+        return wrapper
+
+    def register_collector(self, collector: Collector) -> None:
+        self.collectors.append(collector)
+
+    def register_stats(self, name: str, get_stats: Callable[[], dict]) -> None:
+        """Export every numeric field of a stats dict as gauge name_<field>"""
+
+        def collect():
+            for field, value in get_stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    yield f"{name}_{field}", {}, value
+
+        self.register_collector(collect)
+
+    def render_prometheus(self) -> str:
+        """All metrics in Prometheus text exposition format"""
+        lines = []
+
+        for name, series in sorted(self.counters.items()):
+            full_name = self.prefix + name
+            lines.append(f"# TYPE {full_name} counter")
+            for key, value in series.items():
+                lines.append(f"{full_name}{_format_labels(key)} {value:g}")
+
+        for name, series in sorted(self.histograms.items()):
+            full_name = self.prefix + name
+            lines.append(f"# TYPE {full_name} histogram")
+            for key, histogram in series.items():
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKET_BOUNDS, histogram.counts):
+                    cumulative += bucket_count
+                    bucket_labels = _format_labels(key, 'le="%.6g"' % bound)
+                    lines.append(f"{full_name}_bucket{bucket_labels} {cumulative}")
+                bucket_labels = _format_labels(key, 'le="+Inf"')
+                lines.append(f"{full_name}_bucket{bucket_labels} {histogram.count}")
+                lines.append(f"{full_name}_sum{_format_labels(key)} {histogram.total:.6f}")
+                lines.append(f"{full_name}_count{_format_labels(key)} {histogram.count}")
+
+        gauges: dict[str, list[tuple[LabelKey, float]]] = {}
+        for collector in self.collectors:
+            for name, labels, value in collector():
+                gauges.setdefault(name, []).append((_label_key(labels), value))
+        for name, samples in sorted(gauges.items()):
+            full_name = self.prefix + name
+            lines.append(f"# TYPE {full_name} gauge")
+            for key, value in samples:
+                lines.append(f"{full_name}{_format_labels(key)} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    def dump(self, stream=None) -> None:
+        """Write the current metrics to stream (stderr by default)"""
+        (stream or sys.stderr).write(self.render_prometheus())
+
+
+metrics = MetricsRegistry()
+
+
+def install_dump_signal(loop, signum: int = getattr(signal, "SIGUSR1", 0)) -> bool:
+    """Dump metrics to stderr whenever the process receives signum (POSIX only)"""
+    if not signum:
+        return False
+    try:
+        loop.add_signal_handler(signum, metrics.dump)
+    except (NotImplementedError, RuntimeError, ValueError):
+        return False
+    return True
+
+
+async def start_metrics_server(host: str, port: int):
+    """Serve GET /metrics on host:port; returns the runner to clean up on exit"""
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=metrics.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
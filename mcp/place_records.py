@@ -0,0 +1,90 @@
+"""
+Place Records
+
+Compact representation of Places search results. Google returns nested dicts
+(displayName objects, location objects, every field in the field mask); the
+server only ever reads a handful of them. Results are converted to
+PlaceRecords as soon as they arrive, so the places cache and the facility
+index hold slotted records instead of raw responses, and tool responses carry
+flat rows built from them. place_columns turns a list of rows into one array
+per field for large result sets.
+"""
+
+from typing import Any, Iterable, Optional
+
+
+class PlaceRecord:
+    """One place, holding only the fields the tools use"""
+
+    __slots__ = ("id", "name", "address", "latitude", "longitude", "rating", "price_level", "types",
+                 "accessibility", "matched_types")
+
+    def __init__(self, id: Optional[str], name: Optional[str], address: Optional[str],
+                 latitude: Optional[float], longitude: Optional[float], rating: Optional[float] = None,
+                 price_level: Optional[str] = None, types: tuple = (),
+                 accessibility: Optional[dict] = None, matched_types: Optional[tuple] = None):
+        self.id = id
+        self.name = name
+        self.address = address
+        self.latitude = latitude
+        self.longitude = longitude
+        self.rating = rating
+        self.price_level = price_level
+        self.types = types
+        # accessibilityOptions as reported by Places; None when not reported
+        self.accessibility = accessibility
+        # Housing types whose per-type query returned this place (per_type mode only)
+        self.matched_types = matched_types
+
+    @classmethod
+    def from_google(cls, place: dict) -> "PlaceRecord":
+        """Build a record from one entry of a Places searchText response"""
+        location = place.get("location") or {}
+        display_name = place.get("displayName")
+        return cls(
+            id=place.get("id"),
+            name=display_name.get("text") if isinstance(display_name, dict) else display_name,
+            address=place.get("formattedAddress"),
+            latitude=location.get("latitude"),
+            longitude=location.get("longitude"),
+            rating=place.get("rating"),
+            price_level=place.get("priceLevel"),
+            types=tuple(place.get("types") or ()),
+            accessibility=place.get("accessibilityOptions") or None
+        )
+
+    def with_matched_types(self, matched_types: Iterable[str]) -> "PlaceRecord":
+        """Copy tagged with the housing types that matched; cached records are never mutated"""
+        return PlaceRecord(
+            self.id, self.name, self.address, self.latitude, self.longitude, self.rating,
+            self.price_level, self.types, self.accessibility, tuple(matched_types)
+        )
+
+    def as_dict(self) -> dict:
+        """Flat response row; optional fields appear only when known"""
+        row = {
+            "id": self.id,
+            "name": self.name,
+            "address": self.address,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "rating": self.rating,
+            "priceLevel": self.price_level,
+            "types": list(self.types)
+        }
+        if self.accessibility is not None:
+            row["accessibilityOptions"] = self.accessibility
+        if self.matched_types is not None:
+            row["matchedHousingTypes"] = list(self.matched_types)
+        return row
+
+
+def place_columns(rows: list[dict]) -> dict[str, list[Any]]:
+    """
+    Columnar form of response rows: one list per field, aligned by index.
+
+    Fields are taken in order of first appearance; a row without a field gets
+    None in that column.
+    """
+    fields = list(dict.fromkeys(field for row in rows for field in row))
+    return {field: [row.get(field) for row in rows] for field in fields}
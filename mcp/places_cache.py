@@ -0,0 +1,188 @@
+"""
+Places Search Cache
+
+Caches Places searchText results keyed on the query string, a quantized
+search center, a radius bucket and the result page number. Fresh entries are served directly, stale
+entries are served while a background refresh runs, and concurrent identical
+misses are coalesced into a single upstream request.
+"""
+
+import math
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+
+PlacesKey = tuple[str, float, float, int, int]
+
+
+class PlacesCacheStats:
+    """Counters for the Places result cache"""
+
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.evictions = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        served = self.hits + self.stale_hits + self.coalesced
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "evictions": self.evictions,
+            "hit_ratio": round(served / lookups, 4) if lookups else 0.0
+        }
+
+
+class PlacesResultCache:
+    """
+    TTL cache with stale-while-revalidate and single-flight coalescing.
+
+    An entry is fresh for ttl_seconds. For a further stale_seconds it is
+    still served, but the first caller to see it stale schedules a background
+    refresh. After that it is no longer served by get_or_fetch, but it is kept
+    (subject to LRU eviction) until a fetch replaces it, so peek() can still
+    return the last good answer while the upstream is failing. Only
+    successful responses are stored.
+    """
+
+    def __init__(self, max_entries: int = 500, ttl_seconds: float = 6 * 3600,
+                 stale_seconds: float = 24 * 3600, coord_precision: int = 2,
+                 radius_bucket_meters: int = 1609):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.coord_precision = coord_precision
+        self.radius_bucket_meters = radius_bucket_meters
+        self.stats = PlacesCacheStats()
+        self._entries: OrderedDict[PlacesKey, tuple[dict, float]] = OrderedDict()
+        self._inflight: dict[PlacesKey, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def make_key(self, query: str, location_bias: dict, radius_meters: float, page: int = 1) -> PlacesKey:
+        """Build a cache key from the search parameters and result page"""
+        return (
+            " ".join(query.lower().split()),
+            round(location_bias["latitude"], self.coord_precision),
+            round(location_bias["longitude"], self.coord_precision),
+            math.ceil(radius_meters / self.radius_bucket_meters),
+            page
+        )
+
+    def _store(self, key: PlacesKey, value: dict) -> None:
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _fetch(self, key: PlacesKey, fetch: Callable[[], Awaitable[dict]]) -> asyncio.Task:
+        """Start (or join) the single upstream request for key"""
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+
+        async def run() -> dict:
+            try:
+                value = await fetch()
+                if value.get("status") == "success":
+                    self._store(key, value)
+                return value
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.ensure_future(run())
+        self._inflight[key] = task
+        return task
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is not None:
+            self.stats.refresh_failures += 1
+        elif task.result().get("status") != "success":
+            self.stats.refresh_failures += 1
+
+    def put(self, key: PlacesKey, value: dict) -> None:
+        """Store a freshly fetched value"""
+        self._store(key, value)
+
+    def peek(self, key: PlacesKey, max_age: Optional[float] = None) -> Optional[dict]:
+        """Return a cached value without triggering any fetch"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, fetched_at = entry
+        if max_age is not None and time.monotonic() - fetched_at > max_age:
+            return None
+        return value
+
+    def get(self, key: PlacesKey) -> Optional[dict]:
+        """
+        Serve key if it is fresh or still within its stale window, without fetching.
+
+        For entries that can only be fetched as part of a sequence (later
+        result pages); a miss is left to the caller.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl_seconds + self.stale_seconds:
+                self._entries.move_to_end(key)
+                if age < self.ttl_seconds:
+                    self.stats.hits += 1
+                else:
+                    self.stats.stale_hits += 1
+                return value
+        self.stats.misses += 1
+        return None
+
+    async def get_or_fetch(self, key: PlacesKey, fetch: Callable[[], Awaitable[dict]]) -> dict:
+        """Serve key from cache, refreshing or fetching upstream as needed"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return value
+            if age < self.ttl_seconds + self.stale_seconds:
+                self._entries.move_to_end(key)
+                self.stats.stale_hits += 1
+                if key not in self._inflight:
+                    self.stats.refreshes += 1
+                    self._fetch(key, fetch).add_done_callback(self._refresh_done)
+                return value
+            # Expired: fetch again, keeping the entry as the last good answer until that succeeds
+
+        if key in self._inflight:
+            self.stats.coalesced += 1
+        else:
+            self.stats.misses += 1
+
+        # Shield so one cancelled caller does not cancel the shared request
+        return await asyncio.shield(self._fetch(key, fetch))
+
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        self._entries.clear()
+
+    async def aclose(self) -> None:
+        """Cancel any in-flight refreshes"""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._inflight.clear()
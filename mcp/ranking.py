@@ -0,0 +1,107 @@
+"""
+Search Result Ranking
+
+Scores Places results against the user's search preferences. Distance from the
+search center, fit of priceLevel to the budget window and rating are computed
+as NumPy arrays over all candidates at once, then combined into one score used
+to filter, sort and trim the result list.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from facility_index import haversine_meters
+from place_records import PlaceRecord
+
+
+METERS_PER_MILE = 1609.34
+
+# Rough monthly cost implied by each Places priceLevel for senior housing
+PRICE_LEVEL_MONTHLY_ESTIMATE = {
+    "PRICE_LEVEL_FREE": 0.0,
+    "PRICE_LEVEL_INEXPENSIVE": 1500.0,
+    "PRICE_LEVEL_MODERATE": 3000.0,
+    "PRICE_LEVEL_EXPENSIVE": 5000.0,
+    "PRICE_LEVEL_VERY_EXPENSIVE": 7500.0
+}
+
+SCORE_WEIGHTS = {
+    "budget": 0.4,
+    "rating": 0.3,
+    "distance": 0.3
+}
+
+# Score used when a place has no priceLevel or rating
+NEUTRAL_SCORE = 0.5
+
+# Places estimated above budget_max by more than this factor are dropped
+OVER_BUDGET_TOLERANCE = 1.25
+
+
+def _budget_fit(estimates: np.ndarray, budget_min: float, budget_max: float) -> np.ndarray:
+    """1.0 inside the budget window, falling off linearly with distance outside it"""
+    width = max(budget_max - budget_min, 1.0)
+    below = np.clip(budget_min - estimates, 0, None)
+    above = np.clip(estimates - budget_max, 0, None)
+    fit = 1.0 - (below + 2 * above) / width
+    fit = np.clip(fit, 0.0, 1.0)
+    return np.where(np.isnan(estimates), NEUTRAL_SCORE, fit)
+
+
+def rank_places(places: list[PlaceRecord], center: dict, budget_min: float, budget_max: float,
+                radius_meters: float, max_results: Optional[int] = None) -> list[dict]:
+    """
+    Score, filter, sort and trim places for a search.
+
+    Each returned place is a response row (PlaceRecord.as_dict) carrying
+    distanceMiles, estimatedMonthlyCost and matchScore. Places with no
+    location sort last on distance.
+    """
+    if not places:
+        return []
+
+    count = len(places)
+    lats = np.full(count, np.nan)
+    lngs = np.full(count, np.nan)
+    ratings = np.full(count, np.nan)
+    estimates = np.full(count, np.nan)
+
+    for i, place in enumerate(places):
+        if place.latitude is not None and place.longitude is not None:
+            lats[i] = place.latitude
+            lngs[i] = place.longitude
+        if place.rating is not None:
+            ratings[i] = place.rating
+        estimate = PRICE_LEVEL_MONTHLY_ESTIMATE.get(place.price_level)
+        if estimate is not None:
+            estimates[i] = estimate
+
+    distances = haversine_meters(center["latitude"], center["longitude"], lats, lngs)
+    distance_score = np.clip(1.0 - distances / max(radius_meters, 1.0), 0.0, 1.0)
+    distance_score = np.where(np.isnan(distances), 0.0, distance_score)
+
+    rating_score = np.where(np.isnan(ratings), NEUTRAL_SCORE, ratings / 5.0)
+    budget_score = _budget_fit(estimates, budget_min, budget_max)
+
+    scores = (
+        SCORE_WEIGHTS["budget"] * budget_score
+        + SCORE_WEIGHTS["rating"] * rating_score
+        + SCORE_WEIGHTS["distance"] * distance_score
+    )
+
+    keep = np.isnan(estimates) | (estimates <= budget_max * OVER_BUDGET_TOLERANCE)
+    rows = np.flatnonzero(keep)
+    rows = rows[np.argsort(-scores[rows], kind="stable")]
+    if max_results is not None:
+        rows = rows[:max_results]
+
+    ranked = []
+    for row in rows:
+        ranked.append({
+            **places[row].as_dict(),
+            "distanceMiles": None if np.isnan(distances[row]) else round(float(distances[row]) / METERS_PER_MILE, 2),
+            "estimatedMonthlyCost": None if np.isnan(estimates[row]) else float(estimates[row]),
+            "matchScore": round(float(scores[row]), 4)
+        })
+    return ranked
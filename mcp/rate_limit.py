@@ -0,0 +1,249 @@
+"""
+Upstream Rate Limiting
+
+Flow control for outbound Google API calls: a token bucket holding request
+rate at the quota ceiling, an AIMD concurrency limit that backs off when the
+upstream signals overload, retries with jittered exponential backoff for
+429/5xx responses, and per-endpoint circuit breakers that fail fast while an
+endpoint is degraded.
+"""
+
+import time
+import random
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+
+# send() returns (HTTP status, payload, Retry-After seconds or None)
+UpstreamSend = Callable[[], Awaitable[tuple[int, Any, Optional[float]]]]
+
+# Never let a Retry-After header park a tool call longer than this
+MAX_RETRY_AFTER_SECONDS = 10.0
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit open for {name}; retry in {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """Allows rate requests per second on average, with bursts up to burst"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Module-level buckets outlive any one event loop (tests, benchmarks)
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it"""
+        async with self._get_lock():
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency cap.
+
+    Each success raises the limit by 1/limit (about +1 per round of requests);
+    an overload signal halves it, at most once per cooldown so a burst of
+    failures from one round only counts once.
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 64,
+                 decrease_ratio: float = 0.5, cooldown_seconds: float = 1.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_ratio = decrease_ratio
+        self.cooldown_seconds = cooldown_seconds
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self.in_flight = 0
+        return self._condition
+
+    async def __aenter__(self) -> None:
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc_info) -> None:
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def on_success(self) -> None:
+        self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+
+    def on_overload(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease >= self.cooldown_seconds:
+            self.limit = max(float(self.minimum), self.limit * self.decrease_ratio)
+            self._last_decrease = now
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures.
+
+    While open, calls are rejected for reset_seconds; then one trial call is
+    let through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and self.retry_in() == 0.0:
+            self.state = "half_open"
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+def backoff_delay(attempt: int, base: float = 0.2, cap: float = 5.0) -> float:
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def is_retryable(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+class UpstreamGuard:
+    """Shared rate limit, concurrency cap, retries and circuit breakers for one upstream"""
+
+    def __init__(self, rate_per_second: float = 50.0, burst: int = 50,
+                 initial_concurrency: int = 8, max_concurrency: int = 64,
+                 max_retries: int = 3, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.limiter = AdaptiveConcurrencyLimiter(initial_concurrency, maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.retries = 0
+        self.rejected = 0
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+        return self.breakers[name]
+
+    async def request(self, name: str, send: UpstreamSend) -> tuple[int, Any]:
+        """
+        Send a request to endpoint name under flow control.
+
+        Retries 429/5xx responses and connection errors with backoff. Returns
+        the final (status, payload); re-raises the last connection error if
+        every attempt failed that way. Raises CircuitOpenError without sending
+        while the endpoint's breaker is open.
+        """
+        breaker = self.breaker(name)
+        if not breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(name, breaker.retry_in())
+
+        trial = breaker.state == "half_open"
+        try:
+            return await self._send(breaker, send)
+        except BaseException:
+            # The half-open trial must always report back, even when cancelled by
+            # a deadline; otherwise the breaker stays half-open and rejects every call
+            if trial and breaker.state == "half_open":
+                breaker.record_failure()
+            raise
+
+    async def _send(self, breaker: CircuitBreaker, send: UpstreamSend) -> tuple[int, Any]:
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            retry_after = None
+            try:
+                async with self.limiter:
+                    status, payload, retry_after = await send()
+            except Exception:
+                self.limiter.on_overload()
+                if attempt == self.max_retries:
+                    breaker.record_failure()
+                    raise
+            else:
+                if not is_retryable(status):
+                    self.limiter.on_success()
+                    breaker.record_success()
+                    return status, payload
+                self.limiter.on_overload()
+                if attempt == self.max_retries:
+                    breaker.record_failure()
+                    return status, payload
+
+            self.retries += 1
+            if retry_after is not None:
+                await asyncio.sleep(min(retry_after, MAX_RETRY_AFTER_SECONDS))
+            else:
+                await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "retries": self.retries,
+            "rejected_by_breaker": self.rejected,
+            "breakers": {
+                name: {"state": breaker.state, "times_opened": breaker.times_opened}
+                for name, breaker in self.breakers.items()
+            }
+        }
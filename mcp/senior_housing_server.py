@@ -6,22 +6,144 @@ It uses Google Maps Places API and provides interactive preference elicitation.
 """
 
 import os
+import time
 import asyncio
-import aiohttp
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
 from fastmcp import FastMCP
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+from http_client import close_http_session, fetch_json, google_guard, pool_stats
+from rate_limit import CircuitOpenError
+from geocode_cache import GeocodeCache
+from places_cache import PlacesResultCache
+from facility_index import FacilityIndex
+from ranking import rank_places
+from place_records import PlaceRecord, place_columns
+from serialization import json_result
+from budget_engine import analyze_budgets, budget_analysis_record, budget_columns
+from cost_projection import CARE_LEVELS, ProjectionAssumptions, project_costs
+from facility_matching import AMENITY_RADIUS_MILES, FacilityMatcher, MatcherCache
+from amenity_service import AmenityService, TileBounds
+from deadlines import Deadline, StageTimeout
+from metrics import METRICS_HOST, METRICS_PORT, install_dump_signal, metrics, start_metrics_server
+
+
+@asynccontextmanager
+async def server_lifespan(server):
+    """Own server-lifetime resources; pooled connections are closed on exit"""
+    refresh_task = None
+    if FACILITY_INDEX_ENABLED:
+        refresh_task = asyncio.create_task(refresh_facility_index())
+    metrics_runner = None
+    if metrics.enabled:
+        install_dump_signal(asyncio.get_running_loop())
+        if METRICS_PORT:
+            metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+    try:
+        yield
+    finally:
+        if refresh_task is not None:
+            refresh_task.cancel()
+            await asyncio.gather(refresh_task, return_exceptions=True)
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await places_cache.aclose()
+        await amenity_service.aclose()
+        await close_http_session()
+        geocode_cache.close()
+
 
 # Initialize MCP server
-mcp = FastMCP("Senior Housing Search")
+mcp = FastMCP("Senior Housing Search", lifespan=server_lifespan)
 
 # API Configuration
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY_SERVER")
-GOOGLE_PLACES_API_URL = "https://places.googleapis.com/v1/places:searchText"
+# Endpoint overrides point the server at a stand-in (see benchmarks/fake_google.py)
+GOOGLE_PLACES_API_URL = os.getenv("GOOGLE_PLACES_API_URL", "https://places.googleapis.com/v1/places:searchText")
+GOOGLE_GEOCODE_API_URL = os.getenv("GOOGLE_GEOCODE_API_URL", "https://maps.googleapis.com/maps/api/geocode/json")
+
+# Search Configuration
+# "combined" sends one query for all housing types; "per_type" fans out one query per type
+PLACES_QUERY_MODE = os.getenv("PLACES_QUERY_MODE", "combined")
+PLACES_FANOUT_CONCURRENCY = int(os.getenv("PLACES_FANOUT_CONCURRENCY", "4"))
+PLACES_MAX_PAGES = int(os.getenv("PLACES_MAX_PAGES", "3"))
+# Page tokens expire soon after they are issued; a token from an older (cached) page is never sent
+PLACES_PAGE_TOKEN_MAX_AGE_SECONDS = float(os.getenv("PLACES_PAGE_TOKEN_MAX_AGE_SECONDS", "60"))
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "20"))
+SEARCH_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", "20"))
+GEOCODE_DEADLINE_SHARE = float(os.getenv("GEOCODE_DEADLINE_SHARE", "0.3"))
+BATCH_SEARCH_CONCURRENCY = int(os.getenv("BATCH_SEARCH_CONCURRENCY", "4"))
+BATCH_TOP_RESULTS = int(os.getenv("BATCH_TOP_RESULTS", "5"))
+# Responses with at least this many places return results as columns; 0 always returns rows
+RESULT_COLUMNS_MIN_PLACES = int(os.getenv("RESULT_COLUMNS_MIN_PLACES", "0"))
+AMENITY_TILE_PAGES = int(os.getenv("AMENITY_TILE_PAGES", "1"))
+# Matchers kept per client session for rerank_senior_housing
+MATCHER_CACHE_SESSIONS = int(os.getenv("MATCHER_CACHE_SESSIONS", "256"))
+MATCHER_CACHE_TTL_SECONDS = float(os.getenv("MATCHER_CACHE_TTL_SECONDS", "1800"))
+PROJECTION_SCENARIOS = int(os.getenv("PROJECTION_SCENARIOS", "5000"))
+FACILITY_INDEX_ENABLED = os.getenv("FACILITY_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+FACILITY_INDEX_REFRESH_SECONDS = float(os.getenv("FACILITY_INDEX_REFRESH_SECONDS", "3600"))
+# Only areas searched within this window are refreshed in the background
+FACILITY_INDEX_ACTIVE_SECONDS = float(os.getenv("FACILITY_INDEX_ACTIVE_SECONDS", str(24 * 3600)))
+
+# Places text queries used to find amenities around candidate facilities
+AMENITY_QUERIES = {
+    "hospital": "hospital",
+    "pharmacy": "pharmacy",
+    "transit": "bus stop or train station",
+    "shopping": "grocery store"
+}
+
+HOUSING_TYPE_QUERIES = {
+    "assisted_living": "assisted living",
+    "independent_living": "independent living",
+    "memory_care": "memory care",
+    "senior_apartments": "senior apartments"
+}
+
+# Cache Configuration
+geocode_cache = GeocodeCache(
+    max_entries=int(os.getenv("GEOCODE_CACHE_SIZE", "1000")),
+    ttl_seconds=float(os.getenv("GEOCODE_CACHE_TTL_SECONDS", str(30 * 24 * 3600))),
+    db_path=os.getenv("GEOCODE_CACHE_PATH") or None
+)
+places_cache = PlacesResultCache(
+    max_entries=int(os.getenv("PLACES_CACHE_SIZE", "500")),
+    ttl_seconds=float(os.getenv("PLACES_CACHE_TTL_SECONDS", str(6 * 3600))),
+    stale_seconds=float(os.getenv("PLACES_CACHE_STALE_SECONDS", str(24 * 3600)))
+)
+facility_index = FacilityIndex(
+    max_age_seconds=float(os.getenv("FACILITY_INDEX_MAX_AGE_SECONDS", str(24 * 3600)))
+)
+
+
+def _collect_upstream_metrics():
+    upstream = google_guard.as_dict()
+    yield "upstream_concurrency_limit", {}, upstream["concurrency_limit"]
+    yield "upstream_in_flight", {}, upstream["in_flight"]
+    yield "upstream_retries", {}, upstream["retries"]
+    yield "upstream_rejected_by_breaker", {}, upstream["rejected_by_breaker"]
+    for api, breaker in upstream["breakers"].items():
+        yield "upstream_breaker_open", {"api": api}, int(breaker["state"] != "closed")
+
+
+# Sampled at scrape time, so the hot path only pays for the counters it already keeps
+metrics.register_stats("http_pool", pool_stats.as_dict)
+metrics.register_stats("geocode_cache", lambda: {**geocode_cache.stats.as_dict(), "size": len(geocode_cache)})
+metrics.register_stats("places_cache", lambda: {**places_cache.stats.as_dict(), "size": len(places_cache)})
+metrics.register_stats("facility_index", lambda: {**facility_index.stats.as_dict(), "size": len(facility_index)})
+metrics.register_stats("amenity_tiles", lambda: {**amenity_service.stats.as_dict(), "size": len(amenity_service)})
+metrics.register_collector(_collect_upstream_metrics)
 
 
 # Preference Models
-class HousingSearchPreferences(BaseModel):
+class PreferenceModel(BaseModel):
+    """Base for elicited preferences; schemas and validators are built on first use, not at import"""
+    model_config = ConfigDict(defer_build=True)
+
+
+class HousingSearchPreferences(PreferenceModel):
     """Preferences for searching senior housing"""
     location: str = Field(description="City and state (e.g., 'Cleveland, OH')")
     budget_min: int = Field(description="Minimum monthly budget", ge=0, default=500)
@@ -33,7 +155,23 @@ class HousingSearchPreferences(BaseModel):
     radius_miles: int = Field(description="Search radius in miles", default=10, ge=1, le=50)
 
 
-class AccessibilityPreferences(BaseModel):
+class BatchHousingSearchPreferences(PreferenceModel):
+    """Shared preferences for searching several candidate locations at once"""
+    locations: list[str] = Field(
+        description="Cities and states to compare (e.g., ['Cleveland, OH', 'Akron, OH'])",
+        min_length=1,
+        max_length=10
+    )
+    budget_min: int = Field(description="Minimum monthly budget", ge=0, default=500)
+    budget_max: int = Field(description="Maximum monthly budget", ge=0, default=5000)
+    housing_type: list[str] = Field(
+        description="Types of housing (assisted_living, independent_living, memory_care, senior_apartments)",
+        default=["assisted_living", "independent_living"]
+    )
+    radius_miles: int = Field(description="Search radius in miles", default=10, ge=1, le=50)
+
+
+class AccessibilityPreferences(PreferenceModel):
     """Accessibility and health-related preferences"""
     wheelchair_accessible: bool = Field(description="Requires wheelchair accessibility", default=False)
     elevator_required: bool = Field(description="Requires elevator access", default=False)
@@ -45,7 +183,7 @@ class AccessibilityPreferences(BaseModel):
     )
 
 
-class BudgetAnalysisPreferences(BaseModel):
+class BudgetAnalysisPreferences(PreferenceModel):
     """Preferences for budget planning"""
     monthly_income: float = Field(description="Total monthly income", ge=0)
     current_expenses: float = Field(description="Current monthly expenses", ge=0, default=0)
@@ -55,7 +193,31 @@ class BudgetAnalysisPreferences(BaseModel):
     include_meals: bool = Field(description="Include meals in budget", default=True)
 
 
-class LocationPreferences(BaseModel):
+class CostProjectionPreferences(PreferenceModel):
+    """Household finances and assumptions for a multi-year cost projection"""
+    monthly_income: float = Field(description="Total monthly income", ge=0)
+    savings: float = Field(description="Available savings", ge=0, default=0)
+    monthly_housing_cost: float = Field(description="Current monthly housing fee", ge=0)
+    healthcare_costs: float = Field(description="Monthly healthcare costs", ge=0, default=0)
+    other_expenses: float = Field(description="Other monthly expenses", ge=0, default=0)
+    years: int = Field(description="Years to project", ge=1, le=30, default=10)
+    care_level: str = Field(
+        description="Current care level (independent_living, assisted_living, memory_care)",
+        default="independent_living"
+    )
+    rent_escalation: float = Field(
+        description="Expected annual housing fee increase (0.04 = 4%)", ge=0, le=0.25, default=0.04
+    )
+    healthcare_inflation: float = Field(
+        description="Expected annual healthcare cost increase", ge=0, le=0.25, default=0.05
+    )
+    income_growth: float = Field(description="Annual cost-of-living increase in income", ge=0, le=0.1, default=0.02)
+    care_transition_probability: float = Field(
+        description="Chance per year of moving to the next care level", ge=0, le=1, default=0.1
+    )
+
+
+class LocationPreferences(PreferenceModel):
     """Location and proximity preferences"""
     proximity_to_family: str = Field(
         description="Distance to family members (same_city, within_30min, within_1hour, flexible)",
@@ -68,8 +230,94 @@ class LocationPreferences(BaseModel):
 
 
 # API Helper Functions
-async def make_google_maps_request(query: str, location_bias: dict, radius_meters: int) -> dict:
-    """Make request to Google Maps Places API"""
+async def make_google_maps_request(query: str, location_bias: dict, radius_meters: int,
+                                   use_cache: bool = True) -> dict:
+    """Make request to Google Maps Places API, served from cache when possible"""
+
+    if not GOOGLE_MAPS_API_KEY:
+        return {
+            "status": "API_KEY_MISSING",
+            "error": "Google Maps API key not configured",
+            "results": []
+        }
+
+    key = places_cache.make_key(query, location_bias, radius_meters)
+    if not use_cache:
+        results = await _fetch_places(query, location_bias, radius_meters)
+        if results["status"] == "success":
+            places_cache.put(key, results)
+    else:
+        results = await places_cache.get_or_fetch(
+            key, lambda: _fetch_places(query, location_bias, radius_meters)
+        )
+
+    if results["status"] != "success":
+        # Upstream degraded: serve the last good answer however old it is
+        stale = places_cache.peek(key)
+        if stale is not None:
+            return {**stale, "next_page_token": None, "stale": True, "upstream_status": results["status"]}
+
+    return results
+
+
+async def iter_places_pages(query: str, location_bias: dict, radius_meters: int,
+                            max_pages: int = PLACES_MAX_PAGES,
+                            use_cache: bool = True) -> AsyncIterator[dict]:
+    """
+    Yield Places search results page by page, following nextPageToken.
+
+    Every page is cached under its page number, so a warm search makes no
+    upstream calls. Page tokens are short-lived: a token is only followed
+    when the page carrying it was just fetched. When a later page is not
+    cached and the earlier one came from the cache, the pages before it are
+    fetched again for a fresh token. Iteration stops after max_pages, on the
+    last page, or on the first failed page.
+    """
+
+    page = await make_google_maps_request(query, location_bias, radius_meters, use_cache=use_cache)
+    page_number = 1
+
+    while True:
+        yield {**page, "page": page_number}
+
+        if page["status"] != "success" or not page.get("next_page_token") or page_number >= max_pages:
+            return
+
+        page_number += 1
+        key = places_cache.make_key(query, location_bias, radius_meters, page=page_number)
+        cached = places_cache.get(key) if use_cache else None
+        if cached is not None:
+            page = cached
+            continue
+
+        page_token = page["next_page_token"]
+        if time.time() - page.get("fetched_at", 0) > PLACES_PAGE_TOKEN_MAX_AGE_SECONDS:
+            page_token = await _fresh_page_token(query, location_bias, radius_meters, page_number)
+        if page_token is None:
+            return
+        page = await _fetch_places(query, location_bias, radius_meters, page_token=page_token)
+        if page["status"] == "success":
+            places_cache.put(key, page)
+
+
+async def _fresh_page_token(query: str, location_bias: dict, radius_meters: int,
+                            page_number: int) -> Optional[str]:
+    """Re-fetch (and re-cache) the pages before page_number for a usable token to it"""
+    page_token = None
+    for number in range(1, page_number):
+        page = await _fetch_places(query, location_bias, radius_meters, page_token=page_token)
+        if page["status"] != "success":
+            return None
+        places_cache.put(places_cache.make_key(query, location_bias, radius_meters, page=number), page)
+        page_token = page.get("next_page_token")
+        if not page_token:
+            return None
+    return page_token
+
+
+async def _fetch_places(query: str, location_bias: dict, radius_meters: int,
+                        page_token: Optional[str] = None) -> dict:
+    """Send a searchText request to the Places API"""
 
     if not GOOGLE_MAPS_API_KEY:
         return {
@@ -81,7 +329,7 @@ async def make_google_maps_request(query: str, location_bias: dict, radius_meter
     headers = {
         'Content-Type': 'application/json',
         'X-Goog-Api-Key': GOOGLE_MAPS_API_KEY,
-        'X-Goog-FieldMask': 'places.id,places.displayName,places.formattedAddress,places.location,places.rating,places.priceLevel,places.types'
+        'X-Goog-FieldMask': 'places.id,places.displayName,places.formattedAddress,places.location,places.rating,places.priceLevel,places.types,places.accessibilityOptions,nextPageToken'
     }
 
     body = {
@@ -93,24 +341,36 @@ async def make_google_maps_request(query: str, location_bias: dict, radius_meter
             }
         }
     }
+    if page_token:
+        body["pageToken"] = page_token
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(GOOGLE_PLACES_API_URL, headers=headers, json=body) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return {
-                        "status": "success",
-                        "results": data.get("places", [])
-                    }
-                else:
-                    error_text = await response.text()
-                    return {
-                        "status": "API_ERROR",
-                        "error": f"HTTP {response.status}: {error_text}",
-                        "results": []
-                    }
+        with metrics.timer("stage_duration_seconds", stage="places_request"):
+            status, data = await fetch_json("places", "POST", GOOGLE_PLACES_API_URL, headers=headers, json=body)
+        if status == 200:
+            return {
+                "status": "success",
+                "results": [PlaceRecord.from_google(place) for place in data.get("places", [])],
+                "next_page_token": data.get("nextPageToken"),
+                # Wall-clock fetch time; cached copies keep it, so consumers can tell their age
+                "fetched_at": time.time()
+            }
+        else:
+            metrics.increment("upstream_errors_total", api="places", status=str(status))
+            return {
+                "status": "API_ERROR",
+                "error": f"HTTP {status}: {data}",
+                "results": []
+            }
+    except CircuitOpenError as e:
+        metrics.increment("upstream_errors_total", api="places", status="circuit_open")
+        return {
+            "status": "CIRCUIT_OPEN",
+            "error": str(e),
+            "results": []
+        }
     except Exception as e:
+        metrics.increment("upstream_errors_total", api="places", status="request_failed")
         return {
             "status": "REQUEST_FAILED",
             "error": str(e),
@@ -121,30 +381,410 @@ async def make_google_maps_request(query: str, location_bias: dict, radius_meter
 async def geocode_location(location: str) -> Optional[dict]:
     """Geocode a location string to lat/lng"""
 
+    cached = geocode_cache.get(location)
+    if cached:
+        return cached
+
     if not GOOGLE_MAPS_API_KEY:
         return None
 
-    geocode_url = f"https://maps.googleapis.com/maps/api/geocode/json?address={location}&key={GOOGLE_MAPS_API_KEY}"
+    params = {"address": location, "key": GOOGLE_MAPS_API_KEY}
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(geocode_url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get("results"):
-                        location_data = data["results"][0]["geometry"]["location"]
-                        return {
-                            "latitude": location_data["lat"],
-                            "longitude": location_data["lng"]
-                        }
+        with metrics.timer("stage_duration_seconds", stage="geocode_request"):
+            status, data = await fetch_json("geocode", "GET", GOOGLE_GEOCODE_API_URL, params=params)
+        if status != 200:
+            metrics.increment("upstream_errors_total", api="geocode", status=str(status))
+        if status == 200 and data.get("results"):
+            location_data = data["results"][0]["geometry"]["location"]
+            coords = {
+                "latitude": location_data["lat"],
+                "longitude": location_data["lng"]
+            }
+            geocode_cache.set(location, coords)
+            return coords
     except Exception as e:
+        status = "circuit_open" if isinstance(e, CircuitOpenError) else "request_failed"
+        metrics.increment("upstream_errors_total", api="geocode", status=status)
         print(f"Geocoding error: {e}")
 
     return None
 
 
+async def search_places_by_housing_type(housing_types: list[str], location: str,
+                                        location_bias: dict, radius_meters: int,
+                                        use_cache: bool = True) -> dict:
+    """
+    Run one Places query per housing type concurrently and merge the results.
+
+    Places are deduplicated by id and tagged with every housing type whose
+    query returned them. Latency is bounded by the slowest sub-query.
+    """
+
+    semaphore = asyncio.Semaphore(PLACES_FANOUT_CONCURRENCY)
+
+    async def search_type(housing_type: str) -> tuple[str, str, dict]:
+        query = f"{HOUSING_TYPE_QUERIES.get(housing_type, housing_type)} in {location}"
+        async with semaphore:
+            results = await make_google_maps_request(
+                query=query,
+                location_bias=location_bias,
+                radius_meters=radius_meters,
+                use_cache=use_cache
+            )
+        return housing_type, query, results
+
+    responses = await asyncio.gather(*(search_type(ht) for ht in dict.fromkeys(housing_types)))
+
+    merged: dict[str, PlaceRecord] = {}
+    matched: dict[str, list[str]] = {}
+    errors = []
+    stale = False
+    fetched_at = None
+    for housing_type, query, results in responses:
+        stale = stale or results.get("stale", False)
+        if results["status"] != "success":
+            errors.append({"housing_type": housing_type, "status": results["status"], "error": results.get("error")})
+            continue
+        if results.get("fetched_at") is not None:
+            fetched_at = min(fetched_at or results["fetched_at"], results["fetched_at"])
+        for place in results.get("results", []):
+            place_id = place.id or place.address
+            if place_id not in merged:
+                merged[place_id] = place
+                matched[place_id] = []
+            matched[place_id].append(housing_type)
+
+    # Places matching more of the requested types first; stable otherwise.
+    # Tagging copies the record so cached responses are never mutated.
+    places = sorted(
+        (place.with_matched_types(matched[place_id]) for place_id, place in merged.items()),
+        key=lambda place: -len(place.matched_types)
+    )
+
+    if errors and len(errors) == len(responses):
+        status = errors[0]["status"]
+    else:
+        status = "success"
+
+    return {
+        "status": status,
+        "queries": [query for _, query, _ in responses],
+        "results": places,
+        "errors": errors,
+        "stale": stale,
+        "fetched_at": fetched_at
+    }
+
+
+def build_search_query(housing_types: list[str], location: str) -> str:
+    """Build the combined text query for a set of housing types"""
+    housing_queries = [HOUSING_TYPE_QUERIES.get(ht, ht) for ht in housing_types]
+    return f"{' or '.join(housing_queries)} in {location}"
+
+
+async def search_places(location: str, housing_types: list[str], coords: dict, radius_meters: int,
+                        on_page: Optional[Callable[[dict], Awaitable[None]]] = None,
+                        use_cache: bool = True) -> dict:
+    """
+    Search Places for housing near coords using the configured query mode.
+
+    Successful results are added to the facility index. on_page is awaited
+    after each page of a combined search arrives.
+    """
+
+    per_type = PLACES_QUERY_MODE == "per_type" and len(housing_types) > 1
+    if per_type:
+        results = await search_places_by_housing_type(
+            housing_types=housing_types,
+            location=location,
+            location_bias=coords,
+            radius_meters=radius_meters,
+            use_cache=use_cache
+        )
+    else:
+        query = build_search_query(housing_types, location)
+        results = {"status": "success", "queries": [query], "results": [], "pages": 0}
+        async for page in iter_places_pages(
+            query=query,
+            location_bias=coords,
+            radius_meters=radius_meters,
+            use_cache=use_cache
+        ):
+            if page["status"] != "success":
+                # Keep whatever earlier pages returned
+                if not results["results"]:
+                    results.update(status=page["status"], error=page.get("error"))
+                break
+            results["results"].extend(page["results"])
+            results["pages"] = page["page"]
+            results["stale"] = results.get("stale", False) or page.get("stale", False)
+            if page.get("fetched_at") is not None:
+                results["fetched_at"] = min(results.get("fetched_at") or page["fetched_at"], page["fetched_at"])
+            if on_page is not None:
+                await on_page(page)
+
+    # Stale fallbacks are not fresh coverage
+    if FACILITY_INDEX_ENABLED and results["status"] == "success" and not results.get("stale"):
+        facility_index.ingest(results["results"], location, coords, radius_meters, housing_types, per_type,
+                              fetched_at=results.get("fetched_at"))
+
+    return results
+
+
+async def refresh_facility_index() -> None:
+    """
+    Background job: periodically re-run searches whose index coverage went stale.
+
+    Only areas searched within FACILITY_INDEX_ACTIVE_SECONDS are refreshed;
+    coverage nobody asks for again is left to expire.
+    """
+    while True:
+        await asyncio.sleep(FACILITY_INDEX_REFRESH_SECONDS)
+        # Refresh a little before coverage expires so hot areas never miss
+        for coverage in facility_index.stale_coverage(facility_index.max_age_seconds * 0.8,
+                                                      queried_within_seconds=FACILITY_INDEX_ACTIVE_SECONDS):
+            await search_places(
+                location=coverage.location,
+                housing_types=sorted(coverage.housing_types),
+                coords={"latitude": coverage.latitude, "longitude": coverage.longitude},
+                radius_meters=int(coverage.radius_meters),
+                use_cache=False
+            )
+
+
+async def run_housing_search(prefs: HousingSearchPreferences,
+                             on_page: Optional[Callable[[dict], Awaitable[None]]] = None,
+                             deadline: Optional[Deadline] = None) -> dict:
+    """
+    Geocode, search and rank housing for one set of search preferences.
+
+    Geocoding may use at most GEOCODE_DEADLINE_SHARE of the deadline and the
+    Places search gets whatever is left. A stage that runs out is cancelled
+    and reported as a timeout status naming the stage.
+    """
+
+    if deadline is None:
+        deadline = Deadline(SEARCH_DEADLINE_SECONDS)
+
+    try:
+        return await _run_housing_search(prefs, on_page, deadline)
+    except StageTimeout as e:
+        return {
+            "status": "timeout",
+            "message": f"Search for {prefs.location} timed out during {e.stage}",
+            "timeout": e.as_dict(),
+            "location": prefs.location,
+            "preferences": prefs.model_dump(),
+            "results": []
+        }
+
+
+async def _run_housing_search(prefs: HousingSearchPreferences,
+                              on_page: Optional[Callable[[dict], Awaitable[None]]],
+                              deadline: Deadline) -> dict:
+    # Geocode the location
+    with metrics.timer("stage_duration_seconds", stage="geocode"):
+        coords = await deadline.run("geocode", geocode_location(prefs.location), share=GEOCODE_DEADLINE_SHARE)
+
+    if not coords:
+        return {
+            "status": "error",
+            "message": f"Could not find location: {prefs.location}",
+            "preferences": prefs.model_dump(),
+            "results": []
+        }
+
+    # Build search query
+    query = build_search_query(prefs.housing_type, prefs.location)
+
+    # Search using Google Maps
+    radius_meters = prefs.radius_miles * 1609.34  # Convert miles to meters
+
+    # Answer from the local index when this area was searched recently
+    indexed = None
+    if FACILITY_INDEX_ENABLED:
+        indexed = facility_index.query(coords, radius_meters, prefs.housing_type)
+
+    if indexed is not None:
+        results = {"status": "success", "source": "index", "results": indexed, "pages": 0}
+    else:
+        with metrics.timer("stage_duration_seconds", stage="places_search"):
+            results = await deadline.run("places_search", search_places(
+                location=prefs.location,
+                housing_types=prefs.housing_type,
+                coords=coords,
+                radius_meters=int(radius_meters),
+                on_page=on_page
+            ))
+
+    # Rank by budget fit, rating and distance, then trim
+    with metrics.timer("stage_duration_seconds", stage="post_processing"):
+        places = rank_places(
+            results.get("results", []),
+            center=coords,
+            budget_min=prefs.budget_min,
+            budget_max=prefs.budget_max,
+            radius_meters=radius_meters,
+            max_results=SEARCH_MAX_RESULTS
+        )
+
+    return {
+        "status": results["status"],
+        "source": results.get("source", "google"),
+        "query": query,
+        "queries": results.get("queries", [query]),
+        "location": prefs.location,
+        "coordinates": coords,
+        "preferences": prefs.model_dump(),
+        "results": places,
+        "count": len(places),
+        "total_found": len(results.get("results", [])),
+        "pages": results.get("pages", 1),
+        "stale": results.get("stale", False)
+    }
+
+
+async def fetch_amenity_tile(amenity: str, bounds: TileBounds) -> tuple[list[dict], bool]:
+    """
+    Fetch one amenity type inside one tile for the amenity service.
+
+    Uses a rectangle location restriction so each tile only returns places
+    inside it. Raises on failure so the service never caches a failed tile;
+    a tile with pages left after AMENITY_TILE_PAGES is returned as incomplete.
+    """
+
+    if not GOOGLE_MAPS_API_KEY:
+        raise RuntimeError("Google Maps API key not configured")
+
+    south, west, north, east = bounds
+    headers = {
+        'Content-Type': 'application/json',
+        'X-Goog-Api-Key': GOOGLE_MAPS_API_KEY,
+        'X-Goog-FieldMask': 'places.id,places.displayName,places.location,nextPageToken'
+    }
+    body = {
+        "textQuery": AMENITY_QUERIES[amenity],
+        "locationRestriction": {
+            "rectangle": {
+                "low": {"latitude": south, "longitude": west},
+                "high": {"latitude": north, "longitude": east}
+            }
+        }
+    }
+
+    places = []
+    for _ in range(AMENITY_TILE_PAGES):
+        with metrics.timer("stage_duration_seconds", stage="amenity_request"):
+            status, data = await fetch_json("places", "POST", GOOGLE_PLACES_API_URL, headers=headers, json=body)
+        if status != 200:
+            metrics.increment("upstream_errors_total", api="places", status=str(status))
+            raise RuntimeError(f"HTTP {status}: {data}")
+        places.extend(data.get("places", []))
+        if not data.get("nextPageToken"):
+            return places, True
+        body["pageToken"] = data["nextPageToken"]
+    return places, False
+
+
+amenity_service = AmenityService(
+    fetch_amenity_tile,
+    tile_degrees=float(os.getenv("AMENITY_TILE_DEGREES", "0.2")),
+    ttl_seconds=float(os.getenv("AMENITY_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    max_tiles=int(os.getenv("AMENITY_CACHE_TILES", "5000"))
+)
+
+matchers = MatcherCache(max_entries=MATCHER_CACHE_SESSIONS, ttl_seconds=MATCHER_CACHE_TTL_SECONDS)
+
+
+def client_session_id(ctx) -> Optional[str]:
+    """The MCP client session a tool call belongs to, None when there is none"""
+    try:
+        return ctx.session_id
+    except (AttributeError, RuntimeError):
+        return None
+
+
+def ranked_matches(matcher: FacilityMatcher, searched: dict,
+                   accessibility: "AccessibilityPreferences", location: "LocationPreferences") -> dict:
+    """Rank a matcher's candidates and shape the match_senior_housing response"""
+    with metrics.timer("stage_duration_seconds", stage="matching"):
+        matches = matcher.rank(accessibility, location)
+
+    return columnar_results({
+        "status": "success",
+        "location": searched["location"],
+        "coordinates": searched["coordinates"],
+        "stale": searched["stale"],
+        **matches,
+        "preferences": {
+            "search": searched["search"],
+            "accessibility": accessibility.model_dump(),
+            "location": location.model_dump()
+        }
+    })
+
+
+def required_amenities(location_prefs: "LocationPreferences") -> list[str]:
+    """Amenity types a set of location preferences asks about"""
+    wanted = {
+        "hospital": location_prefs.near_hospital,
+        "pharmacy": location_prefs.near_pharmacy,
+        "transit": location_prefs.public_transport,
+        "shopping": location_prefs.near_shopping
+    }
+    return [amenity for amenity, needed in wanted.items() if needed]
+
+
+def summarize_location_search(result: dict, top_n: int) -> dict:
+    """Condense one location's search response for side-by-side comparison"""
+    places = result.get("results", [])
+    ratings = [place["rating"] for place in places if place.get("rating") is not None]
+    costs = [place["estimatedMonthlyCost"] for place in places if place.get("estimatedMonthlyCost") is not None]
+    scores = [place["matchScore"] for place in places if "matchScore" in place]
+
+    return {
+        "location": result.get("location"),
+        "status": result["status"],
+        "message": result.get("message"),
+        "timeout": result.get("timeout"),
+        "coordinates": result.get("coordinates"),
+        "source": result.get("source"),
+        "count": len(places),
+        "total_found": result.get("total_found", 0),
+        "average_rating": round(sum(ratings) / len(ratings), 2) if ratings else None,
+        "typical_monthly_cost": sorted(costs)[len(costs) // 2] if costs else None,
+        "best_match_score": max(scores) if scores else None,
+        "top_results": places[:top_n]
+    }
+
+
+def columnar_results(response: dict) -> dict:
+    """Return a response's results as columns (place_columns) once there are enough of them"""
+    places = response.get("results")
+    if RESULT_COLUMNS_MIN_PLACES and isinstance(places, list) and len(places) >= RESULT_COLUMNS_MIN_PLACES:
+        return {**response, "results": place_columns(places), "results_format": "columns"}
+    return response
+
+
+# MCP Resources
+@mcp.resource("stats://server")
+def server_stats() -> dict:
+    """Runtime counters for the server's shared infrastructure"""
+    return {
+        "http_pool": pool_stats.as_dict(),
+        "upstream": google_guard.as_dict(),
+        "geocode_cache": {**geocode_cache.stats.as_dict(), "size": len(geocode_cache)},
+        "places_cache": {**places_cache.stats.as_dict(), "size": len(places_cache)},
+        "facility_index": {**facility_index.stats.as_dict(), "size": len(facility_index)},
+        "amenity_tiles": {**amenity_service.stats.as_dict(), "size": len(amenity_service)}
+    }
+
+
 # MCP Tools
 @mcp.tool()
+@json_result
+@metrics.instrument_tool
 async def search_senior_housing(ctx) -> dict:
     """
     Search for senior housing options based on user preferences.
@@ -152,51 +792,83 @@ async def search_senior_housing(ctx) -> dict:
     """
 
     # Elicit preferences from user
-    response = await ctx.elicit(HousingSearchPreferences)
+    with metrics.timer("stage_duration_seconds", stage="elicitation", tool="search_senior_housing"):
+        response = await ctx.elicit(HousingSearchPreferences)
 
     match response:
         case ctx.AcceptedElicitation():
             prefs = response.value
 
-            # Geocode the location
-            coords = await geocode_location(prefs.location)
+            async def report_page(page: dict) -> None:
+                # Let the client know results are arriving before the last page
+                await ctx.report_progress(progress=page["page"], total=PLACES_MAX_PAGES)
 
-            if not coords:
-                return {
-                    "status": "error",
-                    "message": f"Could not find location: {prefs.location}",
-                    "preferences": prefs.model_dump(),
-                    "results": []
-                }
+            return columnar_results(await run_housing_search(prefs, on_page=report_page))
 
-            # Build search query
-            housing_types_map = {
-                "assisted_living": "assisted living",
-                "independent_living": "independent living",
-                "memory_care": "memory care",
-                "senior_apartments": "senior apartments"
+        case ctx.DeclinedElicitation():
+            return {
+                "status": "declined",
+                "message": "User declined to provide search preferences"
             }
 
-            housing_queries = [housing_types_map.get(ht, ht) for ht in prefs.housing_type]
-            query = f"{' or '.join(housing_queries)} in {prefs.location}"
+        case ctx.CancelledElicitation():
+            return {
+                "status": "cancelled",
+                "message": "Search cancelled by user"
+            }
 
-            # Search using Google Maps
-            radius_meters = prefs.radius_miles * 1609.34  # Convert miles to meters
 
-            results = await make_google_maps_request(
-                query=query,
-                location_bias=coords,
-                radius_meters=int(radius_meters)
+@mcp.tool()
+@json_result
+@metrics.instrument_tool
+async def search_senior_housing_batch(ctx) -> dict:
+    """
+    Search several candidate locations at once with shared preferences.
+    Elicits the list of locations plus budget, housing type and radius, then
+    searches all locations concurrently and returns a per-location summary.
+    """
+
+    with metrics.timer("stage_duration_seconds", stage="elicitation", tool="search_senior_housing_batch"):
+        response = await ctx.elicit(BatchHousingSearchPreferences)
+
+    match response:
+        case ctx.AcceptedElicitation():
+            prefs = response.value
+            shared = prefs.model_dump(exclude={"locations"})
+            locations = list(dict.fromkeys(prefs.locations))
+
+            semaphore = asyncio.Semaphore(BATCH_SEARCH_CONCURRENCY)
+            completed = 0
+
+            async def search_location(location: str) -> dict:
+                nonlocal completed
+                async with semaphore:
+                    # Each location's budget starts when it gets a slot, not while it waits for one
+                    try:
+                        result = await run_housing_search(
+                            HousingSearchPreferences(location=location, **shared),
+                            deadline=Deadline(SEARCH_DEADLINE_SECONDS)
+                        )
+                    except Exception as e:
+                        result = {"status": "error", "message": str(e), "location": location, "results": []}
+                completed += 1
+                await ctx.report_progress(progress=completed, total=len(locations))
+                return summarize_location_search(result, BATCH_TOP_RESULTS)
+
+            summaries = await asyncio.gather(*(search_location(location) for location in locations))
+
+            # Best locations first: strongest single match, then most options
+            ranked = sorted(
+                (summary for summary in summaries if summary["best_match_score"] is not None),
+                key=lambda summary: (-summary["best_match_score"], -summary["count"])
             )
 
             return {
-                "status": results["status"],
-                "query": query,
-                "location": prefs.location,
-                "coordinates": coords,
+                "status": "success" if any(summary["status"] == "success" for summary in summaries) else "error",
                 "preferences": prefs.model_dump(),
-                "results": results.get("results", []),
-                "count": len(results.get("results", []))
+                "locations": summaries,
+                "ranking": [summary["location"] for summary in ranked],
+                "count": len(summaries)
             }
 
         case ctx.DeclinedElicitation():
@@ -213,13 +885,131 @@ async def search_senior_housing(ctx) -> dict:
 
 
 @mcp.tool()
+@json_result
+@metrics.instrument_tool
+async def match_senior_housing(ctx) -> dict:
+    """
+    Search for senior housing and rank it against accessibility and location needs.
+    Elicits search, accessibility and location preferences in turn, drops
+    places that fail a hard requirement and scores the rest on the soft ones.
+    """
+
+    steps = (
+        ("search", HousingSearchPreferences),
+        ("accessibility", AccessibilityPreferences),
+        ("location", LocationPreferences)
+    )
+    answers = {}
+    for step, model in steps:
+        with metrics.timer("stage_duration_seconds", stage="elicitation", tool="match_senior_housing"):
+            response = await ctx.elicit(model)
+
+        match response:
+            case ctx.AcceptedElicitation():
+                answers[step] = response.value
+
+            case ctx.DeclinedElicitation():
+                return {
+                    "status": "declined",
+                    "message": f"User declined to provide {step} preferences"
+                }
+
+            case ctx.CancelledElicitation():
+                return {
+                    "status": "cancelled",
+                    "message": "Matching cancelled by user"
+                }
+
+    search = await run_housing_search(answers["search"])
+    if search["status"] != "success":
+        return search
+
+    # Tiles around the candidates, shared across searches: upstream calls scale with area, not results
+    amenities, partial = await amenity_service.amenities_near(
+        search["results"],
+        {amenity: AMENITY_RADIUS_MILES[amenity] for amenity in required_amenities(answers["location"])}
+    )
+
+    with metrics.timer("stage_duration_seconds", stage="matching"):
+        matcher = FacilityMatcher(search["results"], search["coordinates"], amenities, partial)
+
+    searched = {
+        "location": search["location"],
+        "coordinates": search["coordinates"],
+        "stale": search["stale"],
+        "search": answers["search"].model_dump()
+    }
+    session_id = client_session_id(ctx)
+    if session_id is not None:
+        matchers.put(session_id, matcher, searched)
+    return ranked_matches(matcher, searched, answers["accessibility"], answers["location"])
+
+
+@mcp.tool()
+@json_result
+@metrics.instrument_tool
+async def rerank_senior_housing(ctx) -> dict:
+    """
+    Re-rank the last match_senior_housing results with new accessibility and location needs.
+    Reuses this session's candidates and their precomputed features; only
+    amenity types not asked about before are looked up.
+    """
+
+    cached = None
+    session_id = client_session_id(ctx)
+    if session_id is not None:
+        cached = matchers.get(session_id)
+    if cached is None:
+        return {
+            "status": "error",
+            "message": "No recent match in this session; run match_senior_housing first"
+        }
+    matcher, searched = cached
+
+    answers = {}
+    for step, model in (("accessibility", AccessibilityPreferences), ("location", LocationPreferences)):
+        with metrics.timer("stage_duration_seconds", stage="elicitation", tool="rerank_senior_housing"):
+            response = await ctx.elicit(model)
+
+        match response:
+            case ctx.AcceptedElicitation():
+                answers[step] = response.value
+
+            case ctx.DeclinedElicitation():
+                return {
+                    "status": "declined",
+                    "message": f"User declined to provide {step} preferences"
+                }
+
+            case ctx.CancelledElicitation():
+                return {
+                    "status": "cancelled",
+                    "message": "Re-ranking cancelled by user"
+                }
+
+    missing = [amenity for amenity in required_amenities(answers["location"]) if amenity not in matcher.amenity_points]
+    if missing:
+        amenities, partial = await amenity_service.amenities_near(
+            matcher.places, {amenity: AMENITY_RADIUS_MILES[amenity] for amenity in missing}
+        )
+        with metrics.timer("stage_duration_seconds", stage="matching"):
+            for amenity, amenity_places in amenities.items():
+                matcher.set_amenities(amenity, amenity_places, complete=amenity not in partial)
+
+    return ranked_matches(matcher, searched, answers["accessibility"], answers["location"])
+
+
+@mcp.tool()
+@json_result
+@metrics.instrument_tool
 async def analyze_accessibility(ctx) -> dict:
     """
     Analyze accessibility needs and provide recommendations.
     Elicits detailed accessibility preferences.
     """
 
-    response = await ctx.elicit(AccessibilityPreferences)
+    with metrics.timer("stage_duration_seconds", stage="elicitation", tool="analyze_accessibility"):
+        response = await ctx.elicit(AccessibilityPreferences)
 
     match response:
         case ctx.AcceptedElicitation():
@@ -262,56 +1052,85 @@ async def analyze_accessibility(ctx) -> dict:
 
 
 @mcp.tool()
+@json_result
+@metrics.instrument_tool
 async def plan_budget(ctx) -> dict:
     """
     Help plan housing budget based on income and expenses.
     Provides detailed budget analysis and affordability guidance.
     """
 
-    response = await ctx.elicit(BudgetAnalysisPreferences)
+    with metrics.timer("stage_duration_seconds", stage="elicitation", tool="plan_budget"):
+        response = await ctx.elicit(BudgetAnalysisPreferences)
 
     match response:
         case ctx.AcceptedElicitation():
             prefs = response.value
 
-            # Calculate affordable housing budget
-            available_income = prefs.monthly_income - prefs.current_expenses - prefs.healthcare_costs
-            recommended_housing_budget = prefs.monthly_income * 0.30  # 30% rule
-            max_housing_budget = prefs.monthly_income * 0.40  # 40% max
-
-            # Calculate emergency fund needs
-            recommended_savings_reserve = recommended_housing_budget * 6  # 6 months
-
-            analysis = {
-                "monthly_income": prefs.monthly_income,
-                "available_after_expenses": available_income,
-                "recommended_housing_budget": round(recommended_housing_budget, 2),
-                "maximum_housing_budget": round(max_housing_budget, 2),
-                "recommended_savings_reserve": round(recommended_savings_reserve, 2),
-                "current_savings": prefs.savings,
-                "budget_breakdown": {
-                    "base_rent": round(recommended_housing_budget * 0.70, 2),
-                    "utilities": round(recommended_housing_budget * 0.15, 2) if prefs.include_utilities else 0,
-                    "meals": round(recommended_housing_budget * 0.15, 2) if prefs.include_meals else 0
-                },
-                "affordability_status": "comfortable" if available_income > recommended_housing_budget else "tight",
-                "recommendations": []
+            # A batch of one through the same engine case-worker batches use
+            analysis = budget_analysis_record(analyze_budgets(budget_columns([prefs])), 0)
+
+            return {
+                "status": "success",
+                "analysis": analysis,
+                "preferences": prefs.model_dump()
             }
 
-            # Add recommendations
-            if available_income < recommended_housing_budget:
-                analysis["recommendations"].append("Consider shared housing or studios to reduce costs")
-                analysis["recommendations"].append("Look into housing assistance programs")
+        case ctx.DeclinedElicitation():
+            return {"status": "declined"}
+
+        case ctx.CancelledElicitation():
+            return {"status": "cancelled"}
+
+
+@mcp.tool()
+@json_result
+@metrics.instrument_tool
+async def project_housing_costs(ctx) -> dict:
+    """
+    Project how long savings last as housing and healthcare costs rise.
+    Simulates monthly cash flow over several years across many randomized
+    rate and care-level scenarios.
+    """
 
-            if prefs.savings < recommended_savings_reserve:
-                analysis["recommendations"].append(f"Build emergency fund to ${recommended_savings_reserve:.0f}")
+    with metrics.timer("stage_duration_seconds", stage="elicitation", tool="project_housing_costs"):
+        response = await ctx.elicit(CostProjectionPreferences)
 
-            analysis["recommendations"].append("Compare what's included: meals, utilities, activities")
-            analysis["recommendations"].append("Ask about rate increases and fee structures")
+    match response:
+        case ctx.AcceptedElicitation():
+            prefs = response.value
+            if prefs.care_level not in CARE_LEVELS:
+                return {
+                    "status": "error",
+                    "message": f"Unknown care level: {prefs.care_level}",
+                    "preferences": prefs.model_dump()
+                }
+
+            assumptions = ProjectionAssumptions(
+                rent_escalation=prefs.rent_escalation,
+                healthcare_inflation=prefs.healthcare_inflation,
+                income_growth=prefs.income_growth,
+                care_transition_probability=prefs.care_transition_probability
+            )
+
+            # CPU-bound; keep the event loop free for other tool calls
+            with metrics.timer("stage_duration_seconds", stage="projection"):
+                projection = await asyncio.to_thread(
+                    project_costs,
+                    monthly_income=prefs.monthly_income,
+                    savings=prefs.savings,
+                    housing_cost=prefs.monthly_housing_cost,
+                    healthcare_costs=prefs.healthcare_costs,
+                    other_expenses=prefs.other_expenses,
+                    years=prefs.years,
+                    care_level=prefs.care_level,
+                    assumptions=assumptions,
+                    scenarios=PROJECTION_SCENARIOS
+                )
 
             return {
                 "status": "success",
-                "analysis": analysis,
+                "projection": projection,
                 "preferences": prefs.model_dump()
             }
 
@@ -323,12 +1142,15 @@ async def plan_budget(ctx) -> dict:
 
 
 @mcp.tool()
+@json_result
+@metrics.instrument_tool
 async def analyze_location_fit(ctx) -> dict:
     """
     Analyze how well a location fits user's proximity and lifestyle needs.
     """
 
-    response = await ctx.elicit(LocationPreferences)
+    with metrics.timer("stage_duration_seconds", stage="elicitation", tool="analyze_location_fit"):
+        response = await ctx.elicit(LocationPreferences)
 
     match response:
         case ctx.AcceptedElicitation():
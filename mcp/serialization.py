@@ -0,0 +1,44 @@
+"""
+Result Serialization
+
+Fast JSON encoding for tool and worker responses. orjson is used when it is
+installed (optional dependency); otherwise the standard library encoder with
+compact separators.
+
+FastMCP converts a dict returned by a tool to JSON more than once: it
+validates it against the output schema, encodes it for the text content
+block and serializes it again as structured content. json_result hands
+FastMCP a finished ToolResult instead, with the text block encoded once by
+dumps.
+"""
+
+import json
+import functools
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Optional dependency, stdlib json is the fallback
+    orjson = None
+
+
+def dumps(data: Any) -> str:
+    """Encode JSON-ready data; values JSON cannot represent are written as str()"""
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(data, default=str, ensure_ascii=False, separators=(",", ":"))
+
+
+def json_result(fn):
+    """Decorator for async tools returning dicts: encode the response once with dumps"""
+    from fastmcp.tools import ToolResult
+    from mcp.types import TextContent
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        result = await fn(*args, **kwargs)
+        if not isinstance(result, dict):
+            return result
+        return ToolResult(content=[TextContent(type="text", text=dumps(result))], structured_content=result)
+
+    return wrapper
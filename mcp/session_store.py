@@ -0,0 +1,149 @@
+"""
+Conversation Session Store
+
+Per-conversation state for the housing coach, keyed by the conversations.id
+UUID from supabase/migrations/003_create_conversations.sql. Sessions live in a
+bounded LRU; idle sessions are evicted and transparently rehydrated from
+storage the next time their conversation sends a message.
+"""
+
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from conversation_state import ConversationState
+
+
+# Loads a conversation's stored messages (oldest first), or None if unknown
+HistoryLoader = Callable[[str], Awaitable[Optional[List[Dict[str, str]]]]]
+
+
+class ConversationSession:
+    """Compact record of one conversation's in-memory state"""
+
+    __slots__ = ("conversation_id", "history", "preferences", "search_results", "comparison",
+                 "state", "last_access", "max_history", "max_search_results")
+
+    def __init__(self, conversation_id: str, max_history: int = 100, max_search_results: int = 500):
+        self.conversation_id = conversation_id
+        self.history: List[Dict[str, str]] = []
+        self.preferences: Dict[str, Any] = {}
+        self.search_results: List[Dict[str, Any]] = []
+        # FacilityComparison over search_results, built on the first comparison request
+        self.comparison = None
+        self.state = ConversationState()
+        self.last_access = time.monotonic()
+        self.max_history = max_history
+        self.max_search_results = max_search_results
+
+    def append(self, role: str, content: str) -> None:
+        """Add a message, folding it into state and trimming the oldest beyond the cap"""
+        message = {"role": role, "content": content}
+        self.state.observe(message)
+        self.history.append(message)
+        if len(self.history) > self.max_history:
+            del self.history[:len(self.history) - self.max_history]
+
+    def set_search_results(self, results: List[Dict[str, Any]]) -> None:
+        """Replace the search results; a built comparison is updated in place, not rebuilt"""
+        self.search_results = results[:self.max_search_results]
+        if self.comparison is not None:
+            self.comparison.sync(self.search_results)
+
+
+class SessionStats:
+    """Counters for the session store"""
+
+    def __init__(self):
+        self.hits = 0
+        self.created = 0
+        self.rehydrated = 0
+        self.evicted_lru = 0
+        self.evicted_idle = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+class SessionManager:
+    """
+    Bounded LRU of ConversationSession records.
+
+    At most max_sessions are held; sessions idle longer than idle_seconds are
+    dropped on the next access sweep. When a conversation is not in memory,
+    loader (if given) is used to rebuild it from stored messages.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_seconds: float = 30 * 60,
+                 max_history: int = 100, max_search_results: int = 500,
+                 loader: Optional[HistoryLoader] = None):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.max_history = max_history
+        self.max_search_results = max_search_results
+        self.loader = loader
+        self.stats = SessionStats()
+        self._sessions: OrderedDict[str, ConversationSession] = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return conversation_id in self._sessions
+
+    def _new_session(self, conversation_id: str) -> ConversationSession:
+        return ConversationSession(conversation_id, self.max_history, self.max_search_results)
+
+    def _evict(self) -> None:
+        """Drop idle sessions, then least recently used ones beyond the cap"""
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_access >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            self.stats.evicted_idle += 1
+
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.stats.evicted_lru += 1
+
+    async def _rehydrate(self, conversation_id: str) -> ConversationSession:
+        session = self._new_session(conversation_id)
+        messages = await self.loader(conversation_id) if self.loader else None
+        if messages:
+            # Every stored message feeds state; only the newest stay in history
+            for message in messages:
+                session.append(message["role"], message["content"])
+            self.stats.rehydrated += 1
+        else:
+            self.stats.created += 1
+        return session
+
+    async def get(self, conversation_id: str) -> ConversationSession:
+        """Get a conversation's session, rehydrating it from storage if evicted"""
+        session = self._sessions.get(conversation_id)
+        if session is not None:
+            self.stats.hits += 1
+        else:
+            # Concurrent turns for the same conversation share one load
+            task = self._loading.get(conversation_id)
+            if task is None:
+                task = asyncio.ensure_future(self._rehydrate(conversation_id))
+                self._loading[conversation_id] = task
+            try:
+                session = await asyncio.shield(task)
+            finally:
+                self._loading.pop(conversation_id, None)
+            session = self._sessions.setdefault(conversation_id, session)
+
+        session.last_access = time.monotonic()
+        self._sessions.move_to_end(conversation_id)
+        self._evict()
+        return session
+
+    def discard(self, conversation_id: str) -> None:
+        """Forget a conversation's in-memory session"""
+        self._sessions.pop(conversation_id, None)
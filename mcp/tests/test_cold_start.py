@@ -0,0 +1,15 @@
+"""Cold-start budgets from benchmarks/bench_import.py, enforced on every test run"""
+
+import pytest
+
+from benchmarks.bench_import import ENTRY_POINTS, check, measure
+
+# Fewer runs than the benchmark's default; the median still smooths out a slow start
+RUNS = 3
+
+
+@pytest.mark.parametrize("module", list(ENTRY_POINTS))
+def test_entry_point_imports_within_budget(module):
+    entry = ENTRY_POINTS[module]
+    result = measure(module, entry["lazy"], RUNS)
+    assert check(result, entry["budget_ms"]) == []
@@ -0,0 +1,65 @@
+"""FacilityComparison updates and the coach's comparison picks"""
+
+import asyncio
+
+import comparison
+from comparison import FacilityComparison
+from housing_coach_orchestrator import HousingCoachOrchestrator
+
+
+def place(place_id, cost=2000, rating=4.0, distance=1.0, name=None):
+    return {"id": place_id, "name": name or f"Place {place_id}", "estimatedMonthlyCost": cost,
+            "rating": rating, "distanceMiles": distance, "accessibilityOptions": {}}
+
+
+def compare(message, results, facility_ids=None):
+    orchestrator = HousingCoachOrchestrator()
+    return asyncio.run(orchestrator.process_conversation_message(
+        "conversation", message, search_results=results, facility_ids=facility_ids
+    ))
+
+
+def test_sync_recomputes_only_changed_and_added_rows(monkeypatch):
+    places = [place(place_id) for place_id in ("a", "b", "c")]
+    matrix = FacilityComparison(places)
+
+    built = []
+    row = comparison._row
+    monkeypatch.setattr(comparison, "_row", lambda p: built.append(p["id"]) or row(p))
+    matrix.sync([place("a"), place("b", distance=3.0), place("d")])
+
+    assert sorted(built) == ["b", "d"]
+    assert len(matrix) == 3 and "c" not in matrix
+    result = matrix.compare()
+    assert result["values"]["distance_miles"][result["ids"].index("b")] == 3.0
+
+
+def test_ids_inside_other_words_are_not_picked():
+    result = compare("compare them please", [place("a"), place("b"), place("c")])
+    assert result["type"] == "comparison_analysis"
+    assert result["data"]["comparison"]["count"] == 3
+
+
+def test_names_are_picked_as_whole_words():
+    results = [place("p1", name="Oak"), place("p2", name="Maple"), place("p3", name="Pine")]
+    result = compare("compare Oak and Maple, not the oakwood one", results)
+    assert sorted(result["data"]["comparison"]["ids"]) == ["p1", "p2"]
+
+
+def test_unknown_facility_ids_fall_back_to_all_results_and_are_reported():
+    result = compare("compare these", [place("a"), place("b"), place("c")], facility_ids=["x", "y"])
+    data = result["data"]["comparison"]
+    assert data["count"] == 3 and data["missing"] == ["x", "y"]
+    assert "I couldn't find x, y in your results, so I compared all of them." in result["message"]
+
+
+def test_unknown_facility_ids_are_reported_when_the_rest_are_compared():
+    result = compare("compare these", [place("a"), place("b"), place("c")], facility_ids=["a", "b", "z"])
+    data = result["data"]["comparison"]
+    assert sorted(data["ids"]) == ["a", "b"] and data["missing"] == ["z"]
+    assert "I couldn't find z in your results." in result["message"]
+
+
+def test_more_than_fifty_results_are_compared():
+    results = [place(f"p{i}", cost=1500 + i) for i in range(120)]
+    assert compare("compare them", results)["data"]["comparison"]["count"] == 120
@@ -0,0 +1,147 @@
+"""MessageWriter write-behind behaviour, backed by the SQLite sink"""
+
+import asyncio
+import uuid
+
+import pytest
+
+from message_store import MessageWriter, SQLiteMessageSink
+
+
+class RecordingSink(SQLiteMessageSink):
+    """SQLite sink that records batch sizes and can fail on demand"""
+
+    def __init__(self, fail_times: int = 0, bad_conversations: frozenset = frozenset()):
+        super().__init__(":memory:")
+        self.fail_times = fail_times
+        self.bad_conversations = bad_conversations
+        self.batch_sizes = []
+        self.blocked: dict[str, asyncio.Event] = {}
+
+    async def write_batch(self, rows):
+        for row in rows:
+            if row[1] in self.blocked:
+                await self.blocked[row[1]].wait()
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise RuntimeError("connection reset")
+        if any(row[1] in self.bad_conversations for row in rows):
+            # Like a missing conversations row: the whole statement fails
+            raise RuntimeError("violates foreign key constraint")
+        await super().write_batch(rows)
+        self.batch_sizes.append(len(rows))
+
+
+def conversation() -> str:
+    return str(uuid.uuid4())
+
+
+def test_messages_are_written_in_batches():
+    async def run():
+        sink = RecordingSink()
+        writer = MessageWriter(sink, batch_size=50, flush_interval=0.5)
+        conversation_id = conversation()
+        for i in range(120):
+            await writer.enqueue(conversation_id, "user", f"message {i}")
+        await writer.flush()
+        history = await sink.load(conversation_id)
+        await writer.aclose()
+        return sink, writer, history
+
+    sink, writer, history = asyncio.run(run())
+    assert sink.batch_sizes == [50, 50, 20]
+    assert [message["content"] for message in history] == [f"message {i}" for i in range(120)]
+    assert writer.stats.as_dict()["written"] == 120
+
+
+def test_failed_batch_is_retried():
+    async def run():
+        sink = RecordingSink(fail_times=2)
+        writer = MessageWriter(sink, flush_interval=0.01, max_retries=3)
+        conversation_id = conversation()
+        await writer.enqueue(conversation_id, "user", "hello")
+        await writer.enqueue(conversation_id, "assistant", "hi there")
+        await writer.flush()
+        history = await sink.load(conversation_id)
+        await writer.aclose()
+        return writer, history
+
+    writer, history = asyncio.run(run())
+    assert [message["role"] for message in history] == ["user", "assistant"]
+    stats = writer.stats.as_dict()
+    assert stats["failed_batches"] == 2
+    assert stats["split_batches"] == 0
+    assert stats["dropped"] == 0
+
+
+def test_bad_rows_are_split_out_and_dropped_alone():
+    async def run():
+        bad = conversation()
+        sink = RecordingSink(bad_conversations=frozenset({bad}))
+        writer = MessageWriter(sink, batch_size=50, flush_interval=0.05, max_retries=1)
+        good = [conversation() for _ in range(4)]
+        for i in range(10):
+            for conversation_id in good:
+                await writer.enqueue(conversation_id, "user", f"message {i}")
+            if i < 3:
+                await writer.enqueue(bad, "user", f"orphan {i}")
+        await writer.flush()
+        stored = {conversation_id: len(await sink.load(conversation_id)) for conversation_id in good + [bad]}
+        await writer.aclose()
+        return writer, good, bad, stored
+
+    writer, good, bad, stored = asyncio.run(run())
+    assert all(stored[conversation_id] == 10 for conversation_id in good)
+    assert stored[bad] == 0
+    stats = writer.stats.as_dict()
+    assert stats["written"] == 40
+    assert stats["dropped"] == 3
+    assert stats["split_batches"] >= 1
+
+
+def test_load_history_includes_queued_messages():
+    async def run():
+        writer = MessageWriter(RecordingSink(), flush_interval=0.2)
+        conversation_id = conversation()
+        await writer.enqueue(conversation_id, "user", "I use a walker")
+        await writer.enqueue(conversation_id, "assistant", "Let's look at accessible places")
+        history = await writer.load_history(conversation_id)
+        await writer.aclose()
+        return history
+
+    assert asyncio.run(run()) == [
+        {"role": "user", "content": "I use a walker"},
+        {"role": "assistant", "content": "Let's look at accessible places"}
+    ]
+
+
+def test_load_history_does_not_wait_for_other_conversations():
+    async def run():
+        sink = RecordingSink()
+        writer = MessageWriter(sink, flush_interval=0.01)
+        ready, stuck = conversation(), conversation()
+        await writer.enqueue(ready, "user", "hello")
+        await writer.flush()
+
+        sink.blocked[stuck] = asyncio.Event()
+        await writer.enqueue(stuck, "user", "still writing")
+        await asyncio.sleep(0.05)
+        history = await asyncio.wait_for(writer.load_history(ready), 1)
+
+        sink.blocked[stuck].set()
+        await writer.aclose()
+        return history
+
+    assert asyncio.run(run()) == [{"role": "user", "content": "hello"}]
+
+
+def test_enqueue_rejects_non_uuid_conversation_ids():
+    async def run():
+        writer = MessageWriter(RecordingSink())
+        try:
+            await writer.enqueue("bench-1", "user", "hello")
+        finally:
+            await writer.aclose()
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
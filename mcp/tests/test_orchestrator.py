@@ -0,0 +1,31 @@
+"""Multi-intent dispatch in HousingCoachOrchestrator"""
+
+import asyncio
+
+from housing_coach_orchestrator import HousingCoachOrchestrator
+
+# The example from the multi-intent request: budget, accessibility and location in one message
+EXAMPLE = "I use a walker and can afford $2,000 near my daughter in Akron"
+
+
+def test_every_intent_in_the_example_gets_an_agent():
+    orchestrator = HousingCoachOrchestrator(multi_intent=True)
+    assert sorted(orchestrator.dispatch_intents(EXAMPLE)) == ["accessibility", "budget", "location"]
+
+
+def test_example_answer_covers_budget_accessibility_and_location():
+    orchestrator = HousingCoachOrchestrator(multi_intent=True)
+    result = asyncio.run(orchestrator.process_message(EXAMPLE, []))
+
+    assert result["type"] == "multi_agent"
+    assert sorted(response["type"] for response in result["data"]["responses"]) == [
+        "accessibility_analysis", "budget_analysis", "location_analysis"
+    ]
+    assert result["data"]["timed_out"] == [] and result["data"]["failed"] == []
+    location = next(response for response in result["data"]["responses"] if response["intent"] == "location")
+    assert location["data"]["areas"] == ["akron"]
+
+
+def test_location_message_gets_the_location_agent():
+    result = asyncio.run(HousingCoachOrchestrator().process_message("I want to be close to the hospital", []))
+    assert result["type"] == "location_analysis"